@@ -15,6 +15,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 SECRET_KEY = os.getenv("SECRET_KEY","no key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Usernames allowed on the /admin routes (comma separated); unset, no one is
+ADMIN_USERS = {name.strip() for name in os.getenv("ADMIN_USERS", "").split(",") if name.strip()}
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -41,3 +43,9 @@ def get_current_user(token:str = Depends(oauth2_scheme),db: Session = Depends(ge
     if user is None:
         raise credential_exception
     return user
+
+def get_current_admin(current_user = Depends(get_current_user)):
+    """The current user, provided it is listed in ADMIN_USERS; 403 otherwise."""
+    if current_user.username not in ADMIN_USERS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
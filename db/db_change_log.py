@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from db.models import ChangeLog
+from resources.logger import Logger
+from sqlalchemy import func
+logger = Logger()
+
+def record_change(db: Session, table_name: str, item_id: int, operation: str):
+    """Adds a change log row to the session's open transaction.
+
+    Call it before the commit of the mutation it describes, so the row is written or rolled
+    back together with it. Inserted rows need their id first (``db.flush()``).
+    Args:
+        db (Session): SQLAlchemy database session holding the mutation.
+        table_name (str): Table of the changed row ("ingredients" or "recipes").
+        item_id (int): ID of the changed row.
+        operation (str): "insert", "update" or "delete".
+    """
+    db.add(ChangeLog(table_name=table_name, item_id=item_id, operation=operation))
+
+def latest_seq(db: Session) -> int:
+    """Sequence number of the newest change, 0 when the log is empty."""
+    return db.query(func.max(ChangeLog.seq)).scalar() or 0
+
+def oldest_seq(db: Session) -> int | None:
+    """Sequence number of the oldest change still in the log (older ones were pruned), None when it is empty."""
+    return db.query(func.min(ChangeLog.seq)).scalar()
+
+def changes_since(db: Session, table_name: str, seq: int, limit: int):
+    """Up to ``limit`` changes of ``table_name`` after ``seq``, oldest first, as (seq, item_id, operation) rows."""
+    return (db.query(ChangeLog.seq, ChangeLog.item_id, ChangeLog.operation)
+            .filter(ChangeLog.table_name == table_name, ChangeLog.seq > seq)
+            .order_by(ChangeLog.seq)
+            .limit(limit)
+            .all())
+
+def prune_changes(db: Session, retention: timedelta) -> int:
+    """Deletes the changes older than ``retention``; returns how many were removed."""
+    cutoff = datetime.now(timezone.utc) - retention
+    removed = db.query(ChangeLog).filter(ChangeLog.created_at < cutoff).delete(synchronize_session=False)
+    db.commit()
+    logger.info(f"Pruned {removed} change log rows older than {retention}")
+    return removed
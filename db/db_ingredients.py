@@ -5,6 +5,7 @@ from resources.logger import Logger
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from sqlalchemy import func
+from db.db_change_log import record_change
 logger = Logger()
 
 def create(db: Session, request: IngredientsBase, creator_id: int):
@@ -50,6 +51,8 @@ def create(db: Session, request: IngredientsBase, creator_id: int):
         logger.error(f"Ingredient with name {request.name} already exists")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT,detail="An ingredient with that name already exists")
     db.add(new_ingredient)
+    db.flush()  # Flush to get the new ingredient ID for the change log
+    record_change(db, Ingredients.__tablename__, new_ingredient.id, "insert")
     db.commit()
     db.refresh(new_ingredient)
     logger.info(f"Ingredient created: {new_ingredient.name} for user ID: {new_ingredient.user_id}")
@@ -108,6 +111,7 @@ def update(db: Session, ingredient_id: int, user_id: int, updates: IngredientsUp
 
     for field, value in data.items():
         setattr(ingredient, field, value)
+    record_change(db, Ingredients.__tablename__, ingredient.id, "update")
 
     try:
         db.commit()
@@ -139,6 +143,7 @@ def delete(db: Session, ingredient_id: int, user_id: int):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Ingredient not found")
     db.delete(ingredient)
+    record_change(db, Ingredients.__tablename__, ingredient_id, "delete")
     db.commit()
     logger.info(f"Ingredient deleted: id={ingredient_id} by user {user_id}")
     return {"message": "Ingredient deleted successfully", "ingredient_id": ingredient_id}
@@ -3,6 +3,7 @@ from sqlalchemy import func
 from db.models import Recipes, RecipeIngredients
 from routers.schemas import RecipesBase, RecipeIngredientBase
 from db.db_ingredients import get_ingredient_by_id
+from db.db_change_log import record_change
 from fastapi import HTTPException, status
 from resources.logger import Logger
 
@@ -80,6 +81,7 @@ def create_recipe(db: Session, recipe_data: RecipesBase, user_id: int):
     new_recipe.fibers = recipe_fibers
     new_recipe.sugar = recipe_sugar
     new_recipe.saturated_fats = recipe_saturated_fats
+    record_change(db, Recipes.__tablename__, new_recipe.id, "insert")
     db.commit()
     db.refresh(new_recipe)
     return new_recipe
@@ -158,6 +160,7 @@ def update_recipe(db: Session, recipe_id: int, user_id: int, recipe_data: Recipe
         recipe.fibers = recipe_fibers
         recipe.sugar = recipe_sugar
         recipe.saturated_fats = recipe_saturated_fats
+        record_change(db, Recipes.__tablename__, recipe.id, "update")
         db.commit()
         db.refresh(recipe)
         return recipe
@@ -177,6 +180,7 @@ def delete_recipe(db: Session, recipe_id: int, user_id: int):
         for ingredient in recipe_ingredient:
             db.delete(ingredient)
         db.delete(recipe)
+        record_change(db, Recipes.__tablename__, recipe_id, "delete")
         db.commit()
         logger.info(f"Deleted recipe with ID: {recipe_id}")
     except Exception as e:
@@ -2,6 +2,7 @@ from .database import Base
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, JSON
 from sqlalchemy.sql.schema import ForeignKey
 from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
 
 class ReprMixin:
     __repr_fields__ = ("id",)
@@ -82,4 +83,15 @@ class RecipeIngredients(Base):
     ingredient_id = Column(Integer, ForeignKey("ingredients.id", ondelete="RESTRICT",onupdate="CASCADE"))
     quantity = Column(Float, default= 0.0)  # Quantity in grams or appropriate unit
     recipe = relationship("Recipes", back_populates="recipe_ingredients")
-    ingredient = relationship("Ingredients",back_populates="recipe_ingredients")
\ No newline at end of file
+    ingredient = relationship("Ingredients",back_populates="recipe_ingredients")
+
+class ChangeLog(Base):
+    """SQLAlchemy model for the ChangeLog table. One row per ingredient or recipe mutation, in commit order,
+    written in the mutation's transaction so every worker can replay it into its search index."""
+    __tablename__ = "change_log"
+    __table_args__ = {"sqlite_autoincrement": True}  # Never reuse a pruned sequence number
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String(50), index=True)
+    item_id = Column(Integer)
+    operation = Column(String(10))  # "insert", "update" or "delete"
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
@@ -1,14 +1,14 @@
 from fastapi import FastAPI
 from db import models
 from db.database import engine
-from routers import user, ingredient_router, recipe_router
+from routers import user, ingredient_router, recipe_router, admin
 from auth import authentication
 from fastapi.middleware.cors import CORSMiddleware
 from auth import authentication
 from resources.logger import Logger
 from resources.background_task_sheduler import schedule_tasks, stop_scheduler
 from contextlib import asynccontextmanager
-from resources.core.entity_cache import ingredient_cache, recipe_cache
+from resources.core.entity_cache import INDEX_SERVER_SOCKET, ingredient_cache, recipe_cache
 
 logger = Logger()
 
@@ -21,6 +21,10 @@ async def lifespan(app: FastAPI):
         yield   # Application runs here
     finally:
         stop_scheduler()
+        # The index server writes its own; a pre-forked worker's base belongs to its generation
+        for cache in (ingredient_cache, recipe_cache):
+            if not INDEX_SERVER_SOCKET and not cache.inherited:
+                cache.save_snapshot()  # Restored by the next start
 
 app = FastAPI(lifespan=lifespan)
 
@@ -30,6 +34,7 @@ app.include_router(authentication.router)
 app.include_router(user.router)
 app.include_router(ingredient_router.router)
 app.include_router(recipe_router.router)
+app.include_router(admin.router)
 
 @app.get("/")
 def read_root():
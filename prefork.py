@@ -0,0 +1,176 @@
+"""Pre-fork launcher for main:app: the search index is built once and shared copy-on-write.
+
+    python prefork.py --workers 4 --host 0.0.0.0 --port 8000
+
+Plain ``uvicorn --workers N`` has every worker build its own ingredient and recipe index.
+Here a generation process imports the app, builds both caches, moves everything allocated so
+far into the permanent GC generation (``gc.freeze()``) and only then forks the workers. The
+workers share those pages with it until one of them writes to them, and the collector skips
+frozen objects, so collections in a worker do not copy them either. Reads still update
+reference counts, so the pages a worker's searches keep traversing do get copied over time
+(see testing/benchmarks/prefork_memory.py for the resulting RSS per worker).
+
+Workers run with snapshot reads (SNAPSHOT_READS=1): an index write copies the nodes on its
+path and publishes a new root instead of changing nodes in place, so a worker's own
+mutations live in a small private overlay of copied nodes on top of the shared base. Every
+``--rebuild-interval`` seconds a new generation builds a fresh base from the database, which
+holds the changes of every worker, takes over the listening socket and the old workers shut
+down gracefully; this merges the overlays back into one shared index.
+"""
+import argparse, gc, os, signal, socket, time
+from resources.logger import Logger
+
+REBUILD_INTERVAL = float(os.getenv("PREFORK_REBUILD_INTERVAL", "3600"))  # Seconds between base index rebuilds (0 disables)
+RESPAWN_DELAY = 1.0  # Seconds before a crashed worker is replaced, so a failing worker does not spin
+
+logger = Logger()
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """The listening socket, created once and inherited by every generation of workers."""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    return sock
+
+def _default_signals():
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_DFL)
+
+def _serve(app, sock: socket.socket, log_level: str):
+    """Runs one worker on the inherited socket; the lifespan finds the caches already built."""
+    import uvicorn
+    from resources.core.entity_cache import ingredient_cache, recipe_cache
+    uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+    for cache in (ingredient_cache, recipe_cache):
+        cache.sync_usage_to_db()  # The next base index is built from the table
+
+def _generation(sock: socket.socket, workers: int, log_level: str, ready_fd: int):
+    """Builds the base index, forks ``workers`` workers on it and keeps them running until SIGTERM."""
+    from main import app
+    from db.database import engine
+    from resources.core.entity_cache import ingredient_cache, recipe_cache
+    start = time.perf_counter()
+    for cache in (ingredient_cache, recipe_cache):
+        cache.build_cache()
+        cache.inherited = cache.built  # Workers leave snapshots and rebuilds of a shared base to the launcher
+    engine.dispose()  # Pooled connections must not be shared with the workers
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Base index built in {time.perf_counter() - start:.2f} s; forking {workers} workers.")
+
+    pids = set()
+    stopping = False
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            _default_signals()
+            status = 0
+            try:
+                _serve(app, sock, log_level)
+            except BaseException as e:
+                logger.error(f"Worker {os.getpid()} failed: {e}")
+                status = 1
+            finally:
+                os._exit(status)
+        pids.add(pid)
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in pids:
+            os.kill(pid, signal.SIGTERM)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    os.write(ready_fd, b"1")
+    os.close(ready_fd)
+    while pids:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        pids.discard(pid)
+        if not stopping:
+            logger.warning(f"Worker {pid} exited with status {status}; forking a replacement from the base index.")
+            time.sleep(RESPAWN_DELAY)
+            spawn()
+
+def start_generation(sock: socket.socket, workers: int, log_level: str) -> int | None:
+    """Forks a generation and waits until its workers are up; returns its pid, or None if it failed."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        _default_signals()
+        status = 0
+        try:
+            _generation(sock, workers, log_level, write_fd)
+        except BaseException as e:
+            logger.error(f"Worker generation failed: {e}")
+            status = 1
+        finally:
+            os._exit(status)
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as ready:
+        if ready.read(1) == b"1":
+            return pid
+    os.waitpid(pid, 0)
+    return None
+
+def stop_generation(pid: int):
+    """Asks a generation to shut its workers down gracefully and waits for it."""
+    try:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+    except (ProcessLookupError, ChildProcessError):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve main:app from workers forked after the search index is built.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--rebuild-interval", type=float, default=REBUILD_INTERVAL,
+                        help="seconds between base index rebuilds; 0 keeps the first base forever")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    if os.getenv("INDEX_SERVER_SOCKET"):
+        parser.error("INDEX_SERVER_SOCKET is set: the workers would query the index server instead of a shared base index")
+    # Workers must never mutate base nodes in place (see the module docstring)
+    os.environ["SNAPSHOT_READS"] = "1"
+
+    sock = bind_socket(args.host, args.port)
+    current = start_generation(sock, args.workers, args.log_level)
+    if current is None:
+        raise SystemExit("The first worker generation failed to start.")
+    stopping = False
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info(f"Pre-fork server listening on {args.host}:{args.port} with {args.workers} workers.")
+    rebuild_at = time.monotonic() + args.rebuild_interval
+    while not stopping:
+        time.sleep(1)
+        if current is not None and os.waitpid(current, os.WNOHANG)[0]:
+            logger.error("Worker generation exited; starting a new one.")
+            current = None
+        rebuild_due = args.rebuild_interval > 0 and time.monotonic() >= rebuild_at
+        if stopping or (current is not None and not rebuild_due):
+            continue
+        replacement = start_generation(sock, args.workers, args.log_level)
+        if replacement is None:
+            logger.error("Base index rebuild failed; keeping the current workers.")
+        else:
+            if current is not None:
+                stop_generation(current)
+            current = replacement
+            logger.info("Workers replaced by a generation forked from a freshly built base index.")
+        rebuild_at = time.monotonic() + args.rebuild_interval
+    if current is not None:
+        stop_generation(current)
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,22 @@
+import os
 import threading
 import time
 from typing import Any, Callable, Tuple
 from resources.logger import Logger
 from auth.authentication import delete_unverified_users
-from resources.core.entity_cache import ingredient_cache, recipe_cache
+from resources.core.entity_cache import CHANGE_LOG_POLL, ingredient_cache, recipe_cache, tail_change_log
+from db.database import SessionLocal
+from db.db_change_log import prune_changes
+from datetime import timedelta
 
 _scheduler_started = False
 _stop_scheduler_event = threading.Event()
 UNVERIFIED_CLEAN_INTERVAL_HOURS = 3 * 60
 INGREDIENT_CACHE_SYNC_INTERVAL_HOURS = 2 * 60
 RECIEPE_CACHE_SYNC_INTERVAL_HOURS = 2 * 60
+CHANGE_LOG_PRUNE_INTERVAL_HOURS = 6 * 60 * 60
+INDEX_REBUILD_INTERVAL_HOURS = float(os.getenv("INDEX_REBUILD_INTERVAL_HOURS", "24")) * 60 * 60  # 0 disables
+CHANGE_LOG_RETENTION = timedelta(days=1)  # Workers read the log within seconds; older rows are never needed
 logger = Logger()
 
 class QueueNode:
@@ -115,6 +122,14 @@ class BackgroundTaskQueue:
 
 task_queue = BackgroundTaskQueue(1)
 
+def prune_change_log():
+    """Deletes the change log rows every worker has long applied."""
+    db = SessionLocal()
+    try:
+        prune_changes(db, CHANGE_LOG_RETENTION)
+    finally:
+        db.close()
+
 def schedule_activity(func: Callable, intervarl_hours: int):
     """
     Schedules a background activity by adding the task to the background queue.
@@ -125,6 +140,13 @@ def schedule_activity(func: Callable, intervarl_hours: int):
         task_queue.add_task(func)
         time.sleep(intervarl_hours)
 
+def schedule_rebuilds(interval_seconds: float, caches: list):
+    """Rebuilds the search indexes of ``caches`` every ``interval_seconds``, the first time one interval after startup."""
+    while not _stop_scheduler_event.wait(interval_seconds):
+        logger.info("Scheduler is running: rebuilding the search indexes.")
+        for cache in caches:
+            cache.start_rebuild_thread()
+
 def schedule_tasks():
     """
     Starts the background scheduler for deleting unverified users.
@@ -143,6 +165,19 @@ def schedule_tasks():
     thread2.start()
     thread3 = threading.Thread(target=schedule_activity, args=(recipe_cache.start_sync_thread, RECIEPE_CACHE_SYNC_INTERVAL_HOURS), daemon=True)
     thread3.start()
+    if CHANGE_LOG_POLL > 0:
+        # Applies the other workers' ingredient and recipe mutations to this worker's search index
+        thread4 = threading.Thread(target=tail_change_log, args=([ingredient_cache, recipe_cache], CHANGE_LOG_POLL,
+                                                                 _stop_scheduler_event), daemon=True)
+        thread4.start()
+    thread5 = threading.Thread(target=schedule_activity, args=(prune_change_log, CHANGE_LOG_PRUNE_INTERVAL_HOURS), daemon=True)
+    thread5.start()
+    # A pre-forked worker's index is the base it shares copy-on-write with its siblings; a
+    # rebuild would replace it with a private copy. prefork.py rebuilds the base instead (--rebuild-interval)
+    rebuilt = [cache for cache in (ingredient_cache, recipe_cache) if not getattr(cache, "inherited", False)]
+    if INDEX_REBUILD_INTERVAL_HOURS > 0 and rebuilt:
+        thread6 = threading.Thread(target=schedule_rebuilds, args=(INDEX_REBUILD_INTERVAL_HOURS, rebuilt), daemon=True)
+        thread6.start()
     _scheduler_started = True
     logger.info("Background scheduler for deleting unverified users has been started.")
 
@@ -0,0 +1,197 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Hashable, Iterable, List, Tuple
+import threading
+
+# Admission and eviction for the items an EntityCache keeps in its search index. Only the
+# most used rows fit in the tries; the rest are reached through the database fallbacks, and
+# the policy decides which fallback hits are worth a slot and which cached item gives it up.
+#
+# W-TinyLFU (Einziger, Friedman & Manes): new items enter a small LRU window, so a burst of
+# fresh hits is served from memory; an item leaving the window only enters the main space
+# (a segmented LRU: probation, then protected once hit again) if its recent access frequency
+# beats that of the item it would evict. Frequencies come from a count-min sketch that is
+# halved every few accesses per slot, so old popularity fades.
+
+_HASH_MASK = (1 << 64) - 1
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F)
+
+class FrequencySketch:
+    """Approximate access counts of recently seen keys (count-min sketch with 4-bit style counters).
+
+    Each key maps to one counter per row and its estimate is the smallest of them; only the
+    smallest counters are incremented (conservative update), which keeps estimates of rare
+    keys low. The first access of a key since the last aging is only noted in a doorkeeper
+    set, so one-hit wonders never reach the counters. After ``10 * capacity`` accesses every
+    counter is halved and the doorkeeper cleared.
+    """
+    MAX_COUNT = 15
+
+    def __init__(self, capacity: int):
+        width = 1 << max(4, (4 * max(1, capacity) - 1).bit_length())  # ~4 counters per cached item
+        self._mask = width - 1
+        self._rows = [bytearray(width) for _ in range(4)]
+        self._doorkeeper: set = set()
+        self.sample_size = 10 * max(1, capacity)
+        self.additions = 0
+
+    def _indexes(self, key: Hashable) -> Tuple[int, int, int, int]:
+        # Two multiplicative hashes, each split into two 32-bit halves: one counter per row
+        h, mask = hash(key), self._mask
+        low, high = (h * _SEEDS[0]) & _HASH_MASK, (h * _SEEDS[1]) & _HASH_MASK
+        return low & mask, (low >> 32) & mask, high & mask, (high >> 32) & mask
+
+    def frequency(self, key: Hashable) -> int:
+        r0, r1, r2, r3 = self._rows
+        i0, i1, i2, i3 = self._indexes(key)
+        return min(r0[i0], r1[i1], r2[i2], r3[i3]) + (key in self._doorkeeper)
+
+    def increment(self, key: Hashable):
+        if key not in self._doorkeeper:
+            self._doorkeeper.add(key)
+        else:
+            r0, r1, r2, r3 = self._rows
+            i0, i1, i2, i3 = self._indexes(key)
+            low = min(r0[i0], r1[i1], r2[i2], r3[i3])
+            if low < self.MAX_COUNT:
+                # Unrolled over the four rows: this runs for every item of every search result
+                if r0[i0] == low:
+                    r0[i0] = low + 1
+                if r1[i1] == low:
+                    r1[i1] = low + 1
+                if r2[i2] == low:
+                    r2[i2] = low + 1
+                if r3[i3] == low:
+                    r3[i3] = low + 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+
+    def _age(self):
+        self._rows = [bytearray(count >> 1 for count in row) for row in self._rows]
+        self._doorkeeper.clear()
+        self.additions //= 2
+
+class WTinyLFU:
+    """Which keys hold the ``capacity`` cache slots: a W-TinyLFU window, probation and protected segment.
+
+    The policy only tracks keys; the caller stores the values and drops the keys that
+    :meth:`admit` returns as evicted. ``window_ratio`` of the slots form the window and
+    ``protected_ratio`` of the rest the protected segment. Keys are admitted after they were
+    fetched from the slower store, so the first access recorded after an admission is
+    counted as the miss that fetched the key.
+    """
+    def __init__(self, capacity: int, window_ratio: float = 0.01, protected_ratio: float = 0.8):
+        self.capacity = max(1, capacity)
+        self.window_capacity = max(1, int(self.capacity * window_ratio))
+        self.main_capacity = self.capacity - self.window_capacity
+        self.protected_capacity = int(self.main_capacity * protected_ratio)
+        self.sketch = FrequencySketch(self.capacity)
+        self._window: OrderedDict = OrderedDict()  # Least recently used first
+        self._probation: OrderedDict = OrderedDict()
+        self._protected: OrderedDict = OrderedDict()
+        self._fetched: set = set()  # Admitted keys whose fetching access is not recorded yet
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._window or key in self._probation or key in self._protected
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+    def record(self, key: Hashable):
+        """Counts one access of ``key`` and refreshes its recency if it is cached."""
+        with self._lock:
+            self._record(key)
+
+    def record_all(self, keys: Iterable[Hashable]):
+        with self._lock:
+            for key in keys:
+                self._record(key)
+
+    def _record(self, key: Hashable):
+        self.sketch.increment(key)
+        if key in self._fetched:
+            self._fetched.discard(key)
+            self.misses += 1
+            return
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        elif key in self._probation:
+            # A second hit in the main space: protect it, demoting the coldest protected key
+            del self._probation[key]
+            self._protected[key] = None
+            if len(self._protected) > self.protected_capacity:
+                self._probation[self._protected.popitem(last=False)[0]] = None
+        else:
+            self.misses += 1
+            return
+        self.hits += 1
+
+    def admit(self, key: Hashable) -> List[Hashable]:
+        """Gives ``key`` a window slot; returns the keys that lost theirs (never ``key`` itself)."""
+        with self._lock:
+            if key in self:
+                return []
+            self._window[key] = None
+            self._fetched.add(key)
+            evicted = []
+            while len(self._window) > self.window_capacity:
+                evicted.extend(self._to_main(self._window.popitem(last=False)[0]))
+            self._fetched.difference_update(evicted)
+            self.evicted += len(evicted)
+            return evicted
+
+    def _to_main(self, candidate: Hashable) -> List[Hashable]:
+        """Moves a key leaving the window into probation if it is used more often than the victim there."""
+        if len(self._probation) + len(self._protected) < self.main_capacity:
+            self._probation[candidate] = None
+            return []
+        victims = self._probation or self._protected
+        if not victims:
+            return [candidate]
+        victim = next(iter(victims))
+        if self.sketch.frequency(candidate) > self.sketch.frequency(victim):
+            del victims[victim]
+            self._probation[candidate] = None
+            self.admitted += 1
+            return [victim]
+        self.rejected += 1
+        return [candidate]
+
+    def load(self, keys: Iterable[Hashable]) -> List[Hashable]:
+        """Fills an empty policy with ``keys``, most used first; returns those beyond the capacity.
+
+        The most used keys start out protected and the least used sit in the window and at
+        the eviction end of probation, so they are the first to compete with new items.
+        """
+        with self._lock:
+            keys = list(keys)
+            protected = keys[:self.protected_capacity]
+            probation = keys[self.protected_capacity:self.main_capacity]
+            window = keys[self.main_capacity:self.capacity]
+            for segment, segment_keys in ((self._protected, protected), (self._probation, probation),
+                                          (self._window, window)):
+                for key in reversed(segment_keys):
+                    segment[key] = None
+            return keys[self.capacity:]
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            for segment in (self._window, self._probation, self._protected):
+                segment.pop(key, None)
+            self._fetched.discard(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"capacity": self.capacity, "window": len(self._window), "probation": len(self._probation),
+                "protected": len(self._protected), "hits": self.hits, "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0, "admitted": self.admitted,
+                "rejected": self.rejected, "evicted": self.evicted}
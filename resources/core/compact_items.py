@@ -0,0 +1,58 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Dict, Type
+import sys
+
+# A full-corpus index holds one item object per table row, and a pydantic summary costs well
+# over a kilobyte (an attribute dict plus the set of fields it was built with). Compact items
+# keep the same fields in __slots__ and answer the few pydantic calls the search code makes
+# (attribute access, model_dump, model_copy, model_fields), so the tries, result rendering
+# and index snapshots handle them like summaries.
+
+class CompactItem:
+    """Base of the classes made by :func:`compact_item_class`."""
+    __slots__ = ()
+    model_fields: Dict[str, object] = {}
+
+    def __init__(self, **values):
+        for name in self.model_fields:
+            setattr(self, name, values.get(name))
+        category = getattr(self, "category", None)
+        if isinstance(category, str):
+            self.category = sys.intern(category)  # A few categories shared by every row
+
+    @classmethod
+    def model_construct(cls, **values) -> CompactItem:
+        return cls(**values)
+
+    @classmethod
+    def model_validate(cls, obj: object) -> CompactItem:
+        """Copies the fields of a dict or of an object with those attributes (an ORM row, a summary).
+
+        Values are taken as they are: rows come from the table and summaries were validated.
+        """
+        if isinstance(obj, dict):
+            return cls(**obj)
+        return cls(**{name: getattr(obj, name, None) for name in cls.model_fields})
+
+    def model_dump(self) -> Dict[str, object]:
+        return {name: getattr(self, name) for name in self.model_fields}
+
+    def model_copy(self, update: Dict[str, object] | None = None) -> CompactItem:
+        return type(self)(**{**self.model_dump(), **(update or {})})
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and self.model_dump() == other.model_dump()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.model_fields)
+        return f"{type(self).__name__}({fields})"
+
+@lru_cache(maxsize=None)
+def compact_item_class(summary_cls: Type) -> Type[CompactItem]:
+    """A slotted class with the fields of the pydantic model ``summary_cls``."""
+    fields = dict(summary_cls.model_fields)
+    return type(f"Compact{summary_cls.__name__}", (CompactItem,),
+                {"__slots__": tuple(fields), "model_fields": fields, "__module__": __name__})
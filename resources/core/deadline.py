@@ -0,0 +1,42 @@
+from __future__ import annotations
+import time
+
+class Deadline:
+    """Cooperative time budget shared by every stage of one search.
+
+    Traversal loops call :meth:`exceeded` once per step and stop when it returns True,
+    keeping what they found so far. The clock is only read every ``check_every`` calls, so
+    the check in between costs a counter decrement; coarse steps (a stage, a query token)
+    use :meth:`check`, which always reads it. Once the budget is spent ``expired`` stays
+    True, which is how callers learn that a result is partial.
+    """
+    __slots__ = ("expires_at", "expired", "check_every", "_countdown")
+
+    def __init__(self, budget: float | None, check_every: int = 64):
+        # No budget (None or <= 0) never expires
+        self.expires_at = time.monotonic() + budget if budget and budget > 0 else None
+        self.expired = False
+        self.check_every = check_every
+        self._countdown = check_every
+
+    def exceeded(self) -> bool:
+        if self.expired:
+            return True
+        if self.expires_at is None:
+            return False
+        self._countdown -= 1
+        if self._countdown > 0:
+            return False
+        self._countdown = self.check_every
+        if time.monotonic() >= self.expires_at:
+            self.expired = True
+        return self.expired
+
+    def check(self) -> bool:
+        if not self.expired and self.expires_at is not None and time.monotonic() >= self.expires_at:
+            self.expired = True
+        return self.expired
+
+    def remaining(self) -> float | None:
+        """Seconds left in the budget (negative once spent), or None without a budget."""
+        return None if self.expires_at is None else self.expires_at - time.monotonic()
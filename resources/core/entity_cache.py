@@ -3,20 +3,88 @@ from typing import Type
 from pydantic import BaseModel
 from db.database import SessionLocal
 from db.models import Ingredients, Recipes
+from db.db_change_log import changes_since, latest_seq, oldest_seq
 from resources.logger import Logger
-from resources.core.search_engine import ObjectSearchTrie
+from resources.core.search_engine import ObjectSearchTrie, SearchTrie, TokenSearchTrie, tokenize
+from resources.core.radix_trie import RadixSearchTrie, RadixTokenSearchTrie
+from resources.core.sharded_trie import ShardedSearchTrie, ShardedTokenSearchTrie
+from resources.core.trigram_index import TrigramIndex
+from resources.core.typeahead import SessionStore
+from resources.core.result_cache import ResultCache
+from resources.core.admission import WTinyLFU
+from resources.core.compact_items import compact_item_class
+from resources.core.deadline import Deadline
+from resources.core.facets import SearchFilter
+from resources.core.snapshot import gc_paused
+from resources.core.index_client import RemoteEntityCache
 from routers.schemas import IngredientsSummary, RecipeSummary
 from collections import defaultdict
 from threading import Lock
+from sqlalchemy import bindparam, func, update
 from sqlalchemy.orm import Session
-import time, threading
+from types import SimpleNamespace
+import time, threading, os, functools
 
-TRIE_CACHE_LIMIT = 1000
+TRIE_CACHE_LIMIT = int(os.getenv("TRIE_CACHE_LIMIT", "1000"))  # Items kept in the search index
+TRIE_CACHE_BYTES = int(os.getenv("TRIE_CACHE_BYTES", "0"))  # Estimated index bytes to fill instead (0: limit by TRIE_CACHE_LIMIT)
+FULL_INDEX = os.getenv("FULL_INDEX", "0") == "1"  # Index every row as a compact item: no limit, searches never query the database
+BUDGET_CHECK_EVERY = 256  # Rows loaded between two index size checks while filling a memory budget
+ADMISSION_RECORD_DEPTH = 10  # Leading items of each search result counted as accesses by the admission policy
 ING_MAX_TRIE_DEPTH = 64
 REC_MAX_TRIE_DEPTH = 64
 USAGE_WEIGHT = 0.8
 PREFIX_BOOST_WEIGHT = 0.2
 DISTANCE_WEIGHT = 1.0
+TRIE_LAYOUT = os.getenv("TRIE_LAYOUT", "dict")  # "dict" (one node per character) or "radix" (compact)
+FUZZY_ENGINE = os.getenv("FUZZY_ENGINE", "dp")  # "dp" (row per edge) or "automaton" (Levenshtein DFA)
+SNAPSHOT_READS = os.getenv("SNAPSHOT_READS", "0") == "1"  # Copy-on-write writes, lock-free reads
+DELETION_INDEX = os.getenv("DELETION_INDEX", "0") == "1"  # SymSpell token index for multi-token fuzzy search
+TRIE_SHARDS = int(os.getenv("TRIE_SHARDS", "1"))  # Tries split by first character, each with its own lock (1: unsharded)
+SESSION_TTL = float(os.getenv("SEARCH_SESSION_TTL", "30"))  # Seconds a search-as-you-type session survives idle
+SESSION_LIMIT = 1000  # Live sessions kept per cache (least recently used dropped first)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "2048"))  # Cached search results per cache (0 disables)
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "60"))  # Seconds before a cached ranking is recomputed
+SEARCH_BUDGET = float(os.getenv("SEARCH_BUDGET_MS", "250")) / 1000  # Time budget per fuzzy/smart search (0 disables)
+FILTER_OVERFETCH = 8  # Infix candidates fetched per free slot when a search filter will drop some of them
+INDEX_SNAPSHOT_DIR = os.getenv("INDEX_SNAPSHOT_DIR")  # Directory of the binary index snapshots (unset disables them)
+INDEX_SERVER_SOCKET = os.getenv("INDEX_SERVER_SOCKET")  # Unix socket of a shared index server (unset: each process indexes)
+CHANGE_LOG_POLL = float(os.getenv("CHANGE_LOG_POLL_SECONDS", "2"))  # Seconds between two reads of the change log (0 disables)
+CHANGE_LOG_BATCH = 500  # Change log rows applied per query
+if INDEX_SNAPSHOT_DIR and TRIE_SHARDS > 1:
+    Logger().warning("INDEX_SNAPSHOT_DIR ignored: index snapshots do not support sharded tries (TRIE_SHARDS > 1).")
+    INDEX_SNAPSHOT_DIR = None
+
+def _result_cached(search_type: str):
+    """Serves a search method from ``EntityCache.result_cache``.
+
+    Results are keyed by search type, normalized query and the remaining arguments (limit,
+    distance, search filter); the session token only affects how a result is computed, not
+    what it is, and a ``stages`` list only reports it (a hit records the single stage
+    "cache"). A result cut short by its ``deadline`` is partial and is not cached. The
+    leading items of every result, cached or not, count as accesses for the admission policy.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, query: str, *args, **kwargs):
+            options = tuple(sorted((k, v) for k, v in kwargs.items() if k not in ("session_id", "stages", "deadline")))
+            key = (search_type, " ".join(tokenize(query)), args, options)
+            generation = self.generation  # read before computing so a concurrent write is never cached as current
+            cached = self.result_cache.get(key, generation)
+            if cached is not None:
+                if kwargs.get("stages") is not None:
+                    kwargs["stages"].append("cache")
+                if self.admission is not None:
+                    self.admission.record_all(row["id"] for row in cached[:ADMISSION_RECORD_DEPTH])
+                return list(cached)
+            result = method(self, query, *args, **kwargs)
+            deadline = kwargs.get("deadline")
+            if deadline is None or not deadline.expired:
+                self.result_cache.put(key, generation, result)
+            if self.admission is not None:
+                self.admission.record_all(row["id"] for row in result[:ADMISSION_RECORD_DEPTH])
+            return list(result)
+        return wrapper
+    return decorator
 
 class EntityCache:
     def __init__(self, search_trie: ObjectSearchTrie, model_cls: Type, summary_cls: Type[BaseModel]):
@@ -25,44 +93,306 @@ class EntityCache:
         self.ingredient_usage_cache = defaultdict(int)
         self.model_cls = model_cls
         self.summary_cls = summary_cls
+        # Objects stored in the index: compact slotted copies of the summaries in full-corpus mode
+        self.item_cls = compact_item_class(summary_cls) if FULL_INDEX else summary_cls
         # Track number of cached items
         self._cached_ids = set()
+        # Slots of the search index (None: every row); with TRIE_CACHE_BYTES it is sized from the built index
+        self.capacity = None if FULL_INDEX else TRIE_CACHE_LIMIT
+        # Which database fallback hits replace which cached items once the index is full
+        self.admission = WTinyLFU(self.capacity) if self.capacity is not None else None
         self._usage_lock = Lock()
+        # Usage increments not yet written to the table (id -> count since the last flush)
+        self._usage_deltas = defaultdict(int)
+        self.last_usage_flush = {"rows": 0, "seconds": 0.0}
+        # Substring index over every name in the table (not only the cached top items)
+        self.infix_index = TrigramIndex()
+        # Search-as-you-type state per client session token
+        self.sessions = SessionStore(SESSION_TTL, SESSION_LIMIT)
+        # Search results, valid while ``generation`` is unchanged (bumped by every index write)
+        self.result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+        self.generation = 0
+        self._generation_lock = Lock()
+        self.built = False  # Set once build_cache succeeds; a pre-forked worker inherits the built index
+        self.inherited = False  # Set by prefork.py: the index is a generation's base, shared with its workers
+        # Last change log row applied to the index (other workers' mutations arrive through the log)
+        self.change_seq = 0
+        self._change_lock = Lock()
+        # Held by every index write and by the swap at the end of rebuild_index
+        self._write_lock = threading.RLock()
+        self._rebuild_lock = Lock()  # One rebuild at a time; usage flushes wait for it
+        # While a rebuild runs: ids written since it started (id -> "insert" or "update") and their usage increments
+        self._journal: dict | None = None
+        self._journal_usage: defaultdict | None = None
+        self.last_rebuild: dict | None = None
+
+    def _journal_write(self, item_id: int, operation: str = "update"):
+        """Records a write for the rebuild in progress, if any (call under ``_write_lock``)."""
+        if self._journal is not None and self._journal.get(item_id) != "insert":
+            self._journal[item_id] = operation
+
+    def _bump_generation(self):
+        with self._generation_lock:
+            self.generation += 1
 
     def build_cache(self):
+        if self.built:
+            self.logger.info(f"{self.model_cls.__name__} cache already built; skipping build.")
+            return
         db = SessionLocal()
         try:
-            items = (db.query(self.model_cls).order_by(self.model_cls.usage_count.desc()).limit(TRIE_CACHE_LIMIT).all())
-            for ingredient in items:
-                summary_ingredient = self.summary_cls.model_validate(ingredient)
-                self._cached_ids.add(summary_ingredient.id)
-                self.ingredient_usage_cache[summary_ingredient.id] = ingredient.usage_count
-                self.search_index.insert(summary_ingredient,self.ingredient_usage_cache[summary_ingredient.id])
+            start = time.perf_counter()
+            # Read first: changes committed while the index loads are applied again by poll_changes,
+            # and a later change never matches the version
+            version = self._table_version(db)
+            self.change_seq = version["seq"]
+            restored = self._restore_snapshot(db, version)
+            if not restored:
+                self._load_rows(db)
+            self._load_admission()
+            self.infix_index.rebuild(db.query(self.model_cls.id, self.model_cls.name).all())
+            self.logger.info(f"Infix index built with {len(self.infix_index)} names.")
+            self._bump_generation()
             #self.print_tree_in_log_file()
+            source = "snapshot" if restored else "database"
             if self.summary_cls == IngredientsSummary:
-                self.logger.info(f"Ingredient cache built with {len(items)} items.")
+                self.logger.info(f"Ingredient cache built with {len(self._cached_ids)} items from {source} in {time.perf_counter() - start:.2f} s.")
             else:
-                self.logger.info(f"Recipe cache built with {len(items)} items.")
+                self.logger.info(f"Recipe cache built with {len(self._cached_ids)} items from {source} in {time.perf_counter() - start:.2f} s.")
             self.get_depth_()
+            index = self.search_index.stats()
+            self.logger.info(f"Search index: {index['prefix_trie']['nodes']} prefix nodes, "
+                             f"{index['token_trie']['nodes']} token nodes, {index['token_trie']['vocabulary']} tokens, "
+                             f"~{index['bytes']['total'] / 2**20:.1f} MiB")
+            if not restored:
+                self.save_snapshot(version)
+            self.built = True
         except Exception as e:
             self.logger.error(f"Error building ingredient cache: {e}")
         finally:
             db.close()
-    
+
+    def _load_rows(self, db: Session):
+        """Indexes the most used rows of the table (every row in full-corpus mode)."""
+        # Bare column rows: a full-corpus build would spend most of its time creating ORM objects
+        columns = [getattr(self.model_cls, name) for name in self.summary_cls.model_fields]
+        query = db.query(*columns).order_by(self.model_cls.usage_count.desc())
+        if not TRIE_CACHE_BYTES:
+            query = query.limit(self.capacity)  # No limit in full-corpus mode
+        for ingredient in query.yield_per(BUDGET_CHECK_EVERY):
+            summary_ingredient = self.item_cls.model_validate(ingredient)
+            self._cached_ids.add(summary_ingredient.id)
+            self.ingredient_usage_cache[summary_ingredient.id] = ingredient.usage_count
+            self.search_index.insert(summary_ingredient,self.ingredient_usage_cache[summary_ingredient.id])
+            if (TRIE_CACHE_BYTES and self.capacity is not None and len(self._cached_ids) % BUDGET_CHECK_EVERY == 0
+                    and self.search_index.stats()["bytes"]["total"] >= TRIE_CACHE_BYTES):
+                break
+        self._fit_budget()
+
+    def _fit_budget(self):
+        """With TRIE_CACHE_BYTES, sizes ``capacity`` to the items that fit the budget at the built index's bytes per item."""
+        if not TRIE_CACHE_BYTES or self.capacity is None:
+            return
+        index = self.search_index.stats()
+        if index["items"]:
+            self.capacity = max(1, int(TRIE_CACHE_BYTES * index["items"] / index["bytes"]["total"]))
+        self.logger.info(f"{self.model_cls.__name__} cache sized to {self.capacity} items "
+                         f"for a {TRIE_CACHE_BYTES / 2**20:.1f} MiB index budget.")
+
+    def _load_admission(self):
+        """Starts the admission policy over the loaded items, the least used first in line for eviction."""
+        if self.capacity is None:
+            return
+        self.admission = WTinyLFU(self.capacity)
+        ranked = sorted(self._cached_ids, key=lambda item_id: self.ingredient_usage_cache[item_id], reverse=True)
+        for item_id in self.admission.load(ranked):
+            self._evict(item_id)
+
+    def _cache_full(self) -> bool:
+        """True once the index holds ``capacity`` items, i.e. the table has rows only the database fallbacks reach.
+
+        Never true for a full-corpus index, so its searches skip every database fallback.
+        """
+        return self.capacity is not None and len(self._cached_ids) >= self.capacity
+
+    def _snapshot_path(self) -> str | None:
+        if not INDEX_SNAPSHOT_DIR:
+            return None
+        return os.path.join(INDEX_SNAPSHOT_DIR, f"{self.model_cls.__tablename__}.idx")
+
+    def _table_version(self, db: Session) -> dict:
+        """State of the table: last change log seq, and row count, highest id and total usage.
+
+        Edits are logged and usage only grows, so any write to the table changes it.
+        """
+        rows, max_id, usage = db.query(func.count(self.model_cls.id), func.max(self.model_cls.id),
+                                       func.sum(self.model_cls.usage_count)).one()
+        return {"seq": latest_seq(db), "table": (rows, max_id or 0, usage or 0)}
+
+    def save_snapshot(self, version: dict | None = None) -> int | None:
+        """Writes the search index to ``INDEX_SNAPSHOT_DIR``; returns the file size, or None when disabled.
+
+        ``version`` is the :meth:`_table_version` the index was loaded from, read before its
+        rows: a restore that finds the table at the same version skips replaying. By default
+        the snapshot is stamped with the last change log row applied to the index and no table
+        state, as an index that has taken writes since its load no longer matches one; a
+        restore replays the log from that row. Called after a build from the table, after a
+        rebuild and at shutdown only, as encoding walks the whole index.
+        """
+        path = self._snapshot_path()
+        if path is None:
+            return None
+        if version is None:
+            version = {"seq": self.change_seq, "table": None}
+        try:
+            os.makedirs(INDEX_SNAPSHOT_DIR, exist_ok=True)
+            start = time.perf_counter()
+            size = self.search_index.save_snapshot(path, version, writers=self._write_lock)
+            self.logger.info(f"Index snapshot {path} written ({size / 2**20:.1f} MiB, version {version}) "
+                             f"in {time.perf_counter() - start:.2f} s")
+            return size
+        except Exception as e:
+            self.logger.error(f"Failed to write index snapshot {path}: {e}")
+            return None
+
+    def _restore_snapshot(self, db: Session, current: dict) -> bool:
+        """Loads the index from its snapshot and brings it up to the table; False if there is none.
+
+        ``current`` is the table's :meth:`_table_version`. A snapshot stamped with the same one
+        is used as is. Otherwise the change log rows written after the snapshot's seq are
+        applied, and the usage counts re-read if the table's total moved (usage flushes are
+        not logged). Only a snapshot without a seq, or one older than the oldest row left in
+        the pruned log, falls back to diffing every row (see :meth:`_replay_changes`).
+        """
+        path = self._snapshot_path()
+        if path is None or not os.path.exists(path):
+            return False
+        with gc_paused():
+            try:
+                version = self.search_index.load_snapshot(path, self.item_cls.model_construct)
+            except Exception as e:
+                self.logger.error(f"Ignoring index snapshot {path}: {e}")
+                return False
+            self._fit_budget()
+            seq = version.get("seq") if isinstance(version, dict) else None
+            oldest = oldest_seq(db)
+            if seq is None or (seq < current["seq"] and (oldest is None or oldest > seq + 1)):
+                outcome = f"{self._replay_changes(db)} changed rows replayed"
+            else:
+                weights = self.search_index.weights()
+                for item_id in self.search_index.item_ids():
+                    self._cached_ids.add(item_id)
+                    self.ingredient_usage_cache[item_id] = weights.get(item_id, 0)
+                if seq == current["seq"] and version["table"] is not None and tuple(version["table"]) == current["table"]:
+                    outcome = "table unchanged"
+                else:
+                    self.change_seq = seq
+                    logged = self._apply_log(db)
+                    table = version["table"]
+                    usage = (self._refresh_usage(db) if table is None or table[2] != current["table"][2] else 0)
+                    outcome = f"{logged} logged changes and {usage} usage counts replayed"
+        self.logger.info(f"Index snapshot {path} loaded (version {version}, table at {current}), {outcome}")
+        return True
+
+    def _refresh_usage(self, db: Session) -> int:
+        """Sets the usage of every restored item to its table count; returns the items changed.
+
+        Only ids and counts are read. A count that grew is replayed as an increment, one that
+        shrank (usage the index counted but never flushed) re-inserts the item at the table's.
+        """
+        rows = (db.query(self.model_cls.id, self.model_cls.usage_count)
+                .order_by(self.model_cls.usage_count.desc()).limit(self.capacity).all())
+        index = self.search_index
+        weights = index.weights()
+        changed = 0
+        for item_id, usage in rows:
+            item = index.get(item_id)
+            if item is None:
+                continue
+            growth = usage - weights.get(item_id, 0)
+            if growth > 0:
+                index.increment_usage(item, growth)
+            elif growth < 0:
+                index.delete(item)
+                index.insert(item, usage)
+            else:
+                continue
+            self.ingredient_usage_cache[item_id] = usage
+            changed += 1
+        return changed
+
+    def _replay_changes(self, db: Session) -> int:
+        """Re-indexes the rows that differ between a restored index and the table; returns their number.
+
+        The fallback of :meth:`_restore_snapshot` when the change log cannot tell what changed
+        since the snapshot: the rows build_cache would select are read as bare column tuples and compared field by field with the restored items (usage against the
+        item's prefix weight). Only new, edited and dropped rows touch the tries, and a row
+        whose usage alone grew is replayed as an increment, which keeps a stale snapshot far
+        cheaper to bring current than a rebuild. Cached ids and usage counts are filled from
+        the rows, as build_cache does.
+        """
+        fields = [name for name in self.summary_cls.model_fields if name != "usage_count"]
+        columns = [getattr(self.model_cls, name) for name in fields]
+        rows = (db.query(self.model_cls.usage_count, *columns)
+                .order_by(self.model_cls.usage_count.desc()).limit(self.capacity).all())
+        index = self.search_index
+        weights = index.weights()
+        current = {row.id for row in rows}
+        replayed = 0
+        for item_id in index.item_ids():
+            if item_id not in current:
+                index.delete(index.get(item_id))
+                replayed += 1
+        for row in rows:
+            usage, values = row[0], row[1:]
+            self._cached_ids.add(row.id)
+            self.ingredient_usage_cache[row.id] = usage
+            item = index.get(row.id)
+            if item is not None and all(getattr(item, name) == value for name, value in zip(fields, values)):
+                growth = usage - weights.get(row.id, 0)
+                if growth == 0:
+                    continue
+                if growth > 0:
+                    index.increment_usage(item, growth)
+                    replayed += 1
+                    continue
+            summary = self.item_cls.model_validate({**dict(zip(fields, values)), "usage_count": usage})
+            if item is not None:
+                index.delete(item)
+            index.insert(summary, usage)
+            replayed += 1
+        return replayed
+
     def add_ingredient(self, ingredient):
         try:
-            self.search_index.insert(ingredient)
-            self.logger.info(f"element added to cache: {ingredient.name}")
-            self._cached_ids.add(ingredient.id)
-            self.ingredient_usage_cache[ingredient.id] = 0
+            ingredient = self.item_cls.model_validate(ingredient)
+            with self._write_lock:
+                self._journal_write(ingredient.id, "insert")
+                self.search_index.insert(ingredient)
+                self.infix_index.add(ingredient.id, ingredient.name)
+                self._bump_generation()
+                self.logger.info(f"element added to cache: {ingredient.name}")
+                self._cached_ids.add(ingredient.id)
+                self.ingredient_usage_cache[ingredient.id] = 0
+                if self.admission is not None:
+                    for item_id in self.admission.admit(ingredient.id):
+                        self._evict(item_id)
         except Exception as e:
             self.logger.error(f"Failed to add element to cache: {e}")
 
     def remove_ingredient(self, ingredient: object):
         try:
-            self.search_index.delete(ingredient)
-            self.ingredient_usage_cache.pop(ingredient.id, None)
-            self._cached_ids.discard(ingredient.id)
+            with self._write_lock:
+                self._journal_write(ingredient.id)
+                self.search_index.delete(ingredient)
+                self.infix_index.remove(ingredient.id)
+                self._bump_generation()
+                with self._usage_lock:
+                    self.ingredient_usage_cache.pop(ingredient.id, None)
+                    self._usage_deltas.pop(ingredient.id, None)
+                self._cached_ids.discard(ingredient.id)
+                if self.admission is not None:
+                    self.admission.remove(ingredient.id)
             self.logger.info(f"Element removed from cache: {ingredient.name}")
             # Lazy cleanup of id set (full scan by name resolution skipped for simplicity)
         except Exception as e:
@@ -70,16 +400,106 @@ class EntityCache:
 
     def rename_ingredient(self, old_name: object, new_name:object):
         try:
-            self.search_index.rename(old_name, new_name)
+            new_name = self.item_cls.model_validate(new_name)
+            with self._write_lock:
+                self._journal_write(new_name.id)
+                self.search_index.rename(old_name, new_name)
+                self.infix_index.add(new_name.id, new_name.name)
+                self._bump_generation()
             self.logger.info(f"Element renamed in cache: {old_name.name} to {new_name.name}")
         except Exception as e:
             self.logger.error(f"Failed to rename element in cache: {e}")
 
-    def _db_prefix_fallback(self, prefix: str, limit: int):
+    def poll_changes(self) -> int:
+        """Applies the change log rows written since the last poll to the index; returns the rows read.
+
+        Every mutation in db_ingredients/db_recipes logs the id it touched in its own transaction,
+        so a worker sees the creates, edits and deletes of the other workers within one poll
+        interval. Rows are read in sequence order and several changes of one id collapse into
+        re-reading its current row. Applying is idempotent: the worker that made a change finds
+        its index already matching the row and leaves it alone.
+        """
+        if not self.built:
+            return 0
+        with self._change_lock:
+            db = SessionLocal()
+            try:
+                read = self._apply_log(db)
+            except Exception as e:
+                self.logger.error(f"Failed to apply {self.model_cls.__name__} change log: {e}")
+                return 0
+            finally:
+                db.close()
+        if read:
+            self.logger.info(f"{self.model_cls.__name__} change log: {read} changes applied up to seq {self.change_seq}")
+        return read
+
+    def _apply_log(self, db: Session) -> int:
+        """Applies the change log rows after ``change_seq``, in batches, advancing it; returns the rows read."""
+        read = 0
+        while True:
+            changes = changes_since(db, self.model_cls.__tablename__, self.change_seq, CHANGE_LOG_BATCH)
+            if not changes:
+                break
+            self._apply_changes(db, changes)
+            self.change_seq = changes[-1].seq
+            read += len(changes)
+            if len(changes) < CHANGE_LOG_BATCH:
+                break
+        return read
+
+    def _apply_changes(self, db: Session, changes: list):
+        """Brings the index and infix index in line with the current rows of the changed ids."""
+        inserted = {change.item_id for change in changes if change.operation == "insert"}
+        ids = {change.item_id for change in changes}
+        fields = list(self.summary_cls.model_fields)
+        columns = [getattr(self.model_cls, name) for name in fields]
+        rows = {row.id: row for row in db.query(*columns).filter(self.model_cls.id.in_(ids)).all()}
+        with self._write_lock:
+            for item_id in ids:
+                self._journal_write(item_id, "insert" if item_id in inserted else "update")
+            index = self.search_index
+            changed = False
+            for item_id in ids:
+                item = index.get(item_id)
+                row = rows.get(item_id)
+                if row is None:
+                    if item is not None:
+                        self.remove_ingredient(item)
+                    else:
+                        self.infix_index.remove(item_id)
+                    continue
+                summary = self.item_cls.model_validate(row)
+                if item is not None:
+                    if all(getattr(item, name) == getattr(summary, name) for name in fields if name != "usage_count"):
+                        continue
+                    index.delete(item)
+                    index.insert(summary, self.ingredient_usage_cache.get(item_id, row.usage_count))
+                    self.infix_index.add(item_id, summary.name)
+                    changed = True
+                elif item_id in inserted:
+                    self.add_ingredient(summary)
+                else:
+                    self.infix_index.add(item_id, summary.name)  # Not cached: only the database fallbacks reach it
+                    changed = True
+            if changed:
+                self._bump_generation()
+
+    def _apply_filter(self, query, search_filter: SearchFilter | None):
+        """Adds the conditions of ``search_filter`` to a SQLAlchemy query over ``model_cls``."""
+        if search_filter is None:
+            return query
+        if search_filter.category is not None:
+            query = query.filter(func.lower(func.trim(self.model_cls.category)) == search_filter.category)
+        if search_filter.max_calories is not None:
+            query = query.filter(self.model_cls.calories <= search_filter.max_calories)
+        return query
+
+    def _db_prefix_fallback(self, prefix: str, limit: int, search_filter: SearchFilter | None = None):
         db = SessionLocal()
         try:
-            items = (db.query(self.model_cls)
-                        .filter(self.model_cls.name.ilike(f"{prefix}%"))
+            query = db.query(self.model_cls).filter(self.model_cls.name.ilike(f"{prefix}%"))
+            items = (self._apply_filter(query, search_filter)
                         .order_by(self.model_cls.usage_count.desc())
                         .limit(limit)
                         .all())
@@ -88,28 +508,77 @@ class EntityCache:
         finally:
             db.close()
 
-    def _maybe_promote(self, ing):
-        if len(self._cached_ids) < TRIE_CACHE_LIMIT:
+    def _summaries_by_ids(self, ids: list, search_filter: SearchFilter | None = None):
+        """Resolves ids to summaries in the given order: cached objects first, the rest by primary key.
+
+        With a ``search_filter`` ids whose item does not match are dropped.
+        """
+        found = {}
+        missing = []
+        for item_id in ids:
+            cached = self.search_index.get(item_id)
+            if cached is not None:
+                if search_filter is None or search_filter.matches(cached):
+                    found[item_id] = cached
+            else:
+                missing.append(item_id)
+        if missing:
+            db = SessionLocal()
             try:
-                self.search_index.insert(ing)
+                query = db.query(self.model_cls).filter(self.model_cls.id.in_(missing))
+                rows = self._apply_filter(query, search_filter).all()
+            finally:
+                db.close()
+            for row in rows:
+                found[row.id] = self.summary_cls.model_validate(row)
+        return [found[i] for i in ids if i in found]
+
+    def _maybe_promote(self, ing):
+        """Indexes a database fallback hit; the admission policy picks the items it displaces.
+
+        The hit takes a window slot, and an item pushed out of the window only stays if it
+        has been used more often lately than the coldest item of the main space.
+        """
+        if ing.id in self._cached_ids:
+            return
+        try:
+            with self._write_lock:
+                evicted = self.admission.admit(ing.id)
+                self.ingredient_usage_cache.setdefault(ing.id, ing.usage_count)
+                self.search_index.insert(ing, self.ingredient_usage_cache[ing.id])
                 self._cached_ids.add(ing.id)
-            except Exception as e:
-                self.logger.debug(f"Promotion failed for {ing.id}: {e}")
+                for item_id in evicted:
+                    self._evict(item_id)
+                self._bump_generation()
+        except Exception as e:
+            self.logger.debug(f"Promotion failed for {ing.id}: {e}")
+
+    def _evict(self, item_id: int):
+        """Drops an item from the search index; its usage count stays pending for sync_usage_to_db."""
+        item = self.search_index.get(item_id)
+        if item is not None:
+            self.search_index.delete(item)
+        self._cached_ids.discard(item_id)
+
+    def _session(self, session_id: str | None):
+        return self.sessions.get(session_id) if session_id else None
 
-    def prefix_search(self, prefix: str, limit = 50):
+    @_result_cached("prefix")
+    def prefix_search(self, prefix: str, limit = 50, session_id: str | None = None,
+                      search_filter: SearchFilter | None = None):
         try:
-            results = self.search_index.prefix_search(prefix, limit)
-            if len(results) > 5 or len(self._cached_ids) != TRIE_CACHE_LIMIT:
+            results = self.search_index.prefix_search(prefix, limit, self._session(session_id), search_filter)
+            if len(results) > 5 or not self._cache_full():
                 return [r.model_dump() for r in results[:limit]]
             # Fallback to DB for more matches
-            return self._fallback_prefix_search(prefix, results, limit)
+            return self._fallback_prefix_search(prefix, results, limit, search_filter)
         except Exception as e:
             self.logger.error(f"Error during prefix search: {e}")
             return []
 
-    def _fallback_prefix_search(self, prefix: str, results: list, limit: int):
+    def _fallback_prefix_search(self, prefix: str, results: list, limit: int, search_filter: SearchFilter | None = None):
         needed = limit - len(results)
-        db_extras = self._db_prefix_fallback(prefix, needed * 2)  # overfetch for ranking
+        db_extras = self._db_prefix_fallback(prefix, needed * 2, search_filter)  # overfetch for ranking
         # Deduplicate
         existing_ids = {r.id for r in results}
         merged: List[IngredientsSummary] = results[:]
@@ -122,97 +591,111 @@ class EntityCache:
                 break
         return [m.model_dump() for m in merged[:limit]]
     
-    def multi_token_prefix_search(self, query: str, limit: int = 50):
+    @_result_cached("multi_token_prefix")
+    def multi_token_prefix_search(self, query: str, limit: int = 50, session_id: str | None = None,
+                                  search_filter: SearchFilter | None = None):
         try:
             # token distance 0 for prefix-like behavior
-            results = self.search_index.multi_token_prefix_search(query, limit=limit)
-            if len(results) >= limit or len(self._cached_ids) != TRIE_CACHE_LIMIT:
+            results = self.search_index.multi_token_prefix_search(query, limit=limit, session=self._session(session_id),
+                                                                  search_filter=search_filter)
+            if len(results) >= limit or not self._cache_full():
                 return [r.model_dump() for r in results[:limit]]
             # DB fallback: fetch names starting with first token
-            return self._fallback_multi_token_prefix_search(query, results, limit)
+            return self._fallback_multi_token_prefix_search(query, results, limit, search_filter)
         except Exception as e:
             self.logger.error(f"Error during multi-token prefix search: {e}")
             return []
 
-    def _fallback_multi_token_prefix_search(self, query: str, results: list, limit: int):
+    def _fallback_multi_token_prefix_search(self, query: str, results: list, limit: int,
+                                            search_filter: SearchFilter | None = None):
         first_tok = query.split()[0]
-        db = SessionLocal()
-        try:
-            rows = (db.query(self.model_cls)
-                        .filter(self.model_cls.name.ilike(f"%{first_tok}%"))
-                        .order_by(self.model_cls.usage_count.desc())
-                        .limit(limit)
-                        .all())
-        finally:
-            db.close()
         existing_ids = {r.id for r in results}
-        for row in rows:
-            if row.id not in existing_ids:
-                ing_sum = self.summary_cls.model_validate(row)
-                results.append(ing_sum)
-                existing_ids.add(row.id)
+        needed = max(limit - len(results), 0)
+        fetch = needed * FILTER_OVERFETCH if search_filter is not None else needed
+        candidate_ids = [i for i in self.infix_index.search(first_tok, fetch + len(existing_ids))
+                         if i not in existing_ids]
+        for ing_sum in self._summaries_by_ids(candidate_ids[:fetch], search_filter)[:needed]:
+            results.append(ing_sum)
+            if ing_sum.id not in self._cached_ids:
                 self._maybe_promote(ing_sum)
-            if len(results) >= limit:
-                break
         return [r.model_dump() for r in results[:limit]]
 
-    def fuzzy_search(self, query: str, max_distance: int = 2, limit: int = 50):
+    @_result_cached("infix")
+    def infix_search(self, query: str, limit: int = 50, search_filter: SearchFilter | None = None):
+        """Names containing every query token anywhere (e.g. "rtof" -> "Cartofi"), shortest names first."""
+        try:
+            tokens = [t for t in query.split() if t]
+            ids = self.infix_index.contains_all(tokens, limit * FILTER_OVERFETCH if search_filter is not None else limit)
+            return [r.model_dump() for r in self._summaries_by_ids(ids, search_filter)[:limit]]
+        except Exception as e:
+            self.logger.error(f"Error during infix search: {e}")
+            return []
+
+    @_result_cached("fuzzy")
+    def fuzzy_search(self, query: str, max_distance: int = 2, limit: int = 50, session_id: str | None = None,
+                     deadline: Deadline | None = None, search_filter: SearchFilter | None = None):
         try:
             if len(query) > 6:
                 max_distance += 1
             if len(query) > 10:
                 max_distance += 1
-            results = self.search_index.fuzzy_search(query, max_distance, limit)
+            results = self.search_index.fuzzy_search(query, max_distance, limit, self._session(session_id), deadline,
+                                                     search_filter)
             return [r.model_dump() for r in results[:limit]]
         except Exception as e:
             self.logger.error(f"Error during fuzzy search: {e}")
             return []
 
-    def multi_token_fuzzy_search(self, query: str, limit: int = 50, token_max_distance: int = 1):
+    @_result_cached("multi_token_fuzzy")
+    def multi_token_fuzzy_search(self, query: str, limit: int = 50, token_max_distance: int = 1, session_id: str | None = None,
+                                 deadline: Deadline | None = None, search_filter: SearchFilter | None = None):
         try:
-            results = self.search_index.multi_token_fuzzy_search(query, limit=limit, token_max_distance=token_max_distance)
-            if len(results) > 5 or len(self._cached_ids) != TRIE_CACHE_LIMIT:
+            results = self.search_index.multi_token_fuzzy_search(query, limit=limit, token_max_distance=token_max_distance,
+                                                                 session=self._session(session_id), deadline=deadline,
+                                                                 search_filter=search_filter)
+            if len(results) > 5 or not self._cache_full() or (deadline is not None and deadline.check()):
                 return [r.model_dump() for r in results[:limit]]
             # If under limit, fallback: fetch candidates containing any query token
-            return self.fallback_multi_token_fuzzy_search(query, results, limit)
+            return self._fallback_multi_token_fuzzy_search(query, results, limit, search_filter)
         except Exception as e:
             self.logger.error(f"Error during multi-token fuzzy search: {e}")
             return []
 
-    def _fallback_multi_token_fuzzy_search(self, query: str, results: list, limit: int):
+    def _fallback_multi_token_fuzzy_search(self, query: str, results: list, limit: int,
+                                           search_filter: SearchFilter | None = None):
         tokens = [t for t in query.split() if t]
         if not tokens:
             return []
-        pattern = "%" + "%".join(tokens) + "%"  # coarse pattern
-        db = SessionLocal()
-        try:
-            rows = (db.query(Ingredients)
-                        .filter(Ingredients.name.ilike(pattern))
-                        .order_by(Ingredients.usage_count.desc())
-                        .limit(200)
-                        .all())
-        finally:
-            db.close()
         existing_ids = {r.id for r in results}
-        for row in rows:
-            if row.id in existing_ids:
-                continue
-            ing_sum = IngredientsSummary.model_validate(row)
+        needed = max(limit - len(results), 0)
+        fetch = needed * FILTER_OVERFETCH if search_filter is not None else needed
+        candidate_ids = [i for i in self.infix_index.contains_all(tokens, fetch + len(existing_ids))
+                         if i not in existing_ids]
+        for ing_sum in self._summaries_by_ids(candidate_ids[:fetch], search_filter)[:needed]:
             results.append(ing_sum)
-            existing_ids.add(row.id)
-            self._maybe_promote(ing_sum)
-            if len(results) >= limit:
-                break
+            if ing_sum.id not in self._cached_ids:
+                self._maybe_promote(ing_sum)
         return [r.model_dump() for r in results[:limit]]
     
-    def smart_search(self, query: str, max_distance: int = 2, limit: int = 50):
+    @_result_cached("smart")
+    def smart_search(self, query: str, max_distance: int = 2, limit: int = 50, session_id: str | None = None,
+                     stages: list | None = None, deadline: Deadline | None = None,
+                     search_filter: SearchFilter | None = None):
+        """Prefix, then fuzzy, then the infix fallback, each only while the page is not full.
+
+        Stages that ran are appended to ``stages`` ("prefix", "fuzzy", "fallback", or "cache").
+        Once ``deadline`` runs out no further stage starts and ``deadline.expired`` is set.
+        Every stage keeps only items matching ``search_filter``.
+        """
         try:
-            results = self.search_index.smart_search(query, max_distance, limit)
-            if len(results) >= limit or len(self._cached_ids) != TRIE_CACHE_LIMIT:
+            results = self.search_index.smart_search(query, max_distance, limit, self._session(session_id), stages, deadline,
+                                                     search_filter)
+            if len(results) >= limit or not self._cache_full() or (deadline is not None and deadline.check()):
                 return [r.model_dump() for r in results[:limit]]
+            if stages is not None:
+                stages.append("fallback")
             # Compose remaining using fuzzy + multi-token fallbacks
-            prefix_needed = limit - len(results)
-            fuzzy_more = self._fallback_multi_token_fuzzy_search(query, results, prefix_needed)
+            fuzzy_more = self._fallback_multi_token_fuzzy_search(query, list(results), limit, search_filter)
             # fuzzy_more already returns dict dumps; need to parse back to model for merging
             fuzzy_models = []
             for item in fuzzy_more:
@@ -232,9 +715,12 @@ class EntityCache:
     
     def increment_usage(self, ingredient):
         try:
-            with self._usage_lock:
+            with self._write_lock, self._usage_lock:
                 self.search_index.increment_usage(ingredient)
                 self.ingredient_usage_cache[ingredient.id] += 1
+                self._usage_deltas[ingredient.id] += 1
+                if self._journal_usage is not None:
+                    self._journal_usage[ingredient.id] += 1
         except Exception as e:
             self.logger.error(f"Error incrementing usage for {ingredient.name}: {e}")
 
@@ -253,27 +739,188 @@ class EntityCache:
             self.logger.error(f"Error getting trie depth: {e}")
             return -1
 
-    def sync_usage_to_db(self):
-        # 10 minutes
-        with self._usage_lock:
-            updates = dict(self.ingredient_usage_cache)
+    def stats(self) -> dict:
+        """Index sizes, estimated memory and cache counters, all read from counters (no traversal)."""
+        index = self.search_index.stats()
+        result_cache = self.result_cache.stats()
+        sessions = self.sessions.stats()
+        return {
+            "index": index,
+            "cached_ids": len(self._cached_ids),
+            "cache_limit": self.capacity,
+            "admission": self.admission.stats() if self.admission is not None else None,
+            "usage_entries": len(self.ingredient_usage_cache),
+            "pending_usage": len(self._usage_deltas),
+            "last_usage_flush": dict(self.last_usage_flush),
+            "infix_index": {"names": len(self.infix_index), "trigrams": self.infix_index.trigram_count},
+            "result_cache": result_cache,
+            "sessions": sessions,
+            "generation": self.generation,
+            "change_seq": self.change_seq,
+            "last_rebuild": dict(self.last_rebuild) if self.last_rebuild else None,
+            "bytes": index["bytes"]["total"] + result_cache["bytes"] + sessions["bytes"],
+        }
+
+    def sync_usage_to_db(self) -> dict:
+        """Adds the usage counted since the last flush to the table, in one batched UPDATE.
 
-        db: Session = SessionLocal()
+        Counts are written as ``usage_count = usage_count + delta``, so the increments of
+        every worker add up instead of the last writer's absolute count winning. Ids whose
+        count did not change are not touched. If the transaction fails, the deltas are put
+        back and retried on the next flush. Returns the rows updated and the flush time.
+        """
+        with self._rebuild_lock:  # A rebuild reads the table's counts once, at its start
+            return self._flush_usage()
+
+    def _flush_usage(self, deltas: dict | None = None) -> dict:
+        """Writes ``deltas`` (by default the pending ones, taken here) to the table."""
+        if deltas is None:
+            with self._usage_lock:
+                deltas, self._usage_deltas = self._usage_deltas, defaultdict(int)
+        start = time.perf_counter()
+        rows = 0
+        if deltas:
+            table = self.model_cls.__table__
+            statement = (update(table).where(table.c.id == bindparam("item_id"))
+                         .values(usage_count=table.c.usage_count + bindparam("delta")))
+            db: Session = SessionLocal()
+            try:
+                result = db.execute(statement, [{"item_id": item_id, "delta": delta} for item_id, delta in deltas.items()])
+                db.commit()
+                rows = result.rowcount if result.rowcount >= 0 else len(deltas)
+            except Exception as e:
+                db.rollback()
+                with self._usage_lock:
+                    for item_id, delta in deltas.items():
+                        self._usage_deltas[item_id] += delta
+                self.logger.error(f"{self.model_cls.__name__} usage flush failed, {len(deltas)} counts kept: {e}")
+                raise
+            finally:
+                db.close()
+        self.last_usage_flush = {"rows": rows, "seconds": time.perf_counter() - start}
+        self.logger.info(f"{self.model_cls.__name__} usage flush: {rows} rows updated "
+                         f"in {self.last_usage_flush['seconds'] * 1000:.1f} ms")
+        self.log_result_cache_stats()
+        return dict(self.last_usage_flush)
+
+    def rebuild_index(self) -> dict | None:
+        """Builds a fresh index from the table while the current one keeps serving, then swaps it in.
+
+        Pending usage is taken and flushed first, so the new index is weighted by the same
+        counts; the journal starts in the same write-lock section, so every increment lands in
+        exactly one of the two. Writes made during the build (adds, edits, deletes, change log rows, usage increments) are
+        journaled and replayed into the new index under the write lock, which the swap also
+        holds: no write lands between replay and swap. The new tries take the current module
+        settings (weights, layout, fuzzy engine). Both indexes are in memory until the swap.
+        Returns the build report, or None when a rebuild is already running.
+        """
+        if not self.built or not self._rebuild_lock.acquire(blocking=False):
+            return None
         try:
-            for ing_id, count in updates.items():
-                db.query(self.model_cls).filter(self.model_cls.id == ing_id).update(
-                    {"usage_count": count}
-                )
-            db.commit()
+            # One critical section: an increment is either in the flushed deltas, hence in the
+            # table the build reads, or in the journal replayed into the new index
+            with self._write_lock:
+                with self._usage_lock:
+                    deltas, self._usage_deltas = self._usage_deltas, defaultdict(int)
+                self._journal, self._journal_usage = {}, defaultdict(int)
+            self._flush_usage(deltas)
+            start = time.perf_counter()
+            db = SessionLocal()
+            try:
+                version = self._table_version(db)
+            finally:
+                db.close()
+            fresh = EntityCache(build_search_trie(self.search_index.prefix_trie.max_trie_depth),
+                                self.model_cls, self.summary_cls)
+            fresh.item_cls = self.item_cls
+            db = SessionLocal()
+            try:
+                with gc_paused():
+                    fresh._load_rows(db)
+                fresh._load_admission()
+                fresh.infix_index.rebuild(db.query(self.model_cls.id, self.model_cls.name).all())
+                built = time.perf_counter() - start
+                with self._write_lock:
+                    journal, usage = self._journal, self._journal_usage
+                    if journal:
+                        fresh._apply_changes(db, [SimpleNamespace(item_id=item_id, operation=operation)
+                                                  for item_id, operation in journal.items()])
+                    for item_id, count in usage.items():
+                        item = fresh.search_index.get(item_id)
+                        if item is not None:
+                            fresh.search_index.increment_usage(item, count)
+                            fresh.ingredient_usage_cache[item_id] += count
+                    self.search_index = fresh.search_index
+                    self.infix_index = fresh.infix_index
+                    self._cached_ids = fresh._cached_ids
+                    self.ingredient_usage_cache = fresh.ingredient_usage_cache
+                    self.admission = fresh.admission
+                    self.capacity = fresh.capacity
+                    self.sessions = SessionStore(SESSION_TTL, SESSION_LIMIT)  # Frontiers point into the old tries
+                    self._bump_generation()
+            finally:
+                db.close()
+            self.last_rebuild = {"seconds": time.perf_counter() - start, "build_seconds": built,
+                                 "items": len(self._cached_ids), "infix_names": len(self.infix_index),
+                                 "replayed": len(journal) + len(usage), "finished_at": time.time()}
+            self.logger.info(f"{self.model_cls.__name__} index rebuilt with {self.last_rebuild['items']} items "
+                             f"({self.last_rebuild['infix_names']} infix names) in {self.last_rebuild['seconds']:.2f} s, "
+                             f"{self.last_rebuild['replayed']} writes replayed")
+            # Replayed writes may be ahead of the table version, but the log replays them idempotently
+            self.save_snapshot(version if not (journal or usage) else {"seq": version["seq"], "table": None})
+            return dict(self.last_rebuild)
+        except Exception as e:
+            self.logger.error(f"Failed to rebuild {self.model_cls.__name__} index: {e}")
+            return None
         finally:
-            db.close()
-            
+            with self._write_lock:
+                self._journal = self._journal_usage = None
+            self._rebuild_lock.release()
+
+    def start_rebuild_thread(self) -> bool:
+        """Starts rebuild_index in the background; False if a rebuild is already running."""
+        if self._rebuild_lock.locked():
+            return False
+        threading.Thread(target=self.rebuild_index, daemon=True).start()
+        return True
+
+    def log_result_cache_stats(self):
+        stats = self.result_cache.stats()
+        self.logger.info(f"{self.model_cls.__name__} result cache: {stats['entries']} entries, "
+                         f"hit ratio {stats['hit_ratio']:.1%} ({stats['hits']}/{stats['hits'] + stats['misses']}), "
+                         f"~{stats['bytes'] / 1024:.0f} KiB")
 
     def start_sync_thread(self):
         thread = threading.Thread(target=self.sync_usage_to_db, daemon=True)
         thread.start()
 
-ingredient_trie = ObjectSearchTrie(ING_MAX_TRIE_DEPTH, USAGE_WEIGHT, PREFIX_BOOST_WEIGHT, DISTANCE_WEIGHT)
-recipe_trie = ObjectSearchTrie(REC_MAX_TRIE_DEPTH, USAGE_WEIGHT, PREFIX_BOOST_WEIGHT, DISTANCE_WEIGHT)
-ingredient_cache = EntityCache(ingredient_trie, Ingredients, IngredientsSummary)
-recipe_cache = EntityCache(recipe_trie, Recipes, RecipeSummary)
\ No newline at end of file
+def tail_change_log(caches: list, interval: float, stop: threading.Event):
+    """Polls the change log of every cache each ``interval`` seconds until ``stop`` is set."""
+    while not stop.wait(interval):
+        for cache in caches:
+            cache.poll_changes()
+
+def build_search_trie(max_trie_depth: int) -> ObjectSearchTrie:
+    """Creates an ObjectSearchTrie configured from the module-level search settings."""
+    layout = {}
+    if TRIE_LAYOUT == "radix":
+        layout = {"prefix_trie": RadixSearchTrie(max_trie_depth, DISTANCE_WEIGHT, usage_weight=USAGE_WEIGHT),
+                  "token_trie": RadixTokenSearchTrie(max_trie_depth, USAGE_WEIGHT, DISTANCE_WEIGHT)}
+    if TRIE_SHARDS > 1:
+        prefix_cls, token_cls = (RadixSearchTrie, RadixTokenSearchTrie) if TRIE_LAYOUT == "radix" else (SearchTrie, TokenSearchTrie)
+        layout = {"prefix_trie": ShardedSearchTrie.create(TRIE_SHARDS, lambda: prefix_cls(max_trie_depth, DISTANCE_WEIGHT, usage_weight=USAGE_WEIGHT)),
+                  "token_trie": ShardedTokenSearchTrie.create(
+                      TRIE_SHARDS, lambda: token_cls(max_trie_depth, USAGE_WEIGHT, DISTANCE_WEIGHT))}
+    return ObjectSearchTrie(max_trie_depth, USAGE_WEIGHT, PREFIX_BOOST_WEIGHT, DISTANCE_WEIGHT,
+                            fuzzy_engine=FUZZY_ENGINE, snapshot_reads=SNAPSHOT_READS,
+                            deletion_index=DELETION_INDEX, **layout)
+
+if INDEX_SERVER_SOCKET:
+    # Every worker queries the caches of one index server process (resources.core.index_server)
+    ingredient_cache = RemoteEntityCache(INDEX_SERVER_SOCKET, "ingredients")
+    recipe_cache = RemoteEntityCache(INDEX_SERVER_SOCKET, "recipes")
+else:
+    ingredient_trie = build_search_trie(ING_MAX_TRIE_DEPTH)
+    recipe_trie = build_search_trie(REC_MAX_TRIE_DEPTH)
+    ingredient_cache = EntityCache(ingredient_trie, Ingredients, IngredientsSummary)
+    recipe_cache = EntityCache(recipe_trie, Recipes, RecipeSummary)
\ No newline at end of file
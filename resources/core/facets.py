@@ -0,0 +1,137 @@
+from __future__ import annotations
+import threading
+from typing import Dict, Iterable, Tuple
+
+# A node's facets summarize every item stored in its subtree: the OR of their category bits and
+# the lowest and highest calorie values. They are immutable tuples, so snapshot writers can share
+# them between a node and its copy, and None stands for a subtree without items.
+Facets = Tuple[int, float, float]
+
+INF = float("inf")
+
+def normalize_category(category: str | None) -> str | None:
+    """Case- and whitespace-insensitive form of a category name; None for a missing one."""
+    if category is None:
+        return None
+    category = category.strip().lower()
+    return category or None
+
+class CategoryBits:
+    """Assigns each category name its own bit, in the order the categories are first indexed.
+
+    Categories are a small closed set (a few dozen per table), so a Python int holds the mask
+    of any subtree regardless of how many there are.
+    """
+    def __init__(self):
+        self._bits: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+    def bit(self, category: str | None) -> int:
+        """Bit of ``category``, registering it on first use; 0 for an item without a category."""
+        category = normalize_category(category)
+        if category is None:
+            return 0
+        bit = self._bits.get(category)
+        if bit is None:
+            with self._lock:
+                bit = self._bits.setdefault(category, 1 << len(self._bits))
+        return bit
+
+    def mask(self, category: str | None) -> int:
+        """Bit of an already indexed ``category`` without registering it; 0 if it is unknown."""
+        return self._bits.get(normalize_category(category), 0)
+
+    def names(self) -> Tuple[str, ...]:
+        """Registered categories in bit order, so saved masks can be mapped onto another registry."""
+        return tuple(self._bits)
+
+CATEGORY_BITS = CategoryBits()
+
+def item_facets(item: object) -> Facets:
+    """Facets of a single item; an item without calories never satisfies a calorie bound."""
+    calories = getattr(item, "calories", None)
+    bit = CATEGORY_BITS.bit(getattr(item, "category", None))
+    if calories is None:
+        return (bit, INF, -INF)
+    return (bit, calories, calories)
+
+def merge_facets(a: Facets | None, b: Facets | None) -> Facets | None:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (a[0] | b[0], min(a[1], b[1]), max(a[2], b[2]))
+
+def widen_facets(current: Facets | None, facets: Facets) -> Facets:
+    """``current`` merged with an item's ``facets``, returned as is when it already covers them.
+
+    Nodes high up the trie already cover most items, so an insert usually only compares.
+    """
+    if current is None:
+        return facets
+    bit, low, high = facets
+    if current[0] & bit == bit and current[1] <= low and high <= current[2]:
+        return current
+    return (current[0] | bit, min(current[1], low), max(current[2], high))
+
+def combine_facets(facets: Iterable[Facets | None]) -> Facets | None:
+    """Facets of a node rebuilt from its own items and its children's facets."""
+    merged = None
+    for entry in facets:
+        merged = merge_facets(merged, entry)
+    return merged
+
+class SearchFilter:
+    """Filter predicate pushed down into trie traversals.
+
+    :meth:`matches` decides for one item; :meth:`admits` decides from a node's facets whether
+    its subtree can hold any match at all, so a traversal skips the whole subtree when it
+    cannot. Filters compare by value so they can be part of a result cache key.
+    """
+    __slots__ = ("category", "max_calories", "_mask")
+
+    def __init__(self, category: str | None = None, max_calories: float | None = None):
+        self.category = normalize_category(category)
+        self.max_calories = max_calories
+        self._mask = 0  # Looked up on first use; stays 0 while the category is not indexed
+
+    def matches(self, item: object) -> bool:
+        if self.category is not None and normalize_category(getattr(item, "category", None)) != self.category:
+            return False
+        if self.max_calories is not None:
+            calories = getattr(item, "calories", None)
+            if calories is None or calories > self.max_calories:
+                return False
+        return True
+
+    def admits(self, facets: Facets | None) -> bool:
+        if facets is None:
+            return False
+        if self.category is not None:
+            if not self._mask:
+                self._mask = CATEGORY_BITS.mask(self.category)
+            if not facets[0] & self._mask:
+                return False
+        return self.max_calories is None or facets[1] <= self.max_calories
+
+    def _key(self):
+        return (self.category, self.max_calories)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SearchFilter) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return f"SearchFilter(category={self.category!r}, max_calories={self.max_calories!r})"
+
+def make_filter(category: str | None = None, max_calories: float | None = None) -> SearchFilter | None:
+    """SearchFilter for the given request parameters, or None when neither is set."""
+    search_filter = SearchFilter(category, max_calories)
+    if search_filter.category is None and max_calories is None:
+        return None
+    return search_filter
@@ -0,0 +1,233 @@
+from __future__ import annotations
+from concurrent.futures import Future
+import itertools
+import os
+import socket
+import threading
+import time
+from typing import Dict
+from resources.logger import Logger
+from resources.core.deadline import Deadline
+from resources.core.facets import SearchFilter
+from resources.core.index_protocol import (CACHES, OPERATIONS, STATUS_OK, encode_search_options, pack_frame,
+                                           read_frame)
+
+CALL_TIMEOUT = float(os.getenv("INDEX_SERVER_TIMEOUT", "5"))  # Seconds a worker waits for one answer
+STARTUP_WAIT = float(os.getenv("INDEX_SERVER_STARTUP_WAIT", "300"))  # Seconds build_cache waits for the server to come up
+
+class IndexServerError(RuntimeError):
+    """The index server ran the request and it failed there."""
+
+class IndexClient:
+    """One connection to the index server, shared by every thread of a worker process.
+
+    Calls are pipelined: a thread writes its request and waits on a future while other
+    threads keep writing theirs; a reader thread resolves the futures by request id as the
+    answers come back. A broken connection fails every pending call and is reopened by the
+    next one.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()  # Guards the connection, the pending map and writes
+        self._sock: socket.socket | None = None
+        self._pending: Dict[int, Future] = {}
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+            threading.Thread(target=self._read_loop, args=(sock,), daemon=True, name="index-client").start()
+        return self._sock
+
+    def _read_loop(self, sock: socket.socket):
+        error: Exception = ConnectionError("index server closed the connection")
+        try:
+            with sock.makefile("rb") as stream:
+                while True:
+                    frame = read_frame(stream)
+                    if frame is None:
+                        break
+                    request_id, status, _, payload = frame
+                    with self._lock:
+                        future = self._pending.pop(request_id, None)
+                    if future is None:
+                        continue  # Caller gave up on it
+                    if status == STATUS_OK:
+                        future.set_result(payload)
+                    else:
+                        future.set_exception(IndexServerError(payload))
+        except Exception as e:
+            error = e
+        self._drop(sock, error)
+
+    def _drop(self, sock: socket.socket, error: Exception):
+        with self._lock:
+            if self._sock is not sock:
+                return
+            self._sock = None
+            pending, self._pending = self._pending, {}
+        sock.close()
+        for future in pending.values():
+            future.set_exception(error)
+
+    def submit(self, cache: str, operation: str, payload: object = None) -> Future:
+        """Sends one request without waiting for its answer."""
+        future: Future = Future()
+        request_id = next(self._ids) & 0xFFFFFFFF
+        frame = pack_frame(request_id, CACHES.index(cache), OPERATIONS.index(operation), payload)
+        with self._lock:
+            sock = self._connect()
+            self._pending[request_id] = future
+            try:
+                sock.sendall(frame)
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                future.set_exception(e)
+        return future
+
+    def call(self, cache: str, operation: str, payload: object = None, timeout: float | None = CALL_TIMEOUT) -> object:
+        future = self.submit(cache, operation, payload)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            with self._lock:
+                for request_id, pending in list(self._pending.items()):
+                    if pending is future:
+                        del self._pending[request_id]
+            raise
+
+    def wait_ready(self, timeout: float = STARTUP_WAIT) -> bool:
+        """Pings the server until it answers or ``timeout`` seconds have passed."""
+        give_up = time.monotonic() + timeout
+        while True:
+            try:
+                return self.call(CACHES[0], "ping")
+            except OSError:
+                if time.monotonic() >= give_up:
+                    return False
+                time.sleep(0.5)
+
+_clients: Dict[str, IndexClient] = {}
+_clients_lock = threading.Lock()
+
+def get_client(path: str) -> IndexClient:
+    """The process-wide client for the server at ``path``."""
+    with _clients_lock:
+        client = _clients.get(path)
+        if client is None:
+            client = _clients[path] = IndexClient(path)
+        return client
+
+class RemoteEntityCache:
+    """EntityCache stand-in whose methods run on the index server.
+
+    The signatures and results match :class:`EntityCache`, so the routers use either one
+    unchanged. As there, a failed search is logged and answers an empty list.
+    """
+    def __init__(self, path: str, cache: str):
+        self.logger = Logger()
+        self.cache = cache
+        self.client = get_client(path)
+
+    def build_cache(self):
+        """Waits for the server, which builds the index itself, to accept requests."""
+        start = time.perf_counter()
+        if self.client.wait_ready():
+            self.logger.info(f"Connected to index server {self.client.path} for {self.cache} "
+                             f"in {time.perf_counter() - start:.2f} s.")
+        else:
+            self.logger.error(f"Index server {self.client.path} did not answer; {self.cache} searches will fail.")
+
+    def _search(self, operation: str, query: str, **kwargs):
+        stages, deadline = kwargs.get("stages"), kwargs.get("deadline")
+        try:
+            results, ran, expired = self.client.call(self.cache, operation, (query, encode_search_options(kwargs)))
+        except Exception as e:
+            self.logger.error(f"Error during remote {operation}: {e}")
+            return []
+        if stages is not None and ran:
+            stages.extend(ran)
+        if deadline is not None and expired:
+            deadline.expired = True
+        return results
+
+    def prefix_search(self, prefix: str, limit = 50, session_id: str | None = None,
+                      search_filter: SearchFilter | None = None):
+        return self._search("prefix_search", prefix, limit=limit, session_id=session_id,
+                            search_filter=search_filter)
+
+    def multi_token_prefix_search(self, query: str, limit: int = 50, session_id: str | None = None,
+                                  search_filter: SearchFilter | None = None):
+        return self._search("multi_token_prefix_search", query, limit=limit, session_id=session_id,
+                            search_filter=search_filter)
+
+    def infix_search(self, query: str, limit: int = 50, search_filter: SearchFilter | None = None):
+        return self._search("infix_search", query, limit=limit, search_filter=search_filter)
+
+    def fuzzy_search(self, query: str, max_distance: int = 2, limit: int = 50, session_id: str | None = None,
+                     deadline: Deadline | None = None, search_filter: SearchFilter | None = None):
+        return self._search("fuzzy_search", query, max_distance=max_distance, limit=limit,
+                            session_id=session_id, deadline=deadline, search_filter=search_filter)
+
+    def multi_token_fuzzy_search(self, query: str, limit: int = 50, token_max_distance: int = 1, session_id: str | None = None,
+                                 deadline: Deadline | None = None, search_filter: SearchFilter | None = None):
+        return self._search("multi_token_fuzzy_search", query, limit=limit, token_max_distance=token_max_distance,
+                            session_id=session_id, deadline=deadline, search_filter=search_filter)
+
+    def smart_search(self, query: str, max_distance: int = 2, limit: int = 50, session_id: str | None = None,
+                     stages: list | None = None, deadline: Deadline | None = None,
+                     search_filter: SearchFilter | None = None):
+        return self._search("smart_search", query, max_distance=max_distance, limit=limit, session_id=session_id,
+                            stages=stages, deadline=deadline, search_filter=search_filter)
+
+    def _write(self, operation: str, payload: object, wait: bool = True, timeout: float | None = CALL_TIMEOUT):
+        try:
+            if wait:
+                self.client.call(self.cache, operation, payload, timeout)
+            else:
+                self.client.submit(self.cache, operation, payload).add_done_callback(self._log_failure)
+        except Exception as e:
+            self.logger.error(f"Remote {operation} failed: {e}")
+
+    def _log_failure(self, future: Future):
+        if future.exception() is not None:
+            self.logger.error(f"Remote {self.cache} update failed: {future.exception()}")
+
+    def add_ingredient(self, ingredient):
+        self._write("add_ingredient", ingredient.model_dump())
+
+    def remove_ingredient(self, ingredient: object):
+        self._write("remove_ingredient", ingredient.model_dump())
+
+    def rename_ingredient(self, old_name: object, new_name: object):
+        self._write("rename_ingredient", (old_name.model_dump(), new_name.model_dump()))
+
+    def increment_usage(self, ingredient):
+        # Counted on the server for all workers; the request does not wait for the answer
+        self._write("increment_usage", ingredient.model_dump(), wait=False)
+
+    def stats(self) -> dict:
+        return self.client.call(self.cache, "stats")
+
+    def sync_usage_to_db(self) -> dict:
+        return self.client.call(self.cache, "sync_usage_to_db", timeout=None)
+
+    def save_snapshot(self):
+        return self.client.call(self.cache, "save_snapshot", timeout=None)
+
+    def start_rebuild_thread(self) -> bool:
+        # Rebuilt on the server, in the background there as well
+        return self.client.call(self.cache, "start_rebuild_thread")
+
+    def poll_changes(self) -> int:
+        # The index server tails the change log for every worker
+        return 0
+
+    def start_sync_thread(self):
+        self._write("sync_usage_to_db", None, wait=False)
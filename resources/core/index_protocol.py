@@ -0,0 +1,82 @@
+from __future__ import annotations
+import marshal
+import struct
+from typing import BinaryIO, Dict, List, Tuple
+from resources.core.deadline import Deadline
+from resources.core.facets import make_filter
+
+# Every message is one frame: a fixed header followed by a marshal payload. Requests carry the
+# cache index and operation code; responses echo the request id with a status instead of the
+# cache index, so a client can keep many requests in flight on one connection and match the
+# answers as they arrive, in any order. marshal is only safe between trusting parties: the
+# server socket is created with mode 0600, so only processes of the same user can connect.
+HEADER = struct.Struct("<IIBB")  # payload length, request id, cache index or status, operation code
+MAX_PAYLOAD = 64 * 2**20
+
+CACHES = ("ingredients", "recipes")
+OPERATIONS = ("ping", "prefix_search", "multi_token_prefix_search", "infix_search", "fuzzy_search",
+              "multi_token_fuzzy_search", "smart_search", "add_ingredient", "remove_ingredient",
+              "rename_ingredient", "increment_usage", "stats", "sync_usage_to_db", "save_snapshot",
+              "start_rebuild_thread")
+SEARCHES = frozenset(OPERATIONS[1:7])
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+class ProtocolError(ConnectionError):
+    """The peer sent a frame this side cannot read; the connection is unusable afterwards."""
+
+def pack_frame(request_id: int, code: int, operation: int, payload: object) -> bytes:
+    data = marshal.dumps(payload)
+    if len(data) > MAX_PAYLOAD:
+        raise ValueError(f"payload of {len(data)} bytes exceeds {MAX_PAYLOAD}")
+    return HEADER.pack(len(data), request_id, code, operation) + data
+
+def read_frame(stream: BinaryIO) -> Tuple[int, int, int, object] | None:
+    """Next (request id, code, operation, payload) from ``stream``; None once the peer closed it."""
+    header = stream.read(HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise ProtocolError("connection closed inside a frame header")
+    length, request_id, code, operation = HEADER.unpack(header)
+    if length > MAX_PAYLOAD:
+        raise ProtocolError(f"frame of {length} bytes exceeds {MAX_PAYLOAD}")
+    data = stream.read(length)
+    if len(data) < length:
+        raise ProtocolError("connection closed inside a frame payload")
+    try:
+        return request_id, code, operation, marshal.loads(data)
+    except (EOFError, ValueError, TypeError) as e:
+        raise ProtocolError(f"unreadable payload: {e}") from e
+
+# Search keyword arguments hold objects (filter, deadline, stage list) that travel as plain
+# values: the filter as its two fields, the deadline as the seconds left, the stage list as a
+# flag asking the server to report the stages it ran.
+def encode_search_options(kwargs: Dict[str, object]) -> Dict[str, object]:
+    options = dict(kwargs)
+    search_filter = options.get("search_filter")
+    if search_filter is not None:
+        options["search_filter"] = (search_filter.category, search_filter.max_calories)
+    deadline = options.get("deadline")
+    if deadline is not None:
+        remaining = deadline.remaining()
+        # A spent budget still has to expire on the server; 0 would mean "no budget" there
+        options["deadline"] = None if remaining is None else max(remaining, 1e-9)
+    if "stages" in options:
+        options["stages"] = options["stages"] is not None
+    return options
+
+def decode_search_options(options: Dict[str, object]) -> Tuple[Dict[str, object], List[str] | None, Deadline | None]:
+    """Search keyword arguments rebuilt from :func:`encode_search_options`, plus the stage list and deadline."""
+    kwargs = dict(options)
+    stages = deadline = None
+    if kwargs.get("search_filter") is not None:
+        kwargs["search_filter"] = make_filter(*kwargs["search_filter"])
+    if kwargs.get("deadline") is not None:
+        deadline = kwargs["deadline"] = Deadline(kwargs["deadline"])
+    if kwargs.get("stages"):
+        stages = kwargs["stages"] = []
+    elif "stages" in kwargs:
+        kwargs["stages"] = None
+    return kwargs, stages, deadline
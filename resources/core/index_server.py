@@ -0,0 +1,141 @@
+"""Standalone index server: one process owns the search caches, uvicorn workers query it.
+
+Run it before the workers, with the same environment::
+
+    INDEX_SERVER_SOCKET=/run/mealmaster/index.sock python -m resources.core.index_server
+
+The socket is only bound once both caches are built, so workers that start earlier wait
+for it in ``build_cache`` (see resources.core.index_client).
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import os
+import socket
+import socketserver
+import threading
+from typing import Dict
+from resources.logger import Logger
+from resources.core.index_protocol import (CACHES, OPERATIONS, SEARCHES, STATUS_ERROR, STATUS_OK, ProtocolError,
+                                           decode_search_options, pack_frame, read_frame)
+
+logger = Logger()
+
+SERVER_THREADS = int(os.getenv("INDEX_SERVER_THREADS", "8"))  # Requests executed concurrently across connections
+
+class _Connection(socketserver.StreamRequestHandler):
+    """Reads the frames of one client and hands each request to the server's thread pool.
+
+    Requests are not answered in order: a slow database fallback does not hold up the cheap
+    lookups pipelined behind it. Responses share the socket, so they are written under a lock.
+    """
+    def handle(self):
+        server: IndexServer = self.server.index_server
+        write_lock = threading.Lock()
+        while True:
+            try:
+                frame = read_frame(self.rfile)
+            except (ProtocolError, OSError) as e:
+                logger.error(f"Index server dropped a client: {e}")
+                return
+            if frame is None:
+                return
+            try:
+                server.pool.submit(server.respond, self.connection, write_lock, *frame)
+            except RuntimeError:
+                return  # Server shut down; closing the connection fails the client's pending calls
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class IndexServer:
+    """Serves the methods of a set of EntityCaches over a Unix domain socket."""
+    def __init__(self, path: str, caches: Dict[str, object], threads: int = SERVER_THREADS):
+        self.path = path
+        self.caches = [caches[name] for name in CACHES]
+        self.pool = ThreadPoolExecutor(threads, thread_name_prefix="index-server")
+        if os.path.exists(path):
+            os.unlink(path)  # Left over from a previous run; binding would fail
+        self._server = _UnixServer(path, _Connection, bind_and_activate=False)
+        self._server.index_server = self
+        old_umask = os.umask(0o177)  # Created as 0600: payloads are marshal data, only the owner may connect
+        try:
+            self._server.server_bind()
+        finally:
+            os.umask(old_umask)
+        self._server.server_activate()
+
+    def respond(self, connection: socket.socket, write_lock: threading.Lock, request_id: int, cache_index: int,
+                operation: int, payload: object):
+        try:
+            status, result = STATUS_OK, self.execute(self.caches[cache_index], OPERATIONS[operation], payload)
+        except Exception as e:
+            status, result = STATUS_ERROR, f"{type(e).__name__}: {e}"
+        try:
+            frame = pack_frame(request_id, status, operation, result)
+        except ValueError as e:
+            frame = pack_frame(request_id, STATUS_ERROR, operation, f"unserializable result: {e}")
+        try:
+            with write_lock:
+                connection.sendall(frame)
+        except OSError:
+            pass  # Client went away; its reader fails the pending calls
+
+    def execute(self, cache, operation: str, payload: object) -> object:
+        """Runs one request against ``cache``; the result must be marshal-able."""
+        if operation == "ping":
+            return True
+        if operation in SEARCHES:
+            query, options = payload
+            kwargs, stages, deadline = decode_search_options(options)
+            results = getattr(cache, operation)(query, **kwargs)
+            return results, stages, deadline is not None and deadline.expired
+        if operation in ("add_ingredient", "remove_ingredient", "increment_usage"):
+            return getattr(cache, operation)(cache.summary_cls.model_validate(payload))
+        if operation == "rename_ingredient":
+            old, new = payload
+            return cache.rename_ingredient(cache.summary_cls.model_validate(old), cache.summary_cls.model_validate(new))
+        if operation in ("stats", "sync_usage_to_db", "save_snapshot", "start_rebuild_thread"):
+            return getattr(cache, operation)()
+        raise ValueError(f"unknown operation {operation}")
+
+    def serve_forever(self):
+        logger.info(f"Index server listening on {self.path}")
+        self._server.serve_forever()
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self.pool.shutdown(wait=False)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+def main():
+    from db.models import Ingredients, Recipes
+    from resources.core.entity_cache import (CHANGE_LOG_POLL, EntityCache, ING_MAX_TRIE_DEPTH, INDEX_SERVER_SOCKET,
+                                             REC_MAX_TRIE_DEPTH, build_search_trie, tail_change_log)
+    from routers.schemas import IngredientsSummary, RecipeSummary
+    parser = argparse.ArgumentParser(description="Serve the ingredient and recipe search caches to the API workers.")
+    parser.add_argument("--socket", default=INDEX_SERVER_SOCKET, required=INDEX_SERVER_SOCKET is None,
+                        help="Unix socket path (default: INDEX_SERVER_SOCKET)")
+    args = parser.parse_args()
+    caches = {"ingredients": EntityCache(build_search_trie(ING_MAX_TRIE_DEPTH), Ingredients, IngredientsSummary),
+              "recipes": EntityCache(build_search_trie(REC_MAX_TRIE_DEPTH), Recipes, RecipeSummary)}
+    for cache in caches.values():
+        cache.build_cache()
+    server = IndexServer(args.socket, caches)
+    stop = threading.Event()
+    if CHANGE_LOG_POLL > 0:  # Mutations made outside the API workers (scripts, other hosts) reach the index too
+        threading.Thread(target=tail_change_log, args=(list(caches.values()), CHANGE_LOG_POLL, stop), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.shutdown()
+        for cache in caches.values():
+            cache.save_snapshot()  # Restored by the next start
+
+if __name__ == "__main__":
+    main()
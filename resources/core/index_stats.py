@@ -0,0 +1,97 @@
+from __future__ import annotations
+from array import array
+from functools import lru_cache
+from typing import Dict
+import sys
+
+# Sizes of the containers a trie is made of, measured once on this interpreter
+EMPTY_DICT_BYTES = sys.getsizeof({})
+EDGE_BYTES = sys.getsizeof({"a": None}) - EMPTY_DICT_BYTES  # A child dict allocates its key table on the first edge
+LIST_BYTES = sys.getsizeof([])
+ARRAY_BYTES = sys.getsizeof(array("q"))
+SET_BYTES = sys.getsizeof(set())
+REF_BYTES = 8  # One pointer or int64 slot
+SET_ENTRY_BYTES = 16  # Hash + key per set slot
+
+def instance_bytes(obj: object) -> int:
+    """Shallow size of ``obj`` plus its attribute dict, if it has one."""
+    size = sys.getsizeof(obj)
+    attrs = getattr(obj, "__dict__", None)
+    if attrs is not None:
+        size += sys.getsizeof(attrs)
+    return size
+
+def shallow_bytes(value: object) -> int:
+    """Size of ``value`` plus the objects it references directly (tuple items or attribute values)."""
+    if isinstance(value, tuple):
+        children = value
+    elif hasattr(value, "__dict__"):
+        children = vars(value).values()
+    else:  # Slotted object
+        children = [getattr(value, name, None) for cls in type(value).__mro__ for name in getattr(cls, "__slots__", ())]
+    return instance_bytes(value) + sum(sys.getsizeof(child) for child in children)
+
+@lru_cache(maxsize=None)
+def node_bytes(node_cls: type) -> int:
+    """Size of a freshly created ``node_cls`` including the empty containers it allocates."""
+    node = node_cls()
+    names = getattr(node_cls, "__slots__", None) or vars(node)
+    size = instance_bytes(node)
+    for name in names:
+        value = getattr(node, name)
+        if isinstance(value, (dict, list, set, str)):
+            size += sys.getsizeof(value)
+    return size
+
+def size_bucket(bit_length: int) -> str:
+    """Histogram label of the sizes sharing ``bit_length``: "1", "2-3", "4-7", ..."""
+    low = 1 << (bit_length - 1)
+    high = (low << 1) - 1
+    return str(low) if low == high else f"{low}-{high}"
+
+class TrieCounters:
+    """Size counters a trie keeps current on every write, so reporting them costs nothing.
+
+    Writers update them while holding the trie lock; readers take the plain int values
+    without locking, which may be one write behind.
+    """
+    __slots__ = ("nodes", "terminals", "top_entries", "postings", "refs", "_buckets")
+
+    def __init__(self):
+        self.nodes = 1  # The root
+        self.terminals = 0  # Words (prefix trie) or distinct tokens (token trie)
+        self.top_entries = 0  # Entries over all per-node top lists
+        self.postings = 0  # Ids over all per-node posting lists
+        self.refs = 0  # Item ids held by terminal token nodes
+        self._buckets: Dict[int, int] = {}  # Bit length of a posting list's size -> number of such lists
+
+    def node_removed(self, node):
+        """Accounts for a node unlinked from the trie together with its ranked and posting lists."""
+        self.nodes -= 1
+        top = getattr(node, "top", None)
+        if top:
+            self.top_entries -= len(top)
+        postings = getattr(node, "postings", None)
+        if postings:
+            self.postings_resized(len(postings), 0)
+
+    def postings_resized(self, old: int, new: int):
+        if old == new:
+            return
+        self.postings += new - old
+        old_bucket, new_bucket = old.bit_length(), new.bit_length()
+        if old_bucket != new_bucket:
+            buckets = self._buckets
+            if old:
+                buckets[old_bucket] -= 1
+            if new:
+                buckets[new_bucket] = buckets.get(new_bucket, 0) + 1
+
+    @property
+    def posting_lists(self) -> int:
+        """Number of non-empty posting lists."""
+        return sum(self._buckets.values())
+
+    def posting_sizes(self) -> Dict[str, int]:
+        """Posting lists per power-of-two size range, smallest range first."""
+        return {size_bucket(bits): count for bits, count in sorted(self._buckets.items()) if count}
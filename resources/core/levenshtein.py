@@ -0,0 +1,112 @@
+from __future__ import annotations
+from typing import Dict, List, Tuple
+
+DEAD_STATE = -1
+
+class LevenshteinAutomaton:
+    """Lazily compiled DFA accepting every string within ``max_distance`` edits of ``word``.
+
+    A state is a Levenshtein DP row with every cell capped at ``max_distance + 1``; capping
+    keeps all distances that can still matter exact while making the state space finite.
+    Rows are interned once and transitions are memoized per (state, character), so walking
+    a trie edge costs a dict lookup instead of a fresh DP row. Characters that do not occur
+    in ``word`` all behave the same and share one transition slot.
+    """
+    def __init__(self, word: str, max_distance: int):
+        self.word = word
+        self.max_distance = max_distance
+        self._cap = max_distance + 1
+        self._alphabet = frozenset(word)
+        start = tuple(min(i, self._cap) for i in range(len(word) + 1))
+        self._rows: List[Tuple[int, ...]] = [start]
+        self._ids: Dict[Tuple[int, ...], int] = {start: 0}
+        # Per state: char -> next state; ``_class_transitions`` shares work across absent chars
+        self.transitions: List[Dict[str, int]] = [{}]
+        self._class_transitions: List[Dict[str, int]] = [{}]
+        # Distance to the full word per state (> max_distance when not accepting)
+        self.distance: List[int] = [start[-1]]
+        # Lowest cell per state: no continuation of the input can end closer than this
+        self.floor: List[int] = [min(start)]
+        self.start = 0 if min(start) <= max_distance else DEAD_STATE
+
+    def step(self, state: int, char: str) -> int:
+        """Returns the state reached from ``state`` on ``char``, or DEAD_STATE.
+
+        Hot loops can read ``transitions[state].get(char)`` first and call this only on a miss.
+        """
+        nxt = self.transitions[state].get(char)
+        if nxt is None:
+            key = char if char in self._alphabet else ""
+            class_transitions = self._class_transitions[state]
+            nxt = class_transitions.get(key)
+            if nxt is None:
+                nxt = self._compile(state, key)
+                class_transitions[key] = nxt
+            self.transitions[state][char] = nxt
+        return nxt
+
+    def _compile(self, state: int, char: str) -> int:
+        """Computes and interns the successor row of ``state`` on ``char``."""
+        prev_row = self._rows[state]
+        cap = self._cap
+        word = self.word
+        row = [min(prev_row[0] + 1, cap)]
+        for col in range(1, len(word) + 1):
+            cost = min(row[col - 1] + 1, prev_row[col] + 1, prev_row[col - 1] + (word[col - 1] != char))
+            row.append(min(cost, cap))
+        if min(row) > self.max_distance:
+            return DEAD_STATE
+        key = tuple(row)
+        nxt = self._ids.get(key)
+        if nxt is None:
+            nxt = len(self._rows)
+            self._ids[key] = nxt
+            self._rows.append(key)
+            self.transitions.append({})
+            self._class_transitions.append({})
+            self.distance.append(row[-1])
+            self.floor.append(min(row))
+        return nxt
+
+    def is_match(self, state: int) -> bool:
+        """True if the input consumed so far is within ``max_distance`` of the word."""
+        return self.distance[state] <= self.max_distance
+
+    @property
+    def state_count(self) -> int:
+        return len(self._rows)
+
+def bounded_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance between ``a`` and ``b``, or ``max_distance + 1`` once it is exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev_row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        row = [i]
+        for j, cb in enumerate(b, 1):
+            row.append(min(row[j - 1] + 1, prev_row[j] + 1, prev_row[j - 1] + (ca != cb)))
+        if min(row) > max_distance:
+            return max_distance + 1
+        prev_row = row
+    return min(prev_row[-1], max_distance + 1)
+
+def fill_row(prev_row: List[int], row: List[int], char: str, word: str) -> int:
+    """Writes the Levenshtein DP row for ``char`` after ``prev_row`` into ``row`` and returns its minimum.
+
+    Both rows are ``len(word) + 1`` long and owned by the caller, so a traversal can keep one
+    buffer per depth instead of allocating a row per edge.
+    """
+    left = prev_row[0] + 1
+    row[0] = left
+    lowest = left
+    for col in range(1, len(word) + 1):
+        cost = prev_row[col - 1] + (word[col - 1] != char)
+        if prev_row[col] + 1 < cost:
+            cost = prev_row[col] + 1
+        if left + 1 < cost:
+            cost = left + 1
+        row[col] = cost
+        left = cost
+        if cost < lowest:
+            lowest = cost
+    return lowest
@@ -0,0 +1,88 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from heapq import nsmallest
+from typing import List, Sequence
+
+# Posting lists are sorted ``array("q")`` of item ids. Snapshot writers never mutate one in
+# place: they build a new array and assign it, so readers (and shallow copies of a node) keep
+# a stable list. Writers that hold the trie lock against readers may update in place.
+EMPTY_POSTINGS = array("q")
+
+# Galloping probes run in Python while a set intersection runs in C at roughly 1/24 the cost
+# per id, so lists are galloped only when the smallest is at least this much sparser.
+GALLOP_RATIO = 24
+
+def with_id(postings: array, item_id: int, copy: bool = True) -> array:
+    """Returns ``postings`` with ``item_id`` inserted in order.
+
+    With ``copy`` the input is left untouched and a new array is returned (the same array if
+    the id was already present); without it the array is updated in place.
+    """
+    i = bisect_left(postings, item_id)
+    if i < len(postings) and postings[i] == item_id:
+        return postings
+    if copy or postings is EMPTY_POSTINGS:
+        updated = postings[:i]
+        updated.append(item_id)
+        updated.extend(postings[i:])
+        return updated
+    postings.insert(i, item_id)
+    return postings
+
+def without_id(postings: array, item_id: int, copy: bool = True) -> array:
+    """Returns ``postings`` without ``item_id``, copying first unless ``copy`` is False."""
+    i = bisect_left(postings, item_id)
+    if i == len(postings) or postings[i] != item_id:
+        return postings
+    if copy:
+        return postings[:i] + postings[i + 1:]
+    del postings[i]
+    return postings
+
+def gallop(postings: Sequence[int], target: int, lo: int) -> int:
+    """Index of the first entry >= ``target`` at or after ``lo``, probing 1, 2, 4, ... ahead first."""
+    n = len(postings)
+    if lo >= n or postings[lo] >= target:
+        return lo
+    prev = lo
+    step = 1
+    hi = lo + 1
+    while hi < n and postings[hi] < target:
+        prev = hi
+        step <<= 1
+        hi = prev + step
+    return bisect_left(postings, target, prev + 1, min(hi, n))
+
+def intersect(lists: List[Sequence[int]], limit: int | None = None) -> List[int]:
+    """Ids present in every sorted list, ascending, stopping after ``limit`` of them.
+
+    When the smallest list is much shorter than the rest it drives the walk and every other
+    list is searched by galloping from where the previous probe stopped, so the cost follows
+    the smallest list rather than the largest one (a common token such as "de" barely matters
+    once a rarer token is present). Lists of similar length are intersected as sets instead.
+    """
+    if not lists:
+        return []
+    lists = sorted(lists, key=len)
+    smallest, others = lists[0], lists[1:]
+    if not others:
+        return list(smallest[:limit] if limit is not None else smallest)
+    if len(smallest) * len(others) * GALLOP_RATIO > sum(len(other) for other in others):
+        common = set(smallest).intersection(*others)
+        return sorted(common) if limit is None else nsmallest(limit, common)
+    cursors = [0] * len(others)
+    found: List[int] = []
+    for item_id in smallest:
+        for k, other in enumerate(others):
+            pos = gallop(other, item_id, cursors[k])
+            cursors[k] = pos
+            if pos == len(other):
+                return found  # One list is exhausted: nothing further can match
+            if other[pos] != item_id:
+                break
+        else:
+            found.append(item_id)
+            if limit is not None and len(found) >= limit:
+                break
+    return found
@@ -0,0 +1,520 @@
+from __future__ import annotations
+from typing import Dict, List, Set, Tuple
+from resources.core.search_engine import (SearchTrie, TokenSearchTrie, normalize, tokenize, logger,
+                                          _add_facets, _refresh_facets)
+from resources.core.levenshtein import LevenshteinAutomaton, DEAD_STATE, fill_row
+from resources.core.postings import EMPTY_POSTINGS, with_id, without_id
+from resources.core.deadline import Deadline
+from resources.core.facets import SearchFilter, item_facets, widen_facets
+from resources.core.index_stats import TrieCounters
+from resources.core.topk import TopK
+
+class RadixNode:
+    """Compact node for the radix (Patricia) tries.
+
+    ``label`` holds the edge text leading into the node, so chains of single-child nodes
+    are collapsed into one object. Children are keyed by the first character of their label.
+    Slots keep the per-node footprint to a fixed set of fields.
+    """
+    __slots__ = ("label", "children", "is_end_of_word", "weight", "value", "top", "facets")
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.children: Dict[str, RadixNode] = {}
+        self.is_end_of_word: bool = False
+        self.weight = 0
+        self.value = None
+        self.top: List[RadixNode] = []
+        self.facets = None
+
+class RadixTokenNode:
+    """Compact token node; ``items`` is only allocated on terminal nodes.
+
+    ``postings`` is the sorted id array of the whole subtree, as in :class:`TokenTrieNode`.
+    """
+    __slots__ = ("label", "children", "is_end_of_word", "weight", "value", "items", "postings", "facets")
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.children: Dict[str, RadixTokenNode] = {}
+        self.is_end_of_word: bool = False
+        self.weight = 0
+        self.value = None
+        self.items: Set[int] | None = None
+        self.postings = EMPTY_POSTINGS
+        self.facets = None
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """Length of the shared prefix of two strings."""
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+def _insert_path(root, word: str, node_cls, counters: TrieCounters) -> List:
+    """Creates (splitting edges where needed) the path for ``word`` and returns its nodes.
+
+    The returned list starts at ``root`` and ends at the node that represents ``word``.
+    """
+    node = root
+    path = [node]
+    rest = word
+    while rest:
+        child = node.children.get(rest[0])
+        if child is None:
+            child = node_cls(rest)
+            node.children[rest[0]] = child
+            counters.nodes += 1
+            path.append(child)
+            return path
+        common = _common_prefix_length(child.label, rest)
+        if common < len(child.label):
+            # Split the edge: node -> mid(label[:common]) -> child(label[common:])
+            mid = node_cls(child.label[:common])
+            child.label = child.label[common:]
+            mid.children[child.label[0]] = child
+            if hasattr(mid, "top"):
+                mid.top = list(child.top)  # Same subtree, same best entries
+                counters.top_entries += len(mid.top)
+            if hasattr(mid, "postings"):
+                mid.postings = child.postings[:]  # Same subtree, same ids (own copy for in-place writers)
+                counters.postings_resized(0, len(mid.postings))
+            mid.facets = child.facets
+            node.children[mid.label[0]] = mid
+            counters.nodes += 1
+            child = mid
+        node = child
+        path.append(node)
+        rest = rest[common:]
+    return path
+
+def _find_path(root, word: str) -> List | None:
+    """Returns the nodes from ``root`` to the node that represents ``word`` exactly, or None."""
+    node = root
+    path = [node]
+    rest = word
+    while rest:
+        child = node.children.get(rest[0])
+        if child is None or not rest.startswith(child.label):
+            return None
+        node = child
+        path.append(node)
+        rest = rest[len(child.label):]
+    return path
+
+def _find_subtree(root, prefix: str):
+    """Returns the highest node whose subtree holds every word starting with ``prefix``, or None."""
+    node = root
+    rest = prefix
+    while rest:
+        child = node.children.get(rest[0])
+        if child is None:
+            return None
+        label = child.label
+        if len(rest) <= len(label):
+            return child if label.startswith(rest) else None
+        if not rest.startswith(label):
+            return None
+        node = child
+        rest = rest[len(label):]
+    return node
+
+def _prune(path: List, is_live, counters: TrieCounters, fold: bool = True) -> None:
+    """Removes dead leaves bottom-up and collapses single-child chains left behind by a delete.
+
+    Folding relabels a node that is not on ``path``, so snapshot writers pass ``fold=False``
+    and leave the (still valid) uncollapsed chain in place.
+    """
+    for i in range(len(path) - 1, 0, -1):
+        node, parent = path[i], path[i - 1]
+        if is_live(node):
+            break
+        if not node.children:
+            del parent.children[node.label[0]]
+            counters.node_removed(node)
+            continue
+        if fold and len(node.children) == 1:
+            # Fold the dead node into its only child so terminal nodes keep their identity
+            (child,) = node.children.values()
+            child.label = node.label + child.label
+            parent.children[child.label[0]] = child
+            counters.node_removed(node)
+        break
+
+def _char_depth(node, depth: int = 0) -> int:
+    """Maximum depth in characters below ``node``."""
+    if not node.children:
+        return depth
+    return max(_char_depth(child, depth + len(child.label)) for child in node.children.values())
+
+class RadixSearchTrie(SearchTrie):
+    """Radix tree layout of :class:`SearchTrie` with the same public API.
+
+    Ranking (top lists, fuzzy ordering, rename) is inherited; only the structural
+    operations are reimplemented over collapsed edges.
+    """
+    def __init__(self, max_trie_depth: int = 64, distance_weight: float = 1.0, top_k: int = 50,
+                 usage_weight: float = 0.8):
+        super().__init__(max_trie_depth, distance_weight, top_k, usage_weight)
+        self.root = RadixNode()
+
+    def _path(self, word: str, root: RadixNode | None = None) -> List[RadixNode] | None:
+        return _find_path(root or self.root, word)
+
+    def insert(self, item: object, weight: int = 1):
+        """Inserts an item into the trie with an optional weight."""
+        word = normalize(item.name)
+        with self._lock:
+            root = self._writable_root([word])
+            path = _insert_path(root, word, RadixNode, self.counters)
+            node = path[-1]
+            if not node.is_end_of_word:
+                self.counters.terminals += 1
+            node.is_end_of_word = True
+            node.weight += weight
+            node.value = item
+            self._promote(path, node)
+            _add_facets(path, item)
+            self.generation += 1
+            self.root = root
+            return node
+
+    def delete(self, item: object):
+        """Deletes an item by name, collapsing edges that no longer branch."""
+        norm = normalize(item.name)
+        with self._lock:
+            path = self._path(norm)
+            if path is None or len(path) == 1 or not path[-1].is_end_of_word:
+                return
+            root = self._writable_root([norm])
+            path = self._path(norm, root)
+            victim = path[-1]
+            victim.is_end_of_word = False
+            self.counters.terminals -= 1
+            victim.weight = 0
+            victim.value = None
+            for node in reversed(path):
+                if victim in node.top:
+                    self._rebuild_top(node)
+            _refresh_facets(path, self._own_facets)
+            _prune(path, lambda n: n.is_end_of_word, self.counters, fold=not self.copy_on_write)
+            self.generation += 1
+            self.root = root
+
+    def prefix_search(self, prefix: str, limit: int | None = None,
+                      search_filter: SearchFilter | None = None) -> List[object]:
+        """Returns items whose name starts with the given prefix (see :meth:`SearchTrie.prefix_search`)."""
+        norm = normalize(prefix)[:self.max_trie_depth]
+        if not norm:
+            return []
+        with self._read_lock():
+            node = _find_subtree(self.root, norm)
+            if node is None:
+                return []
+            if search_filter is not None:
+                return self._filtered_prefix(node, norm, limit, search_filter)
+            if limit is not None and limit <= self.top_k:
+                found = self._top_window(node.top, limit, len(node.top) < self.top_k)
+                if found is not None:
+                    return found
+            results: List[object] = []
+            self._dfs(node, norm, results)
+            return results
+
+    def _dfs(self, node: RadixNode, prefix: str, results: List[object], search_filter: SearchFilter | None = None):
+        # Children are pushed reversed so they pop in insertion order, the order SearchTrie
+        # recurses in: both layouts then break ranking ties the same way
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if search_filter is None:
+                if current.is_end_of_word and current.value is not None:
+                    results.append(current.value)
+                stack.extend(reversed(current.children.values()))
+                continue
+            if current.is_end_of_word and current.value is not None and search_filter.matches(current.value):
+                results.append(current.value)
+            stack.extend(child for child in reversed(current.children.values()) if search_filter.admits(child.facets))
+
+    def _iterative_fuzzy(self, word: str, max_distance: int, top: TopK | None = None,
+                         deadline: Deadline | None = None, search_filter: SearchFilter | None = None) -> List[Dict]:
+        """Levenshtein traversal that advances the DP row once per character of each edge label."""
+        results: List[Dict] = []
+        columns = len(word) + 1
+        rows: List[List[int]] = [list(range(columns))]  # One reusable DP row per character depth
+        cap = max_distance
+        root = self.root
+        if (root.is_end_of_word and root.value is not None and len(word) <= cap
+                and (search_filter is None or search_filter.matches(root.value))):
+            results.append({"node": root, "distance": len(word)})
+        # (children left to visit, character depth of their parent)
+        stack = [(reversed(root.children.values()), 0)]
+        while stack:
+            if deadline is not None and deadline.exceeded():
+                break  # Out of time: keep what was found so far
+            children, depth = stack[-1]
+            node = next(children, None)
+            if node is None:
+                stack.pop()
+                continue
+            end = depth + len(node.label)
+            if end > self.max_trie_depth:
+                continue
+            if search_filter is not None and not search_filter.admits(node.facets):
+                continue
+            while len(rows) <= end:
+                rows.append([0] * columns)
+            for i, char in enumerate(node.label, depth + 1):
+                if fill_row(rows[i - 1], rows[i], char, word) > cap:
+                    break
+            else:
+                dist = rows[end][-1]
+                if (node.is_end_of_word and node.value is not None and dist <= cap
+                        and (search_filter is None or search_filter.matches(node.value))):
+                    if top is None:
+                        results.append({"node": node, "distance": dist})
+                    else:
+                        cap = self._offer(top, node, dist, cap)
+                if node.children:
+                    stack.append((reversed(node.children.values()), end))
+        return results
+
+    def _automaton_fuzzy(self, word: str, max_distance: int, top: TopK | None = None,
+                         deadline: Deadline | None = None, search_filter: SearchFilter | None = None) -> List[Dict]:
+        """Automaton traversal that feeds each edge label through the compiled DFA."""
+        results: List[Dict] = []
+        automaton = LevenshteinAutomaton(word, max_distance)
+        if automaton.start == DEAD_STATE:
+            return results
+        floor = automaton.floor
+        cap = max_distance
+        stack: List[Tuple[RadixNode, int, int]] = [(self.root, automaton.start, 0)]
+        while stack:
+            if deadline is not None and deadline.exceeded():
+                break  # Out of time: keep what was found so far
+            node, state, depth = stack.pop()
+            if depth > self.max_trie_depth or floor[state] > cap:
+                continue
+            if (node.is_end_of_word and node.value is not None and automaton.distance[state] <= cap
+                    and (search_filter is None or search_filter.matches(node.value))):
+                if top is None:
+                    results.append({"node": node, "distance": automaton.distance[state]})
+                else:
+                    cap = self._offer(top, node, automaton.distance[state], cap)
+            for child in node.children.values():
+                if search_filter is not None and not search_filter.admits(child.facets):
+                    continue
+                nxt = state
+                for char in child.label:
+                    nxt = automaton.step(nxt, char)
+                    if nxt == DEAD_STATE:
+                        break
+                else:
+                    if floor[nxt] <= cap:
+                        stack.append((child, nxt, depth + len(child.label)))
+        return results
+
+    def resume_prefix_search(self, prefix: str, limit: int | None, session) -> List[object]:
+        """Session state is kept per character, which compact edges do not have; searches afresh."""
+        return self.prefix_search(prefix, limit)
+
+    def resume_fuzzy_search(self, word: str, max_distance: int, session, limit: int | None = None,
+                            deadline: Deadline | None = None) -> List[object]:
+        """Session state is kept per character, which compact edges do not have; searches afresh."""
+        return self.fuzzy_search(word, max_distance, limit, deadline)
+
+    def get_depth(self) -> int:
+        with self._read_lock():
+            return _char_depth(self.root)
+
+    def print_tree_inlog_file(self, node = None, prefix: str = ''):
+        if node is None:
+            node = self.root
+        else:
+            prefix += node.label
+        if node.is_end_of_word:
+            logger.info(f"{prefix} (weight: {node.weight}) {node.value}")
+        for child in node.children.values():
+            self.print_tree_inlog_file(child, prefix)
+
+class RadixTokenSearchTrie(TokenSearchTrie):
+    """Radix tree layout of :class:`TokenSearchTrie` with the same public API.
+
+    Scoring and multi-token intersection are inherited unchanged.
+    """
+    def __init__(self, max_trie_depth: int = 64, usage_weight: float = 0.8, distance_weight: float = 1.0):
+        super().__init__(max_trie_depth, usage_weight, distance_weight)
+        self.root = RadixTokenNode()
+
+    def insert(self, item: object, weight: int = 1, tokens: Tuple[str, ...] | None = None,
+               terminal: bool = True):
+        tokens = tokenize(item.name) if tokens is None else tokens
+        facets = item_facets(item)
+        with self._lock:
+            self._by_id[item.id] = item
+            root = self._writable_root(tokens)
+            node = root
+            counters = self.counters
+            for token in tokens:
+                path = _insert_path(root, token, RadixTokenNode, counters)
+                for path_node in path[1:]:
+                    size = len(path_node.postings)
+                    path_node.postings = with_id(path_node.postings, item.id, self.copy_on_write)
+                    counters.postings_resized(size, len(path_node.postings))
+                    path_node.facets = widen_facets(path_node.facets, facets)
+                node = path[-1]
+                node.is_end_of_word = True
+                if node.items is None:
+                    node.items = set()
+                    counters.terminals += 1
+                    if self.deletion_index is not None:
+                        self.deletion_index.add(token)
+                if item.id not in node.items:
+                    counters.refs += 1
+                    node.items.add(item.id)
+            if terminal:
+                node.weight += weight
+                node.value = item
+            self.generation += 1
+            self.root = root
+            return node
+
+    def delete(self, item: object, tokens: Tuple[str, ...] | None = None):
+        """Removes the item's id from each of its tokens, pruning tokens left without items."""
+        tokens = tokenize(item.name) if tokens is None else tokens
+        with self._lock:
+            self._by_id.pop(item.id, None)
+            root = self._writable_root(tokens)
+            counters = self.counters
+            for token in tokens:
+                path = _find_path(root, token)
+                if path is None or len(path) == 1:
+                    continue
+                for path_node in path[1:]:
+                    size = len(path_node.postings)
+                    path_node.postings = without_id(path_node.postings, item.id, self.copy_on_write)
+                    counters.postings_resized(size, len(path_node.postings))
+                if not path[-1].items or item.id not in path[-1].items:
+                    continue
+                node = path[-1]
+                node.items.discard(item.id)
+                counters.refs -= 1
+                _refresh_facets(path[1:], self._own_facets)
+                if not node.items:
+                    node.items = None
+                    counters.terminals -= 1
+                    node.is_end_of_word = False
+                    node.weight = 0
+                    node.value = None
+                    if self.deletion_index is not None:
+                        self.deletion_index.remove(token)
+                    _prune(path, lambda n: n.is_end_of_word, counters, fold=not self.copy_on_write)
+            self.generation += 1
+            self.root = root
+
+    def _token_node(self, root, token: str):
+        path = _find_path(root, token)
+        return path[-1] if path is not None and path[-1].is_end_of_word else None
+
+    def _dfs(self, node: RadixTokenNode, prefix: str, results: List[Tuple[str, Set[int]]]):
+        stack = [(node, prefix)]
+        while stack:
+            current, text = stack.pop()
+            if current.is_end_of_word and current.items:
+                results.append((text, current.items.copy()))
+            for child in reversed(current.children.values()):  # Popped in SearchTrie's order
+                stack.append((child, text + child.label))
+
+    def _prefix_node(self, root, prefix: str):
+        return _find_subtree(root, prefix)
+
+    def _token_iterative_fuzzy(self, token: str, max_distance: int, per_token_limit: int,
+                               deadline: Deadline | None = None,
+                               search_filter: SearchFilter | None = None) -> List[Tuple[str, Set[int], int]]:
+        results: List[Tuple[str, Set[int], int]] = []
+        columns = len(token) + 1
+        rows: List[List[int]] = [list(range(columns))]
+        chars: List[str] = []  # Path characters; the matched token is joined only for a terminal
+        stack = [(reversed(self.root.children.values()), 0)]
+        while stack and len(results) < per_token_limit:
+            if deadline is not None and deadline.exceeded():
+                break  # Out of time: keep what was found so far
+            children, depth = stack[-1]
+            node = next(children, None)
+            if node is None:
+                stack.pop()
+                continue
+            end = depth + len(node.label)
+            if end > self.max_trie_depth:
+                continue
+            if search_filter is not None and not search_filter.admits(node.facets):
+                continue
+            while len(rows) <= end:
+                rows.append([0] * columns)
+            chars[depth:end] = node.label
+            for i, char in enumerate(node.label, depth + 1):
+                if fill_row(rows[i - 1], rows[i], char, token) > max_distance:
+                    break
+            else:
+                dist = rows[end][-1]
+                if node.is_end_of_word and node.items and dist <= max_distance:
+                    results.append(("".join(chars[:end]), node.items.copy(), dist))
+                if node.children:
+                    stack.append((reversed(node.children.values()), end))
+        return results
+
+    def _token_automaton_fuzzy(self, token: str, max_distance: int, per_token_limit: int,
+                               deadline: Deadline | None = None,
+                               search_filter: SearchFilter | None = None) -> List[Tuple[str, Set[int], int]]:
+        results: List[Tuple[str, Set[int], int]] = []
+        automaton = LevenshteinAutomaton(token, max_distance)
+        if automaton.start == DEAD_STATE:
+            return results
+        stack: List[Tuple[RadixTokenNode, str, int, int]] = [(self.root, "", automaton.start, 0)]
+        while stack and len(results) < per_token_limit:
+            if deadline is not None and deadline.exceeded():
+                break  # Out of time: keep what was found so far
+            node, prefix, state, depth = stack.pop()
+            if depth > self.max_trie_depth:
+                continue
+            if node.is_end_of_word and node.items and automaton.distance[state] <= max_distance:
+                results.append((prefix, node.items.copy(), automaton.distance[state]))
+            for child in node.children.values():
+                if search_filter is not None and not search_filter.admits(child.facets):
+                    continue
+                nxt = state
+                for char in child.label:
+                    nxt = automaton.step(nxt, char)
+                    if nxt == DEAD_STATE:
+                        break
+                else:
+                    stack.append((child, prefix + child.label, nxt, depth + len(child.label)))
+        return results
+
+    def increment_usage(self, item: object, amount: int = 1):
+        norm = normalize(item.name)
+        with self._lock:
+            root = self._writable_root([norm])
+            path = _find_path(root, norm)
+            if path is None or not path[-1].is_end_of_word:
+                return None
+            node = path[-1]
+            node.weight += amount
+            node.value.usage_count = node.weight
+            self.root = root
+            return node.value
+
+    def get_depth(self) -> int:
+        with self._read_lock():
+            return _char_depth(self.root)
+
+    def print_tree_inlog_file(self, node = None, prefix: str = ''):
+        if node is None:
+            node = self.root
+        else:
+            prefix += node.label
+        if node.is_end_of_word:
+            logger.info(f"{prefix} (weight: {node.weight}) {sorted(node.items or ())}")
+        for child in node.children.values():
+            self.print_tree_inlog_file(child, prefix)
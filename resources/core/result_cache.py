@@ -0,0 +1,76 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Hashable
+import sys
+import threading
+import time
+
+def estimate_size(value) -> int:
+    """Rough deep size in bytes of a search result (lists/dicts of scalars and strings).
+
+    Rows of a result share one shape, so a list is costed as its length times its first row.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)) and value:
+        size += len(value) * estimate_size(value[0])
+    return size
+
+class ResultCache:
+    """LRU + TTL cache of search results, invalidated by a generation number.
+
+    Every entry remembers the index generation it was computed at; a lookup made at a later
+    generation is a miss, so a write that bumps the generation makes all older results
+    unreachable without scanning the cache. The TTL bounds how long rankings can lag behind
+    usage counts, which change without a generation bump.
+    """
+    def __init__(self, max_entries: int = 2048, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, int, list, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, generation: int) -> list | None:
+        """Returns the cached result for ``key`` if it is fresh and from ``generation``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] != generation or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Hashable, generation: int, value: list):
+        if self.max_entries <= 0:
+            return
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, generation, value, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _drop(self, key: Hashable):
+        self.bytes -= self._entries.pop(key)[3]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0, "bytes": self.bytes}
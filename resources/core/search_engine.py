@@ -1,28 +1,54 @@
 from __future__ import annotations
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterable, List, Set, Tuple
+from contextlib import nullcontext
+import copy
+from functools import lru_cache
+import sys
 import threading
 import unicodedata
 from resources.logger import Logger
+from resources.core.levenshtein import LevenshteinAutomaton, DEAD_STATE, fill_row
+from resources.core.symspell import DeletionIndex
+from resources.core.postings import EMPTY_POSTINGS, intersect, with_id, without_id
+from resources.core.deadline import Deadline
+from resources.core.index_stats import (ARRAY_BYTES, EDGE_BYTES, REF_BYTES, SET_BYTES, SET_ENTRY_BYTES,
+                                         TrieCounters, node_bytes, shallow_bytes)
+from resources.core.facets import Facets, SearchFilter, combine_facets, item_facets, widen_facets
+from resources.core.snapshot import load_snapshot, save_snapshot
+from resources.core.topk import TopK
+from resources.core.typeahead import FRONTIER_LIMIT, SearchSession, common_prefix_length, frontier_matches, frontier_step
 from abc import ABC, abstractmethod
 
 logger = Logger()
 
+@lru_cache(maxsize=65536)
+def _normalize_unicode(text: str) -> str:
+    # Normalize to NFD form to separate base characters from diacritics
+    normalized = unicodedata.normalize('NFD', text)
+    # Filter out diacritical marks (category 'Mn')
+    without_diacritics = ''.join(
+        c for c in normalized if unicodedata.category(c) != 'Mn')
+    # Convert to lowercase
+    return without_diacritics.lower()
+
 def normalize(text: str) -> str:
     """
     Normalize a string by converting it to lowercase and removing diacritical marks.
     This helps in performing accent-insensitive searches.
+    ASCII input has nothing to decompose and is only lowercased; other strings are memoized.
     Args:
         s (str): The input string to normalize.
     Returns:
         str: The normalized string.
     """
-    # Normalize to NFD form to separate base characters from diacritics
-    normalized = unicodedata.normalize('NFD', text)
-    # Filter out diacritical marks (category 'Mn')
-    without_diacritics = ''.join(
-        c for c in normalized if unicodedata.category(c) != 'Mn')
-    # Convert to lowercase
-    return without_diacritics.lower()
+    if text.isascii():
+        return text.lower()
+    return _normalize_unicode(text)
+
+@lru_cache(maxsize=65536)
+def tokenize(text: str) -> Tuple[str, ...]:
+    """Normalized whitespace-separated tokens of ``text``."""
+    return tuple(normalize(text).split())
 
 class GenericNode:
     """Base node class for trie structures."""
@@ -32,12 +58,18 @@ class GenericNode:
         self.is_end_of_word: bool = False
         self.weight = 0
         self.value = None
+        self.facets: Facets | None = None  # Category mask and calorie bounds of the subtree (resources.core.facets)
 
 class TrieNode(GenericNode):
-    """Trie node structure for full ingredient names mapping to ingredient summaries."""
+    """Trie node structure for full ingredient names mapping to ingredient summaries.
+
+    Each node also keeps ``top``: the best terminal nodes of its subtree ordered by weight,
+    so bounded prefix queries can be answered without walking the whole subtree.
+    """
     def __init__(self):
         super().__init__()
         self.children: Dict[str, TrieNode] = {}
+        self.top: List[TrieNode] = []
         
 class TokenTrieNode(GenericNode):
     """Separate trie structure for individual tokens (words) mapping to ingredient summaries.
@@ -48,12 +80,20 @@ class TokenTrieNode(GenericNode):
         super().__init__()
         self.children: Dict[str, TokenTrieNode] = {}
         self.items: Set[int] = set()  # Store ingredient IDs (ints) for hashability
+        # Sorted ids of every item with a token in this subtree (see resources.core.postings)
+        self.postings = EMPTY_POSTINGS
 
 class GenericTrieInterface(ABC):
     """Abstract base class defining the interface for a generic trie structure."""
     def __init__(self):
         self.root = GenericNode()
-        self._lock = threading.Lock()
+        self._lock = threading.RLock()  # Re-entrant: rename() deletes and inserts while holding it
+        self.fuzzy_engine = "dp"  # "dp" (row per edge) or "automaton" (compiled Levenshtein DFA)
+        # Snapshot mode: writers copy the nodes they touch and publish a new root, readers never lock
+        self.snapshot_reads = False
+        self.pins = 0  # Snapshots encoding the published nodes outside the lock (see resources.core.snapshot)
+        self.generation = 0  # Bumped by every structural write (insert/delete)
+        self.counters = TrieCounters()  # Sizes kept current by the writers (see stats())
 
     @abstractmethod
     def insert(self, item: object, weight: int = 1):
@@ -80,6 +120,62 @@ class GenericTrieInterface(ABC):
         """Performs a fuzzy search in the trie and returns a list of matching items."""
         raise NotImplementedError
     
+    def _read_lock(self):
+        """Lock guarding a read: the writer lock normally, nothing in snapshot mode.
+
+        In snapshot mode published nodes are never mutated, so a reader that grabs
+        ``self.root`` once sees a consistent version for the whole traversal.
+        """
+        return nullcontext() if self.snapshot_reads else self._lock
+
+    @property
+    def copy_on_write(self) -> bool:
+        """True while writers must leave published nodes untouched: in snapshot mode or while pinned."""
+        return self.snapshot_reads or self.pins > 0
+
+    def _writable_root(self, words: Iterable[str]):
+        """Returns the root a writer may mutate for changes along ``words``.
+
+        Outside snapshot mode this is the live root. In snapshot mode, or while a snapshot
+        pins the published nodes, every node on the paths of ``words`` (plus the first
+        partially matching edge of a compact trie) is copied, so the mutation only becomes
+        visible once the writer assigns ``self.root``. Must be called with ``self._lock`` held.
+        """
+        root = self.root
+        if not self.copy_on_write:
+            return root
+        clones: Dict[int, object] = {}
+        def _clone(node):
+            twin = copy.copy(node)
+            twin.children = dict(node.children)
+            if getattr(node, "top", None) is not None:
+                twin.top = list(node.top)
+            if getattr(node, "items", None) is not None:
+                twin.items = set(node.items)
+            clones[id(node)] = twin
+            return twin
+        new_root = _clone(root)
+        for word in words:
+            node = new_root
+            rest = word
+            while rest:
+                child = node.children.get(rest[0])
+                if child is None:
+                    break
+                if id(child) not in clones:
+                    child = _clone(child)
+                    node.children[rest[0]] = child
+                label = getattr(child, "label", rest[0])
+                if not rest.startswith(label):
+                    break
+                rest = rest[len(label):]
+                node = child
+        # Ranked lists in copied nodes must point at the copies of copied terminals
+        for twin in clones.values():
+            if getattr(twin, "top", None):
+                twin.top = [clones.get(id(n), n) for n in twin.top]
+        return new_root
+
     def print_tree_inlog_file(self, node = None, prefix: str = ''):
         """Utility function to print the trie structure to the log file for debugging."""
         if node is None:
@@ -91,48 +187,187 @@ class GenericTrieInterface(ABC):
         for ch, child in node.children.items():
             self.print_tree_inlog_file(child, prefix + ch)
 
+    def node_count(self) -> int:
+        """Number of nodes, root included, read from the counters instead of a traversal."""
+        return self.counters.nodes
+
+    @abstractmethod
+    def stats(self) -> Dict[str, object]:
+        """Sizes and estimated memory of the trie, computed from counters in constant time."""
+        raise NotImplementedError
+
     def get_depth(self) -> int:
         """Get the maximum depth of the trie."""
         def _depth(node, current_depth: int) -> int:
             if not node.children:
                 return current_depth
             return max(_depth(child, current_depth + 1) for child in node.children.values())
-        with self._lock:
+        with self._read_lock():
             return _depth(self.root, 0)
     
-    def increment_usage(self, item: object):
-        """Increments the usage count (weight) of an item in the trie."""
-        node = self.root
-        for ch in item.name.lower():
-            if ch not in node.children:
-                return
-            node = node.children[ch]
-        if node.is_end_of_word:
-            node.weight += 1
-            node.value.usage_count = node.weight
+    def increment_usage(self, item: object, amount: int = 1) -> object | None:
+        """Increments the usage count (weight) of an item in the trie by ``amount``.
+
+        Returns the stored object whose ``usage_count`` was updated, or None if the name is not indexed.
+        """
+        word = normalize(item.name)
+        with self._lock:
+            root = self._writable_root([word])
+            node = root
+            for ch in word:
+                if ch not in node.children:
+                    return None
+                node = node.children[ch]
+            if node.is_end_of_word:
+                node.weight += amount
+                node.value.usage_count = node.weight
+                self.root = root
+                return node.value
+            return None
     
+def _add_facets(path: List, item: object):
+    """Folds ``item`` into the facets of every node on its path."""
+    facets = item_facets(item)
+    for node in path:
+        node.facets = widen_facets(node.facets, facets)
+
+def _refresh_facets(path: List, own_facets):
+    """Recomputes facets bottom-up along ``path`` after a delete.
+
+    Each node combines ``own_facets(node)`` (the items stored on the node itself) with the
+    already repaired facets of its children, so bounds shrink back once an item is gone.
+    """
+    for node in reversed(path):
+        node.facets = combine_facets([own_facets(node), *(child.facets for child in node.children.values())])
+
+LENGTH_PENALTY = 0.05  # Score lost per character a name is longer than the query (see ObjectSearchTrie._rank_results)
+TIE_TOLERANCE = 1e-9  # Top-list keys closer than this may rank either way once scored
+
 class SearchTrie(GenericTrieInterface):
     """Trie structure for full ingredient names mapping to ingredient summaries."""
-    def __init__(self,max_trie_depth: int = 64, distance_weight: float = 1.0):
+    def __init__(self,max_trie_depth: int = 64, distance_weight: float = 1.0, top_k: int = 50,
+                 usage_weight: float = 0.8):
         super().__init__()
         self.root = TrieNode()
         self.distance_weight = distance_weight  # multiplier for distance in ordering
         self.max_trie_depth = max_trie_depth   # Traversal guard
+        self.top_k = top_k  # Size of the per-node top lists used by bounded prefix search
+        self.usage_weight = usage_weight  # Usage weight of the ranking the top lists are ordered by
+
+    def _top_key(self, node: TrieNode) -> float:
+        """Ordering key for per-node top lists, best first.
+
+        Every name under a prefix node starts with the query, so ObjectSearchTrie's ranking of a
+        prefix match reduces to ``usage_count * usage_weight - LENGTH_PENALTY * len(name)`` plus a
+        term shared by all of them; the lists keep that order, and their first ``limit`` entries
+        are the matches the ranker would keep.
+        """
+        value = node.value
+        return LENGTH_PENALTY * len(normalize(value.name)) - value.usage_count * self.usage_weight
+
+    def _path(self, word: str, root: TrieNode | None = None) -> List[TrieNode] | None:
+        """Returns the nodes from the root down to ``word``, or None if the path does not exist."""
+        node = root or self.root
+        path = [node]
+        for ch in word:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+            path.append(node)
+        return path
+
+    def _top_window(self, entries: List[TrieNode], limit: int, complete: bool) -> List[object] | None:
+        """Values of the first ``limit`` top-list ``entries``, or None if they may not be the ranker's answer.
+
+        ``complete`` tells whether ``entries`` hold every candidate of the subtree. The ranker
+        orders equal scores by traversal order, which the lists do not keep, so a tie inside the
+        window or across its edge sends the caller to the subtree walk; so does a truncated
+        list without an entry past the window to compare with.
+        """
+        window = entries[:limit + 1]
+        if len(window) <= limit and not complete:
+            return None
+        keys = [self._top_key(n) for n in window]
+        if any(b - a < TIE_TOLERANCE for a, b in zip(keys, keys[1:])):
+            return None
+        return [n.value for n in window[:limit]]
+
+    def _promote(self, path: List[TrieNode], terminal: TrieNode):
+        """Places ``terminal`` in the top list of every node on its path after its key changed, either way.
+
+        Nodes are visited bottom-up. A full list whose last entry ends up being ``terminal`` may
+        now rank it below an entry it had displaced, so that node is rebuilt from its children's
+        (already repaired) lists; anywhere else a sort is enough.
+        """
+        key = self._top_key
+        for node in reversed(path):
+            top = node.top
+            if terminal not in top:
+                if len(top) >= self.top_k and key(terminal) >= key(top[-1]):
+                    continue
+                top.append(terminal)
+                self.counters.top_entries += 1
+            top.sort(key=key)
+            if len(top) > self.top_k:
+                self.counters.top_entries -= len(top) - self.top_k
+                del top[self.top_k:]
+            elif len(top) == self.top_k and top[-1] is terminal:
+                self._rebuild_top(node)
+
+    def reposition(self, item: object):
+        """Moves ``item`` within the top lists on its path after its ``usage_count`` was changed from outside."""
+        norm = normalize(item.name)
+        with self._lock:
+            path = self._path(norm)
+            if path is None or path[-1].value is not item:
+                return
+            root = self._writable_root([norm])
+            path = self._path(norm, root)
+            self._promote(path, path[-1])
+            self.root = root
+
+    def _rebuild_top(self, node: TrieNode):
+        """Recomputes a node's top list from its own terminal state and its children's lists."""
+        candidates: List[TrieNode] = []
+        if node.is_end_of_word and node.value is not None:
+            candidates.append(node)
+        for child in node.children.values():
+            candidates.extend(child.top)
+        candidates.sort(key=self._top_key)
+        self.counters.top_entries += min(len(candidates), self.top_k) - len(node.top)
+        node.top = candidates[:self.top_k]
+
+    @staticmethod
+    def _own_facets(node: TrieNode) -> Facets | None:
+        return item_facets(node.value) if node.is_end_of_word and node.value is not None else None
 
     def insert(self, item: object, weight: int = 1):
         """Inserts an item into the trie with an optional weight.
         Args:
             item: The item to insert into the trie.
             weight: The weight to assign to the item (default is 1)."""
+        word = normalize(item.name)
         with self._lock:
             # Full-name trie insert
-            node = self.root
-            word = normalize(item.name)
+            root = self._writable_root([word])
+            node = root
+            path = [node]
             for ch in word:
-                node = node.children.setdefault(ch, TrieNode())
+                child = node.children.get(ch)
+                if child is None:
+                    child = node.children[ch] = TrieNode()
+                    self.counters.nodes += 1
+                node = child
+                path.append(node)
+            if not node.is_end_of_word:
+                self.counters.terminals += 1
             node.is_end_of_word = True
             node.weight += weight
             node.value = item  # Store the whole object
+            self._promote(path, node)
+            _add_facets(path, item)
+            self.generation += 1
+            self.root = root
             return node
     
     def delete(self, item: object):
@@ -154,6 +389,8 @@ class SearchTrie(GenericTrieInterface):
                     if not node.is_end_of_word:
                         return False  # Not found
                     node.is_end_of_word = False
+                    self.counters.terminals -= 1
+                    node.weight = 0  # A re-inserted name starts fresh whether or not the node survives
                     return len(node.children) == 0  # If no children, can delete this node
                 ch = word[depth]
                 child_node = node.children.get(ch)
@@ -162,15 +399,21 @@ class SearchTrie(GenericTrieInterface):
                 should_delete_child = _delete(child_node, word, depth + 1)
                 if should_delete_child:
                     del node.children[ch]
+                    self.counters.nodes -= 1  # Its top list is emptied by the repair below
                     return not node.children and not node.is_end_of_word
                 return False
-            node = self.root
-            for ch in norm:
-                if ch not in node.children:
-                    node = None
-                    break
-                node = node.children[ch]
-            _delete(self.root, norm)
+            root = self._writable_root([norm])
+            path = self._path(norm, root)
+            _delete(root, norm)
+            if path is not None:
+                victim = path[-1]
+                # Bottom-up so every parent merges already-repaired child lists
+                for node in reversed(path):
+                    if victim in node.top:
+                        self._rebuild_top(node)
+                _refresh_facets(path, self._own_facets)
+            self.generation += 1
+            self.root = root
 
     def rename(self, old_item: object, new_item: object):
         """Rename an ingredient by removing old name and inserting new summary.
@@ -183,12 +426,19 @@ class SearchTrie(GenericTrieInterface):
             self.delete(old_item)
             self.insert(new_item)
 
-    def prefix_search(self, prefix: str) -> List[object]:
-        """Returns a list of ingredients whose name starts with the given prefix."""
+    def prefix_search(self, prefix: str, limit: int | None = None,
+                      search_filter: SearchFilter | None = None) -> List[object]:
+        """Returns a list of ingredients whose name starts with the given prefix.
+
+        When ``limit`` fits in the per-node top lists, the best ``limit`` matches are read
+        straight from the prefix node unless ties leave their order open (see
+        :meth:`_top_window`); otherwise the whole subtree is collected. With a
+        ``search_filter`` only matching items are returned (see :meth:`_filtered_prefix`).
+        """
         norm = normalize(prefix)
         if not norm:
             return []
-        with self._lock:
+        with self._read_lock():
             node = self.root
             try:
                 for depth, ch in enumerate(norm):
@@ -202,11 +452,62 @@ class SearchTrie(GenericTrieInterface):
             except Exception as e:
                 logger.error(f"Error in prefix_search traversal: {e}")
                 return []
+            if search_filter is not None:
+                return self._filtered_prefix(node, norm, limit, search_filter)
+            if limit is not None and limit <= self.top_k:
+                found = self._top_window(node.top, limit, len(node.top) < self.top_k)
+                if found is not None:
+                    return found
             results: List[object] = []
             self._dfs(node, norm, results)
             return results
 
-    def _dfs(self, node: TrieNode, prefix: str, results: List[object]):
+    def increment_usage(self, item: object, amount: int = 1):
+        """Increments the usage count (weight) of an item by ``amount`` and refreshes the top lists on its path."""
+        norm = normalize(item.name)
+        with self._lock:
+            root = self._writable_root([norm])
+            path = self._path(norm, root)
+            if path is None or not path[-1].is_end_of_word:
+                return None
+            node = path[-1]
+            node.weight += amount
+            node.value.usage_count = node.weight
+            self._promote(path, node)
+            self.root = root
+            return node.value
+
+    def stats(self) -> Dict[str, object]:
+        counters = self.counters
+        nodes = counters.nodes
+        estimate = {
+            "nodes": nodes * node_bytes(type(self.root)) + (nodes - 1) * EDGE_BYTES,
+            "top_lists": counters.top_entries * REF_BYTES,
+        }
+        return {"nodes": nodes, "names": counters.terminals, "top_entries": counters.top_entries,
+                "bytes": {**estimate, "total": sum(estimate.values())}}
+
+    def _filtered_prefix(self, node: TrieNode, prefix: str, limit: int | None,
+                         search_filter: SearchFilter) -> List[object]:
+        """Matches of ``search_filter`` under the prefix node ``node``.
+
+        The node's top list is tried first: its matching entries, in order, are the best
+        matches of the subtree, so they answer the query when :meth:`_top_window` accepts
+        them. Otherwise the subtree is walked, skipping every
+        child whose facets rule out a match.
+        """
+        if not search_filter.admits(node.facets):
+            return []
+        if limit is not None and limit <= self.top_k:
+            entries = [n for n in node.top if search_filter.matches(n.value)]
+            found = self._top_window(entries, limit, len(node.top) < self.top_k)
+            if found is not None:
+                return found
+        results: List[object] = []
+        self._dfs(node, prefix, results, search_filter)
+        return results
+
+    def _dfs(self, node: TrieNode, prefix: str, results: List[object], search_filter: SearchFilter | None = None):
         """
         Performs a depth-first search (DFS) traversal on the Trie starting from the given node,
         collecting all values corresponding to words that begin with the specified prefix.
@@ -214,72 +515,221 @@ class SearchTrie(GenericTrieInterface):
             node (TrieNode): The current node in the Trie.
             prefix (str): The current prefix formed during traversal.
             results (List): The list to store values of words found during traversal.
+            search_filter (SearchFilter, optional): Keep only matching values and skip subtrees without any.
         Returns:
             None: Results are appended to the provided results list.
         """
         
-        if node.is_end_of_word and node.value is not None:
+        if node.is_end_of_word and node.value is not None and (search_filter is None or search_filter.matches(node.value)):
             results.append(node.value)
         for ch, child in node.children.items():
-            self._dfs(child, prefix + ch, results)
+            if search_filter is None or search_filter.admits(child.facets):
+                self._dfs(child, prefix + ch, results, search_filter)
+
+    def _offer(self, top: TopK, node: TrieNode, dist: int, cap: int) -> int:
+        """Offers a fuzzy match to ``top`` and returns the distance cap for the rest of the walk.
+
+        Once ``top`` is full nothing farther than its worst entry can get in, so the traversal
+        may prune every subtree whose best possible distance exceeds that entry's distance.
+        """
+        if top.push((-dist * self.distance_weight, node.weight), (node, dist)) and self.distance_weight > 0:
+            worst = top.threshold()
+            if worst is not None:
+                cap = min(cap, worst[1][1])
+        return cap
+
+    def _iterative_fuzzy(self, word: str, max_distance: int, top: TopK | None = None,
+                         deadline: Deadline | None = None, search_filter: SearchFilter | None = None) -> List[Dict]:
+        """Iterative fuzzy traversal (Levenshtein) with depth bound.
 
-    def _iterative_fuzzy(self, word: str, max_distance: int) -> List[Dict]:
-        """Iterative fuzzy traversal (Levenshtein) with depth bound & row cache.
+        Returns list of dicts: {"node": TrieNode, "distance": int}, or feeds ``top`` instead
+        (and prunes against it) when one is given. With a ``search_filter`` only matching
+        terminals are reported and subtrees whose facets rule out a match are not entered.
 
-        Returns list of dicts: {"node": TrieNode, "distance": int}
+        The walk keeps one DP row per depth and a stack of child iterators, so an edge costs
+        one in-place row update: no row list, prefix string or stack tuple is built for it.
         """
         results: List[Dict] = []
-        initial_row = list(range(len(word) + 1))
-        # Stack: (node, prefix, prev_row, depth)
-        stack: List[tuple[TrieNode, str, List[int], int]] = [(self.root, "", initial_row, 0)]
-        row_cache: Dict[str, List[int]] = {}
         columns = len(word) + 1
+        rows: List[List[int]] = [list(range(columns))]  # rows[d] belongs to the node at depth d on the path
+        cap = max_distance
+        root = self.root
+        if (root.is_end_of_word and root.value is not None and len(word) <= cap
+                and (search_filter is None or search_filter.matches(root.value))):
+            results.append({"node": root, "distance": len(word)})
+        # Children are visited last to first, the order in which a push/pop stack visits them
+        stack = [reversed(root.children.items())]
         while stack:
-            node, prefix, prev_row, depth = stack.pop()
+            if deadline is not None and deadline.exceeded():
+                break  # Out of time: keep what was found so far
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+            depth = len(stack)
             if depth > self.max_trie_depth:
                 continue
-            if node.is_end_of_word and node.value is not None:
-                dist = prev_row[-1]
-                if dist <= max_distance:
-                    results.append({"node": node, "distance": dist})
-            for char, child in node.children.items():
-                next_prefix = prefix + char
-                cached = row_cache.get(next_prefix)
-                if cached is not None:
-                    current_row = cached
+            char, node = entry
+            if search_filter is not None and not search_filter.admits(node.facets):
+                continue
+            if depth == len(rows):
+                rows.append([0] * columns)
+            row = rows[depth]
+            if fill_row(rows[depth - 1], row, char, word) > cap:
+                continue
+            if (node.is_end_of_word and node.value is not None and row[-1] <= cap
+                    and (search_filter is None or search_filter.matches(node.value))):
+                if top is None:
+                    results.append({"node": node, "distance": row[-1]})
                 else:
-                    current_row = [prev_row[0] + 1]
-                    for col in range(1, columns):
-                        insert_cost = current_row[col - 1] + 1
-                        delete_cost = prev_row[col] + 1
-                        replace_cost = prev_row[col - 1] + (word[col - 1] != char)
-                        current_row.append(min(insert_cost, delete_cost, replace_cost))
-                    row_cache[next_prefix] = current_row
-                if min(current_row) <= max_distance:
-                    stack.append((child, next_prefix, current_row, depth + 1))
+                    cap = self._offer(top, node, row[-1], cap)
+            if node.children:
+                stack.append(reversed(node.children.items()))
         return results
     
-    def fuzzy_search(self, word: str, max_distance: int = 1) -> List[object]:
+    def _automaton_fuzzy(self, word: str, max_distance: int, top: TopK | None = None,
+                         deadline: Deadline | None = None, search_filter: SearchFilter | None = None) -> List[Dict]:
+        """Fuzzy traversal driven by a compiled Levenshtein automaton.
+
+        Same results as :meth:`_iterative_fuzzy`, but each edge is a memoized state transition.
+        """
+        results: List[Dict] = []
+        automaton = LevenshteinAutomaton(word, max_distance)
+        if automaton.start == DEAD_STATE:
+            return results
+        floor = automaton.floor
+        cap = max_distance
+        stack: List[tuple[TrieNode, int, int]] = [(self.root, automaton.start, 0)]
+        while stack:
+            if deadline is not None and deadline.exceeded():
+                break  # Out of time: keep what was found so far
+            node, state, depth = stack.pop()
+            if depth > self.max_trie_depth or floor[state] > cap:
+                continue
+            if (node.is_end_of_word and node.value is not None and automaton.distance[state] <= cap
+                    and (search_filter is None or search_filter.matches(node.value))):
+                if top is None:
+                    results.append({"node": node, "distance": automaton.distance[state]})
+                else:
+                    cap = self._offer(top, node, automaton.distance[state], cap)
+            transitions = automaton.transitions[state]
+            for char, child in node.children.items():
+                if search_filter is not None and not search_filter.admits(child.facets):
+                    continue
+                nxt = transitions.get(char)
+                if nxt is None:
+                    nxt = automaton.step(state, char)
+                if nxt != DEAD_STATE and floor[nxt] <= cap:
+                    stack.append((child, nxt, depth + 1))
+        return results
+
+    def fuzzy_search(self, word: str, max_distance: int = 1, limit: int | None = None,
+                     deadline: Deadline | None = None, search_filter: SearchFilter | None = None) -> List[object]:
         """
         Performs a fuzzy search for the given word within the data structure, returning all words
         that are within the specified maximum edit distance.
         Args:
             word (str): The target word to search for.
             max_distance (int, optional): The maximum allowed edit distance for matches. Defaults to 1.
+            limit (int, optional): Keep only the best ``limit`` matches; the traversal then prunes
+                subtrees that cannot beat the current worst of them. Defaults to all matches.
+            deadline (Deadline, optional): Time budget; when it runs out the matches found so far are returned.
+            search_filter (SearchFilter, optional): Only return matching items; subtrees without one are skipped.
         Returns:
             list: A list of words from the data structure that match the target word within the given edit distance.
         """
         norm = normalize(word)
         if not norm:
             return []
-        with self._lock:
-            raw = self._iterative_fuzzy(norm, max_distance)
+        traverse = self._automaton_fuzzy if self.fuzzy_engine == "automaton" else self._iterative_fuzzy
+        with self._read_lock():
+            if limit is not None:
+                top = TopK(limit)
+                traverse(norm, max_distance, top, deadline, search_filter)
+                return [node.value for node, _ in top.values()]
+            raw = traverse(norm, max_distance, None, deadline, search_filter)
             ordered = sorted(
                 raw,
                 key=lambda x: (x["distance"] * self.distance_weight, -x["node"].weight)
             )
             return [item["node"].value for item in ordered]
 
+    def resume_prefix_search(self, prefix: str, limit: int | None, session: SearchSession) -> List[object]:
+        """:meth:`prefix_search` that continues from the node path ``session`` kept for the previous query."""
+        norm = normalize(prefix)[:self.max_trie_depth]
+        if not norm:
+            return []
+        with self._read_lock(), session.lock:
+            session.sync(self.root, self.generation)
+            path = session.prefix_path
+            keep = min(common_prefix_length(session.prefix_query, norm), len(path) - 1)
+            del path[keep + 1:]
+            node = path[-1]
+            for ch in norm[keep:]:
+                node = node.children.get(ch)
+                if node is None:
+                    break
+                path.append(node)
+            session.prefix_query = norm[:len(path) - 1]
+            if node is None:
+                return []
+            if limit is not None and limit <= self.top_k:
+                found = self._top_window(node.top, limit, len(node.top) < self.top_k)
+                if found is not None:
+                    return found
+            results: List[object] = []
+            self._dfs(node, norm, results)
+            return results
+
+    def resume_fuzzy_search(self, word: str, max_distance: int, session: SearchSession,
+                            limit: int | None = None, deadline: Deadline | None = None) -> List[object]:
+        """:meth:`fuzzy_search` that advances the per-character frontiers ``session`` kept for the previous query.
+
+        Only the characters after the common prefix of the two queries are processed, so typing
+        one more character costs one frontier step instead of a traversal from the root. If
+        ``deadline`` runs out between steps the session keeps the frontiers computed so far
+        (the next keystroke continues from them) and no match is returned. Frontiers that
+        would hold more than FRONTIER_LIMIT entries are dropped and the query is searched
+        afresh, as is every later query extending it.
+        """
+        norm = normalize(word)
+        if not norm:
+            return []
+        with self._read_lock(), session.lock:
+            session.sync(self.root, self.generation)
+            overflow = session.fuzzy_overflow
+            fresh = overflow is not None and overflow[1] == max_distance and norm.startswith(overflow[0])
+            frontiers = session.frontiers
+            keep = 0
+            if session.fuzzy_distance == max_distance:
+                keep = common_prefix_length(session.fuzzy_query, norm)
+            del frontiers[keep + 1:]
+            entries = sum(len(frontier) for frontier in frontiers)
+            for i in range(keep, 0 if fresh else len(norm)):
+                if deadline is not None and deadline.check():
+                    break
+                step = frontier_step(frontiers[-1], norm[i], max_distance)
+                entries += len(step)
+                if entries > FRONTIER_LIMIT:
+                    session.reset_fuzzy((norm[:i + 1], max_distance))
+                    fresh = True
+                    break
+                frontiers.append(step)
+            if not fresh:
+                session.fuzzy_query = norm[:len(frontiers) - 1]
+                session.fuzzy_distance = max_distance
+                if len(frontiers) - 1 < len(norm):
+                    return []
+                matches = frontier_matches(frontiers[-1], max_distance)
+                if limit is not None:
+                    top = TopK(limit)
+                    for node, dist in matches.items():
+                        top.push((-dist * self.distance_weight, node.weight), node)
+                    return [node.value for node in top.values()]
+                ordered = sorted(matches.items(), key=lambda m: (m[1] * self.distance_weight, -m[0].weight))
+                return [node.value for node, _ in ordered]
+        return self.fuzzy_search(word, max_distance, limit, deadline)
+
 class TokenSearchTrie(GenericTrieInterface):
     def __init__(self,max_trie_depth: int = 64, usage_weight: float = 0.8, distance_weight: float = 1.0):
         super().__init__()
@@ -288,56 +738,117 @@ class TokenSearchTrie(GenericTrieInterface):
         self.usage_weight = usage_weight  # Scoring weights (can be tuned externally)
         self.distance_weight = distance_weight  # multiplier for distance in ordering
         self.max_trie_depth = max_trie_depth   # Traversal guard
+        # Optional SymSpell deletion index over the token vocabulary (fuzzy candidate generator)
+        self.deletion_index: DeletionIndex | None = None
 
-    def insert(self, item: object, weight: int = 1):
+    def enable_deletion_index(self, max_distance: int = 2):
+        """Builds the deletion index from the current vocabulary; it is then kept in sync by insert/delete."""
         with self._lock:
-            # Full-name trie insert
-            node = self.root
-            word = normalize(item.name)
+            tokens: List[Tuple[str, Set[int]]] = []
+            self._dfs(self.root, "", tokens)
+            index = DeletionIndex(max_distance)
+            index.rebuild(token for token, _ in tokens)
+            self.deletion_index = index
+
+    def disable_deletion_index(self):
+        with self._lock:
+            self.deletion_index = None
+
+    def _token_node(self, root, token: str):
+        """Returns the terminal node for ``token`` under ``root``, or None."""
+        node = root
+        for ch in token:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node if node.is_end_of_word else None
+
+    def _own_facets(self, node) -> Facets | None:
+        """Facets of the items whose token ends at ``node``."""
+        by_id = self._by_id
+        return combine_facets(item_facets(by_id[i]) for i in node.items or () if i in by_id)
+
+    def insert(self, item: object, weight: int = 1, tokens: Tuple[str, ...] | None = None,
+               terminal: bool = True):
+        """Indexes ``item`` under each of its tokens; the last token's node gets ``weight``.
+
+        ``tokens`` restricts the insert to those of the item's tokens (the sharded layout
+        hands every shard its own); by default all tokens of the name are indexed. With
+        ``terminal`` False the tokens only get postings: their last one is not the name's
+        last token, so its node keeps its weight and value.
+        """
+        tokens = tokenize(item.name) if tokens is None else tokens
+        facets = item_facets(item)
+        with self._lock:
+            root = self._writable_root(tokens)
+            node = root
             self._by_id[item.id] = item
             # Token trie insert
-            for token in filter(None, word.split()):
-                node = self.root
+            counters = self.counters
+            for token in tokens:
+                node = root
                 for ch in token:
-                    node = node.children.setdefault(ch, TokenTrieNode())
+                    child = node.children.get(ch)
+                    if child is None:
+                        child = node.children[ch] = TokenTrieNode()
+                        counters.nodes += 1
+                    node = child
+                    size = len(node.postings)
+                    node.postings = with_id(node.postings, item.id, self.copy_on_write)
+                    counters.postings_resized(size, len(node.postings))
+                    node.facets = widen_facets(node.facets, facets)
                 node.is_end_of_word = True
-                node.items.add(item.id)
-            node.weight += weight
-            node.value = item  # Store the whole objec
+                if not node.items:
+                    counters.terminals += 1
+                    if self.deletion_index is not None:
+                        self.deletion_index.add(token)
+                if item.id not in node.items:
+                    counters.refs += 1
+                    node.items.add(item.id)
+            if terminal:
+                node.weight += weight
+                node.value = item  # Store the whole objec
+            self.generation += 1
+            self.root = root
             return node
 
-    def delete(self, item: object):
+    def delete(self, item: object, tokens: Tuple[str, ...] | None = None):
         """Recursively deletes all tokens of a given item from the token trie.
-        Removes empty nodes to keep the structure clean."""
-        norm = normalize(item.name)
+        Removes empty nodes to keep the structure clean. ``tokens`` works as in :meth:`insert`."""
+        tokens = tokenize(item.name) if tokens is None else tokens
         with self._lock:
-            # Find the ingredient ID (from main trie, optional)
-            victim_id = None
-            node = self.root
-            for ch in norm:
-                if ch not in node.children:
-                    node = None
-                    break
-                node = node.children[ch]
-            if node and node.is_end_of_word and node.value is not None:
-                victim_id = getattr(node.value, "id", None)
-
+            victim_id = getattr(item, "id", None)
+            root = self._writable_root(tokens)
             # Delete each token recursively
-            for token in filter(None, norm.split()):
-                self._delete_token(self.root, token, 0, victim_id)
+            for token in tokens:
+                self._delete_token(root, token, 0, victim_id)
+            self._by_id.pop(victim_id, None)
+            self.generation += 1
+            self.root = root
 
     def _delete_token(self, node:TokenTrieNode, token: str, depth: int, victim_id: int | None) -> bool:
         """
         Recursive helper that deletes a token path.
         Returns True if the current node should be pruned.
         """
+        counters = self.counters
+        if depth > 0 and victim_id is not None:
+            size = len(node.postings)
+            node.postings = without_id(node.postings, victim_id, self.copy_on_write)
+            counters.postings_resized(size, len(node.postings))
         # Base case — reached the end of the token
         if depth == len(token):
             if node.is_end_of_word:
                 if victim_id is not None and victim_id in node.items:
                     node.items.discard(victim_id)
+                    counters.refs -= 1
                 if not node.items:
                     node.is_end_of_word = False
+                    counters.terminals -= 1
+                    if self.deletion_index is not None:
+                        self.deletion_index.remove(token)
+            if depth > 0:
+                _refresh_facets([node], self._own_facets)
             # Return True if this node has no items and no children
             return not node.children and not node.items and not node.is_end_of_word
 
@@ -352,10 +863,33 @@ class TokenSearchTrie(GenericTrieInterface):
         # If the child is empty after recursion, remove it
         if should_delete_child:
             del node.children[ch]
+            counters.node_removed(child)
+        if depth > 0:
+            _refresh_facets([node], self._own_facets)  # Children are already repaired
 
         # Return True if this node is now also empty
         return not node.children and not node.items and not node.is_end_of_word
 
+    def stats(self) -> Dict[str, object]:
+        counters = self.counters
+        nodes = counters.nodes
+        index = self.deletion_index
+        estimate = {
+            "nodes": nodes * node_bytes(type(self.root)) + (nodes - 1) * EDGE_BYTES,
+            "postings": counters.posting_lists * ARRAY_BYTES + counters.postings * REF_BYTES,
+            # Layouts that allocate a set on every node already count it with the node
+            "item_sets": (0 if isinstance(self.root.items, set) else counters.terminals * SET_BYTES)
+                         + counters.refs * SET_ENTRY_BYTES,
+            "id_map": sys.getsizeof(self._by_id),
+        }
+        if index is not None:
+            estimate["deletion_index"] = index.estimated_bytes()
+        return {"nodes": nodes, "vocabulary": counters.terminals, "items": len(self._by_id),
+                "item_refs": counters.refs, "postings": counters.postings, "posting_lists": counters.posting_lists,
+                "posting_sizes": counters.posting_sizes(),
+                "deletion_index": None if index is None else {"tokens": len(index), "variants": index.variant_count},
+                "bytes": {**estimate, "total": sum(estimate.values())}}
+
     def rename(self, old_item: object, new_item: object):
         """Rename an ingredient by removing old item and inserting new summary.
 
@@ -376,81 +910,145 @@ class TokenSearchTrie(GenericTrieInterface):
         for ch, child in node.children.items():
             self._dfs(child, prefix + ch, results)     
     
+    def _prefix_node(self, root, prefix: str):
+        """Returns the node whose subtree holds every token starting with ``prefix``, or None."""
+        node = root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
     def prefix_search(self, prefix: str) -> List[object]:
         """Performs prefix search across all tokens in the trie.
             Returns ingredient objects whose tokens start with the given prefix."""
         norm_prefix = normalize(prefix)
-        results: List[Tuple[str, Set[int]]] = []
-        node = self.root
-
-        # Traverse down to the node representing the prefix
-        for ch in norm_prefix:
-            if ch not in node.children:
+        if not norm_prefix:
+            return []
+        with self._read_lock():
+            node = self._prefix_node(self.root, norm_prefix)
+            if node is None:
                 return []  # no match
-            node = node.children[ch]
-
-        # Collect tokens and associated ingredient IDs
-        self._dfs(node, norm_prefix, results)
-
-        # Deduplicate ingredient IDs (tokens might map to same ingredient)
-        found_ids: Set[int] = set()
-        found_objects: List[object] = []
-        for _, ids in results:
-            for i in ids:
-                if i not in found_ids:
-                    found_ids.add(i)
-                    obj = self._by_id.get(i)
-                    if obj:
-                        found_objects.append(obj)
-
-        return found_objects
+            # The prefix node's posting list already holds every id in its subtree, once each
+            found = (self._by_id.get(i) for i in node.postings)
+            return [obj for obj in found if obj is not None]
     
-    def multi_token_prefix_search(self, query: str) -> List[object]:
+    def multi_token_prefix_search(self, query: str, limit: int | None = None,
+                                  search_filter: SearchFilter | None = None) -> List[object]:
         """Multi-token prefix search — all tokens in the query must match as prefixes
-            in some ingredient tokens (not necessarily in order)."""
-        tokens = [t for t in normalize(query).split() if t]
+            in some ingredient tokens (not necessarily in order).
+
+        Intersects the posting lists of the query tokens' prefix nodes, smallest first, and
+        stops after ``limit`` matches when one is given (matches then come in id order).
+        With a ``search_filter`` nothing is intersected unless every prefix node's facets
+        admit a match, and only matching items are kept.
+        """
+        tokens = tokenize(query)
         if not tokens:
             return []
 
-        with self._lock:
-            candidate_sets = []
+        with self._read_lock():
+            root = self.root
+            postings = []
             for token in tokens:
-                token_matches = {obj.id for obj in self.prefix_search(token)}
-                candidate_sets.append(token_matches)
-                if not token_matches:
+                node = self._prefix_node(root, token)
+                if node is None or not node.postings:
                     return []
+                if search_filter is not None and not search_filter.admits(node.facets):
+                    return []
+                postings.append(node.postings)
 
             # Intersection — all tokens must be found
-            common_ids = set.intersection(*candidate_sets)
-            return [self._by_id[i] for i in common_ids if i in self._by_id]
+            return resolve_postings(postings, self._by_id, limit, search_filter)
     
     # ---------------- Token-level fuzzy search -----------------
-    def _token_iterative_fuzzy(self, token: str, max_distance: int, per_token_limit: int) -> List[Tuple[str, Set[int], int]]:
-        """Fuzzy search a single token against token trie; returns (matched_token, items, distance)."""
+    def _token_iterative_fuzzy(self, token: str, max_distance: int, per_token_limit: int,
+                               deadline: Deadline | None = None,
+                               search_filter: SearchFilter | None = None) -> List[Tuple[str, Set[int], int]]:
+        """Fuzzy search a single token against token trie; returns (matched_token, items, distance).
+
+        Same per-depth row buffers as :meth:`SearchTrie._iterative_fuzzy`; the matched token is
+        joined from the path characters only when a terminal is reported. A ``search_filter``
+        skips subtrees without a matching item; the items of a reported token are not filtered.
+        """
         results: List[Tuple[str, Set[int], int]] = []
-        initial_row = list(range(len(token) + 1))
-        stack: List[tuple[TokenTrieNode, str, List[int], int]] = [(self.root, "", initial_row, 0)]
         columns = len(token) + 1
+        rows: List[List[int]] = [list(range(columns))]
+        chars: List[str] = []  # chars[d - 1] is the character leading to the node at depth d
+        stack = [reversed(self.root.children.items())]
         while stack and len(results) < per_token_limit:
-            node, prefix, prev_row, depth = stack.pop()
+            if deadline is not None and deadline.exceeded():
+                break  # Out of time: keep what was found so far
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+            depth = len(stack)
             if depth > self.max_trie_depth:
                 continue
-            if node.is_end_of_word and node.items:
-                dist = prev_row[-1]
-                if dist <= max_distance:
-                    results.append((prefix, node.items.copy(), dist))
+            char, node = entry
+            if search_filter is not None and not search_filter.admits(node.facets):
+                continue
+            if depth == len(rows):
+                rows.append([0] * columns)
+                chars.append(char)
+            row = rows[depth]
+            chars[depth - 1] = char
+            if fill_row(rows[depth - 1], row, char, token) > max_distance:
+                continue
+            if node.is_end_of_word and node.items and row[-1] <= max_distance:
+                results.append(("".join(chars[:depth]), node.items.copy(), row[-1]))
+            if node.children:
+                stack.append(reversed(node.children.items()))
+        return results
+
+    def _token_automaton_fuzzy(self, token: str, max_distance: int, per_token_limit: int,
+                               deadline: Deadline | None = None,
+                               search_filter: SearchFilter | None = None) -> List[Tuple[str, Set[int], int]]:
+        """Automaton-driven counterpart of :meth:`_token_iterative_fuzzy` with identical results."""
+        results: List[Tuple[str, Set[int], int]] = []
+        automaton = LevenshteinAutomaton(token, max_distance)
+        if automaton.start == DEAD_STATE:
+            return results
+        stack: List[tuple[TokenTrieNode, str, int, int]] = [(self.root, "", automaton.start, 0)]
+        while stack and len(results) < per_token_limit:
+            if deadline is not None and deadline.exceeded():
+                break  # Out of time: keep what was found so far
+            node, prefix, state, depth = stack.pop()
+            if depth > self.max_trie_depth:
+                continue
+            if node.is_end_of_word and node.items and automaton.distance[state] <= max_distance:
+                results.append((prefix, node.items.copy(), automaton.distance[state]))
+            transitions = automaton.transitions[state]
             for char, child in node.children.items():
-                current_row = [prev_row[0] + 1]
-                for col in range(1, columns):
-                    insert_cost = current_row[col - 1] + 1
-                    delete_cost = prev_row[col] + 1
-                    replace_cost = prev_row[col - 1] + (token[col - 1] != char)
-                    current_row.append(min(insert_cost, delete_cost, replace_cost))
-                if min(current_row) <= max_distance:
-                    stack.append((child, prefix + char, current_row, depth + 1))
+                if search_filter is not None and not search_filter.admits(child.facets):
+                    continue
+                nxt = transitions.get(char)
+                if nxt is None:
+                    nxt = automaton.step(state, char)
+                if nxt != DEAD_STATE:
+                    stack.append((child, prefix + char, nxt, depth + 1))
+        return results
+
+    def _token_deletion_fuzzy(self, token: str, max_distance: int, per_token_limit: int,
+                              deadline: Deadline | None = None,
+                              search_filter: SearchFilter | None = None) -> List[Tuple[str, Set[int], int]]:
+        """Candidate generation through the deletion index: hash probes instead of a trie walk."""
+        index = self.deletion_index
+        root = self.root
+        results: List[Tuple[str, Set[int], int]] = []
+        for matched, dist in index.lookup(token, max_distance):
+            if deadline is not None and deadline.exceeded():
+                break
+            node = self._token_node(root, matched)
+            if node is not None and node.items and (search_filter is None or search_filter.admits(node.facets)):
+                results.append((matched, node.items.copy(), dist))
+                if len(results) >= per_token_limit:
+                    break
         return results
 
-    def fuzzy_search(self, query: str, token_max_distance: int = 2) -> List[object]:
+    def fuzzy_search(self, query: str, token_max_distance: int = 2, limit: int | None = None,
+                     deadline: Deadline | None = None, search_filter: SearchFilter | None = None) -> List[object]:
         """Match multi-word queries allowing missing words in candidate or query.
 
         Strategy:
@@ -461,108 +1059,308 @@ class TokenSearchTrie(GenericTrieInterface):
               - sum of distances
               - usage weight
           * Allow one missing query token (flexible middle omission)
+          * Keep the best ``limit`` ingredients in a bounded heap (all of them, sorted, without one)
+          * Stop once ``deadline`` runs out and return the best of what was scored by then
+          * With a ``search_filter``, skip token subtrees without a match and non-matching items
         """
-        norm_query = normalize(query)
-        query_tokens = [t for t in norm_query.split() if t]
-        with self._lock:
-            ingredient_stats: Dict[int, Dict[str, float]] = {}
-            for qt in query_tokens:
-                matches = self._token_iterative_fuzzy(qt, token_max_distance, per_token_limit=200)
-                for matched_token, items, dist in matches:
-                    for ing_id in items:
-                        ing_obj = self._by_id.get(ing_id)
-                        if not ing_obj:
-                            continue
-                        data = ingredient_stats.setdefault(ing_id, {"obj": ing_obj, "tokens": 0, "distance_sum": 0.0})
-                        data["tokens"] += 1
-                        data["distance_sum"] += dist
-            # Scoring & filtering
-            needed = max(1, len(query_tokens) - 1)  # allow one miss
-            scored: List[Tuple[float, object]] = []
-            for rec in ingredient_stats.values():
-                matched_tokens = rec["tokens"]
-                if matched_tokens < needed:
+        query_tokens = tokenize(query)
+        with self._read_lock():
+            token_fuzzy = self._token_fuzzy_engine(token_max_distance)
+            matches = lambda qt: token_fuzzy(qt, token_max_distance, TOKEN_MATCH_LIMIT, deadline, search_filter)
+            return score_token_matches(query_tokens, matches, self._by_id, self.usage_weight, self.distance_weight,
+                                       limit, deadline, search_filter)
+
+    def _token_fuzzy_engine(self, token_max_distance: int):
+        """The single-token fuzzy matcher for this distance: deletion index, automaton or DP walk."""
+        index = self.deletion_index
+        if index is not None and token_max_distance <= index.max_distance:
+            return self._token_deletion_fuzzy
+        if self.fuzzy_engine == "automaton":
+            return self._token_automaton_fuzzy
+        return self._token_iterative_fuzzy
+
+TOKEN_MATCH_LIMIT = 200  # Matched tokens considered per query token in multi-token fuzzy search
+
+def resolve_postings(postings: List, by_id: Dict[int, object], limit: int | None = None,
+                     search_filter: SearchFilter | None = None) -> List[object]:
+    """Objects whose ids are in every posting list, in id order; at most ``limit``, matching ``search_filter``."""
+    if search_filter is None:
+        found = (by_id.get(i) for i in intersect(postings, limit))
+        return [obj for obj in found if obj is not None]
+    matched: List[object] = []
+    for i in intersect(postings):
+        obj = by_id.get(i)
+        if obj is not None and search_filter.matches(obj):
+            matched.append(obj)
+            if limit is not None and len(matched) >= limit:
+                break
+    return matched
+
+def score_token_matches(query_tokens: Tuple[str, ...], token_matches, by_id: Dict[int, object], usage_weight: float,
+                        distance_weight: float, limit: int | None = None, deadline: Deadline | None = None,
+                        search_filter: SearchFilter | None = None) -> List[object]:
+    """Ranks the objects matched by the query tokens (see :meth:`TokenSearchTrie.fuzzy_search`).
+
+    ``token_matches(query_token)`` returns the (matched token, item ids, distance) triples of
+    one query token; ids are resolved through ``by_id``.
+    """
+    ingredient_stats: Dict[int, Dict[str, float]] = {}
+    for qt in query_tokens:
+        if deadline is not None and deadline.check():
+            break
+        for matched_token, items, dist in token_matches(qt):
+            for ing_id in items:
+                if deadline is not None and deadline.exceeded():
+                    break
+                ing_obj = by_id.get(ing_id)
+                if not ing_obj or (search_filter is not None and not search_filter.matches(ing_obj)):
                     continue
-                ing: object = rec["obj"]
-                coverage = matched_tokens / len(query_tokens)
-                avg_distance = rec["distance_sum"] / matched_tokens if matched_tokens else 99
-                # Base score: coverage heavy, penalize distance, add usage
-                score = (coverage * 3.0) - (avg_distance * self.distance_weight) + (ing.usage_count * self.usage_weight * 0.5)
-                scored.append((score, ing))
-            scored.sort(key=lambda x: x[0], reverse=True)
-            return [ing for _, ing in scored]
+                data = ingredient_stats.setdefault(ing_id, {"obj": ing_obj, "tokens": 0, "distance_sum": 0.0})
+                data["tokens"] += 1
+                data["distance_sum"] += dist
+    # Scoring & filtering
+    needed = max(1, len(query_tokens) - 1)  # allow one miss
+    top = TopK(limit) if limit is not None else None
+    scored: List[Tuple[Tuple[float, int], object]] = []
+    for ing_id, rec in ingredient_stats.items():
+        if deadline is not None and deadline.exceeded():
+            break
+        matched_tokens = rec["tokens"]
+        if matched_tokens < needed:
+            continue
+        ing: object = rec["obj"]
+        coverage = matched_tokens / len(query_tokens)
+        avg_distance = rec["distance_sum"] / matched_tokens if matched_tokens else 99
+        # Base score: coverage heavy, penalize distance, add usage
+        score = (coverage * 3.0) - (avg_distance * distance_weight) + (ing.usage_count * usage_weight * 0.5)
+        # Equal scores go to the lower id, not to the first seen: the order candidates arrive in
+        # differs between the trie walk, the deletion index and the shards
+        if top is not None:
+            top.push((score, -ing_id), ing)
+        else:
+            scored.append(((score, -ing_id), ing))
+    if top is not None:
+        return top.values()
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [ing for _, ing in scored]
 
 class ObjectSearchTrie:
-    def __init__(self, max_trie_depth: int = 64, usage_weight: float = 0.8, prefix_boost_weight: float = 0.2, distance_weight: float = 1.0):
-        self.prefix_trie = SearchTrie(max_trie_depth, distance_weight)
-        self.token_trie = TokenSearchTrie(max_trie_depth, usage_weight, distance_weight)
+    def __init__(self, max_trie_depth: int = 64, usage_weight: float = 0.8, prefix_boost_weight: float = 0.2, distance_weight: float = 1.0,
+                 top_k: int = 50, prefix_trie: GenericTrieInterface | None = None, token_trie: GenericTrieInterface | None = None,
+                 fuzzy_engine: str = "dp", snapshot_reads: bool = False, deletion_index: bool = False):
+        # Alternative layouts (e.g. the radix tries) can be injected in place of the default dict tries
+        self.prefix_trie = prefix_trie or SearchTrie(max_trie_depth, distance_weight, top_k)
+        self.token_trie = token_trie or TokenSearchTrie(max_trie_depth, usage_weight, distance_weight)
+        self.prefix_trie.usage_weight = usage_weight  # Orders its top lists like _rank_results
+        self.set_fuzzy_engine(fuzzy_engine)
+        self.set_snapshot_reads(snapshot_reads)
+        if deletion_index:
+            self.set_deletion_index(True)
         self.usage_weight = usage_weight  # Scoring weights (can be tuned externally)
         self.prefix_boost_weight = prefix_boost_weight
         self.distance_weight = distance_weight  # multiplier for distance in ordering
+        # id -> (normalized name, tokens), computed once at insert so ranking never renormalizes
+        self._keys: Dict[int, Tuple[str, Tuple[str, ...]]] = {}
+
+    def set_fuzzy_engine(self, engine: str):
+        """Selects the fuzzy matcher for both tries: "dp" or "automaton"."""
+        if engine not in ("dp", "automaton"):
+            raise ValueError(f"Unknown fuzzy engine: {engine}")
+        self.fuzzy_engine = engine
+        self.prefix_trie.fuzzy_engine = engine
+        self.token_trie.fuzzy_engine = engine
+
+    def set_snapshot_reads(self, enabled: bool):
+        """Switches both tries between lock-guarded reads and copy-on-write snapshot reads."""
+        for trie in (self.prefix_trie, self.token_trie):
+            with trie._lock:
+                trie.snapshot_reads = enabled
+        self.snapshot_reads = enabled
+
+    def set_deletion_index(self, enabled: bool, max_distance: int = 2):
+        """Turns the token deletion index (multi-token fuzzy candidate generator) on or off."""
+        if enabled:
+            self.token_trie.enable_deletion_index(max_distance)
+        else:
+            self.token_trie.disable_deletion_index()
 
     def insert(self, item: object, weight = 1):
         prefix_node = self.prefix_trie.insert(item, weight)
         token_node = self.token_trie.insert(item, weight)
-        item.usage_count = max(prefix_node.weight,token_node.weight)
+        usage = max(prefix_node.weight,token_node.weight)
+        if usage != item.usage_count:
+            item.usage_count = usage
+            self.prefix_trie.reposition(item)  # The top lists are ordered by usage_count
+        self._keys[item.id] = (normalize(item.name), tokenize(item.name))
     
     def delete(self, item: object):
         self.prefix_trie.delete(item)
         self.token_trie.delete(item)
+        self._keys.pop(item.id, None)
 
     def rename(self, old_item: object, new_item: object):
         self.prefix_trie.rename(old_item, new_item)
         self.token_trie.rename(old_item, new_item)
+        self._keys.pop(old_item.id, None)
+        self._keys[new_item.id] = (normalize(new_item.name), tokenize(new_item.name))
 
-    def prefix_search(self, prefix: str, limit: int = 50) -> List[object]:
-        results = self.prefix_trie.prefix_search(prefix)
-        ranked = self._rank_results(results, normalize(prefix))
-        return ranked[:limit]
+    def get(self, item_id: int) -> object | None:
+        """Returns the indexed object with ``item_id``, or None if it is not in the trie."""
+        return self.token_trie._by_id.get(item_id)
+
+    def weights(self) -> Dict[int, int]:
+        """Id -> usage weight of every item's name in the prefix trie, collected in one walk.
+
+        Unlike ``item.usage_count``, which may carry the weight of a token shared with other
+        items, this is the item's own count: its insert weight plus its increments.
+        """
+        weights = {}
+        for trie in getattr(self.prefix_trie, "shards", (self.prefix_trie,)):
+            with trie._read_lock():
+                stack = [trie.root]
+                while stack:
+                    node = stack.pop()
+                    if node.is_end_of_word and node.value is not None:
+                        weights[node.value.id] = node.weight
+                    stack.extend(node.children.values())
+        return weights
+
+    def item_ids(self) -> List[int]:
+        """Ids of every indexed object."""
+        return list(self._keys)
+
+    def save_snapshot(self, path: str, version: object = None, writers=None) -> int:
+        """Writes both tries to a binary snapshot file (see resources.core.snapshot); returns its size."""
+        return save_snapshot(self, path, version, writers)
+
+    def load_snapshot(self, path: str, item_factory) -> object:
+        """Replaces the index with the snapshot at ``path`` and returns the version it was stamped with."""
+        return load_snapshot(self, path, item_factory)
+
+    # A ``search_filter`` (resources.core.facets) is evaluated inside the trie traversals, which
+    # skip every subtree whose facets rule out a match. Session state is kept for unfiltered
+    # walks, so filtered searches run afresh.
+    def prefix_search(self, prefix: str, limit: int = 50, session: SearchSession | None = None,
+                      search_filter: SearchFilter | None = None) -> List[object]:
+        if session is not None and search_filter is None:
+            results = self.prefix_trie.resume_prefix_search(prefix, limit, session)
+        else:
+            results = self.prefix_trie.prefix_search(prefix, limit, search_filter)
+        return self._rank_results(results, normalize(prefix), limit)
     
-    def multi_token_prefix_search(self, query: str,limit: int = 50) -> List[object]:
-        query_tokens = [t for t in query.split() if t]
+    def multi_token_prefix_search(self, query: str,limit: int = 50, session: SearchSession | None = None,
+                                  search_filter: SearchFilter | None = None) -> List[object]:
+        query_tokens = tokenize(query)
         if len(query_tokens) <= 1:
-            return self.prefix_trie.prefix_search(query_tokens[0] if query_tokens else query_tokens)
-        results = self.token_trie.multi_token_prefix_search(query)
-        ranked = self._rank_results(results, normalize(query))
-        return ranked[:limit]
+            if not query_tokens:
+                return []
+            return self.prefix_search(query_tokens[0], limit, session, search_filter)
+        results = self.token_trie.multi_token_prefix_search(query, search_filter=search_filter)
+        return self._rank_results(results, normalize(query), limit)
     
-    def fuzzy_search(self, word: str, max_distance: int = 1, limit: int = 50) -> List[object]:
-        results = self.prefix_trie.fuzzy_search(word, max_distance)
-        return results[:limit]
+    def fuzzy_search(self, word: str, max_distance: int = 1, limit: int = 50, session: SearchSession | None = None,
+                     deadline: Deadline | None = None, search_filter: SearchFilter | None = None) -> List[object]:
+        if session is not None and search_filter is None:
+            return self.prefix_trie.resume_fuzzy_search(word, max_distance, session, limit, deadline)
+        return self.prefix_trie.fuzzy_search(word, max_distance, limit, deadline, search_filter)
     
-    def multi_token_fuzzy_search(self, query: str, limit: int = 50, token_max_distance: int = 2) -> List[object]:
-        query_tokens = [t for t in query.split() if t]
+    def multi_token_fuzzy_search(self, query: str, limit: int = 50, token_max_distance: int = 2,
+                                 session: SearchSession | None = None, deadline: Deadline | None = None,
+                                 search_filter: SearchFilter | None = None) -> List[object]:
+        query_tokens = tokenize(query)
         if len(query_tokens) <= 1:
-            return self.prefix_trie.fuzzy_search(query_tokens[0] if query_tokens else query_tokens,token_max_distance)[:limit]
-        result = self.token_trie.fuzzy_search(query, token_max_distance)
-        return result[:limit]
+            return self.fuzzy_search(query_tokens[0] if query_tokens else "", token_max_distance, limit, session, deadline,
+                                     search_filter)
+        return self.token_trie.fuzzy_search(query, token_max_distance, limit, deadline, search_filter)
     
-    def smart_search(self, query, max_distance=2, limit=50):
-        norm = normalize(query)
-        prefix_results = self.multi_token_prefix_search(norm, limit)
-        token_results = []
+    def smart_search(self, query, max_distance=2, limit=50, session: SearchSession | None = None,
+                     stages: List[str] | None = None, deadline: Deadline | None = None,
+                     search_filter: SearchFilter | None = None):
+        """Prefix matches first; the fuzzy stage only runs when they leave free slots.
 
-        if len(prefix_results) < limit:
-            token_results = self.multi_token_fuzzy_search(norm, limit=limit, token_max_distance=max_distance)
+        The prefix stage returns its best ``limit`` matches already ranked. When they fill the
+        page, or every indexed item is already a prefix match, fuzzy generation and the merge
+        ranking are both skipped. Otherwise the fuzzy stage runs unbounded by the prefix
+        scores: it picks its ``limit`` best matches by its own token score, and the union of
+        both stages is ranked. The name of each stage that ran ("prefix", "fuzzy") is appended
+        to ``stages`` when a list is given. A ``deadline`` that has run out after the prefix
+        stage skips the fuzzy stage; one that runs out during it keeps the fuzzy matches found
+        so far. Both stages apply ``search_filter``.
+        """
+        norm = normalize(query)
+        prefix_results = self.multi_token_prefix_search(norm, limit, session, search_filter)
+        if stages is not None:
+            stages.append("prefix")
+        if len(prefix_results) >= limit or len(prefix_results) >= len(self._keys):
+            tokens = tokenize(norm)
+            if len(tokens) > 1 or tokens == (norm,):
+                return prefix_results  # Already ranked against ``norm``
+            return self._rank_results(prefix_results, norm, limit)
+        if deadline is not None and deadline.check():
+            return prefix_results
 
+        token_results = self.multi_token_fuzzy_search(norm, limit=limit, token_max_distance=max_distance, session=session,
+                                                      deadline=deadline, search_filter=search_filter)
+        if stages is not None:
+            stages.append("fuzzy")
         combined = {r.id: r for r in (*prefix_results, *token_results)}
-        ranked = self._rank_results(list(combined.values()), norm)
-        return ranked[:limit]
+        return self._rank_results(list(combined.values()), norm, limit)
+
+    def _rank_results(self, results: List[object], query: str, limit: int | None = None) -> List[object]:
+        """Orders ``results`` by score, best first, keeping only the best ``limit`` when given.
 
-    def _rank_results(self, results: List[object], query: str) -> List[object]:
+        With a limit the candidates go through a bounded heap, and once it is full a candidate
+        whose score cannot beat the current worst even with the prefix bonus and no length
+        penalty is skipped before its name is looked at.
+        """
         qlen = len(query)
+        keys = self._keys
         def score(item: object) -> float:
-            name = normalize(item.name)
+            key = keys.get(item.id)
+            name = key[0] if key is not None else normalize(item.name)
             prefix_bonus = 1.5 if name.startswith(query) else 1.0
-            length_penalty = abs(len(name) - qlen) * 0.05
+            length_penalty = abs(len(name) - qlen) * LENGTH_PENALTY
             return (item.usage_count * self.usage_weight +
                     prefix_bonus * self.prefix_boost_weight -
                     length_penalty)
-        return sorted(results, key=score, reverse=True)
+        if limit is None:
+            return sorted(results, key=score, reverse=True)
+        top = TopK(limit)
+        best_bonus = max(1.5 * self.prefix_boost_weight, self.prefix_boost_weight)
+        worst = None
+        for item in results:
+            if worst is not None and item.usage_count * self.usage_weight + best_bonus <= worst:
+                continue  # Upper bound already loses to the current k-th score
+            if top.push(score(item), item):
+                threshold = top.threshold()
+                worst = threshold[0] if threshold is not None else None
+        return top.values()
     
-    def increment_usage(self, item: object):
-        self.prefix_trie.increment_usage(item)
-        self.token_trie.increment_usage(item)
+    def increment_usage(self, item: object, amount: int = 1):
+        self.prefix_trie.increment_usage(item, amount)
+        changed = self.token_trie.increment_usage(item, amount)
+        if changed is not None:
+            self.prefix_trie.reposition(changed)  # Its usage_count now carries the token's weight
+
+    def stats(self) -> Dict[str, object]:
+        """Sizes of both tries and estimated bytes per structure, read from counters in constant time.
+
+        Byte figures are estimates built from per-object sizes measured on this interpreter
+        (items and keys are costed from one sample each); they are meant for capacity
+        planning, not exact accounting.
+        """
+        prefix, token = self.prefix_trie.stats(), self.token_trie.stats()
+        keys = self._keys
+        sample_id = next(iter(keys), None)
+        sample = self.get(sample_id) if sample_id is not None else None
+        estimate = {
+            "prefix_trie": prefix["bytes"]["total"],
+            "token_trie": token["bytes"]["total"],
+            "keys": sys.getsizeof(keys) + (len(keys) * shallow_bytes(keys[sample_id]) if sample_id is not None else 0),
+            "items": len(keys) * shallow_bytes(sample) if sample is not None else 0,
+        }
+        return {"items": len(keys), "prefix_trie": prefix, "token_trie": token,
+                "bytes": {**estimate, "total": sum(estimate.values())}}
 
     def get_depth(self) -> int:
         return max(self.prefix_trie.get_depth(), self.token_trie.get_depth())
@@ -0,0 +1,298 @@
+from __future__ import annotations
+from contextlib import nullcontext
+import sys
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+from resources.core.deadline import Deadline
+from resources.core.facets import SearchFilter
+from resources.core.search_engine import (TOKEN_MATCH_LIMIT, GenericTrieInterface, TokenSearchTrie, normalize,
+                                          resolve_postings, score_token_matches, tokenize)
+from resources.core.topk import TopK
+
+# Sharded layouts split a trie into independent tries, each with its own lock. Names (prefix
+# trie) and tokens (token trie) are routed by their first normalized character, so everything
+# below one first character lives in one shard: inserts, deletes and prefix lookups only take
+# that shard's lock, and a bulk load of "m…" names never waits for, or holds up, searches for
+# "p…". Fuzzy matching may change the first character, so fuzzy searches visit every shard
+# (one lock at a time) and merge. They plug into ObjectSearchTrie like the radix layout does:
+#
+#     ObjectSearchTrie(prefix_trie=ShardedSearchTrie.create(8, SearchTrie),
+#                      token_trie=ShardedTokenSearchTrie.create(8, TokenSearchTrie))
+
+def shard_of(word: str, shards: int) -> int:
+    """Index of the shard holding ``word`` (a normalized name or token)."""
+    return ord(word[0]) % shards if word else 0
+
+class ShardLocks:
+    """Holds the write locks of several shards, always acquired in shard order so two holders never deadlock."""
+    def __init__(self, tries: Sequence[GenericTrieInterface]):
+        self.tries = tries
+
+    def __enter__(self):
+        for trie in self.tries:
+            trie._lock.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        for trie in reversed(self.tries):
+            trie._lock.release()
+
+def _sum_stats(parts: List[Dict]) -> Dict:
+    """Per-shard statistics added up key by key (nested dicts recursively, None where every shard has None)."""
+    merged: Dict = {}
+    for key in dict.fromkeys(key for part in parts for key in part):
+        values = [part[key] for part in parts if part.get(key) is not None]
+        if not values:
+            merged[key] = None
+        elif isinstance(values[0], dict):
+            merged[key] = _sum_stats(values)
+        else:
+            merged[key] = sum(values)
+    return merged
+
+class _ShardedTrie:
+    """Fan-out over ``shards`` tries of one layout; shared by the prefix and token variants."""
+    def __init__(self, shards: Sequence[GenericTrieInterface]):
+        if not shards:
+            raise ValueError("a sharded trie needs at least one shard")
+        self.shards = list(shards)
+
+    @classmethod
+    def create(cls, count: int, factory: Callable[[], GenericTrieInterface]):
+        """A sharded trie of ``count`` shards, each made by ``factory``."""
+        return cls([factory() for _ in range(count)])
+
+    def _shard(self, word: str) -> GenericTrieInterface:
+        return self.shards[shard_of(word, len(self.shards))]
+
+    def _locks(self, words: Iterable[str]) -> ShardLocks:
+        """The locks of the shards holding ``words``."""
+        indices = sorted({shard_of(word, len(self.shards)) for word in words})
+        return ShardLocks([self.shards[i] for i in indices])
+
+    @property
+    def _lock(self) -> ShardLocks:
+        """Every shard's lock, for changes to the whole trie (e.g. switching the read mode)."""
+        return ShardLocks(self.shards)
+
+    def _read_lock(self):
+        return nullcontext() if self.snapshot_reads else self._lock
+
+    @property
+    def fuzzy_engine(self) -> str:
+        return self.shards[0].fuzzy_engine
+
+    @fuzzy_engine.setter
+    def fuzzy_engine(self, engine: str):
+        for shard in self.shards:
+            shard.fuzzy_engine = engine
+
+    @property
+    def snapshot_reads(self) -> bool:
+        return self.shards[0].snapshot_reads
+
+    @snapshot_reads.setter
+    def snapshot_reads(self, enabled: bool):
+        for shard in self.shards:
+            shard.snapshot_reads = enabled
+
+    @property
+    def usage_weight(self) -> float:
+        return self.shards[0].usage_weight
+
+    @usage_weight.setter
+    def usage_weight(self, weight: float):
+        for shard in self.shards:
+            shard.usage_weight = weight
+
+    @property
+    def generation(self) -> int:
+        return sum(shard.generation for shard in self.shards)
+
+    @property
+    def max_trie_depth(self) -> int:
+        return self.shards[0].max_trie_depth
+
+    def node_count(self) -> int:
+        return sum(shard.node_count() for shard in self.shards)
+
+    def get_depth(self) -> int:
+        return max(shard.get_depth() for shard in self.shards)
+
+    def increment_usage(self, item: object, amount: int = 1) -> object | None:
+        return self._shard(normalize(item.name)).increment_usage(item, amount)
+
+    def print_tree_inlog_file(self):
+        for shard in self.shards:
+            shard.print_tree_inlog_file()
+
+    def stats(self) -> Dict[str, object]:
+        parts = [shard.stats() for shard in self.shards]
+        return {**_sum_stats(parts), "shards": [part["nodes"] for part in parts]}
+
+class ShardedSearchTrie(_ShardedTrie):
+    """:class:`SearchTrie` API over shards routed by the first character of the name."""
+    def insert(self, item: object, weight: int = 1):
+        return self._shard(normalize(item.name)).insert(item, weight)
+
+    def delete(self, item: object):
+        self._shard(normalize(item.name)).delete(item)
+
+    def reposition(self, item: object):
+        self._shard(normalize(item.name)).reposition(item)
+
+    def rename(self, old_item: object, new_item: object):
+        with self._locks((normalize(old_item.name), normalize(new_item.name))):
+            self.delete(old_item)
+            self.insert(new_item)
+
+    def prefix_search(self, prefix: str, limit: int | None = None,
+                      search_filter: SearchFilter | None = None) -> List[object]:
+        norm = normalize(prefix)
+        if not norm:
+            return []
+        return self._shard(norm).prefix_search(prefix, limit, search_filter)
+
+    def resume_prefix_search(self, prefix: str, limit: int | None, session) -> List[object]:
+        # The session follows the shard's root, so a query that changes shard starts over
+        norm = normalize(prefix)
+        if not norm:
+            return []
+        return self._shard(norm).resume_prefix_search(prefix, limit, session)
+
+    def fuzzy_search(self, word: str, max_distance: int = 1, limit: int | None = None,
+                     deadline: Deadline | None = None, search_filter: SearchFilter | None = None) -> List[object]:
+        """:meth:`SearchTrie.fuzzy_search` over every shard.
+
+        With a ``limit`` the shards feed one bounded heap, so a shard visited later is pruned
+        against the best matches of the earlier ones.
+        """
+        norm = normalize(word)
+        if not norm:
+            return []
+        top = TopK(limit) if limit is not None else None
+        raw: List[Dict] = []
+        for shard in self.shards:
+            traverse = shard._automaton_fuzzy if shard.fuzzy_engine == "automaton" else shard._iterative_fuzzy
+            with shard._read_lock():
+                raw.extend(traverse(norm, max_distance, top, deadline, search_filter))
+            if deadline is not None and deadline.expired:
+                break
+        if top is not None:
+            return [node.value for node, _ in top.values()]
+        distance_weight = self.shards[0].distance_weight
+        raw.sort(key=lambda x: (x["distance"] * distance_weight, -x["node"].weight))
+        return [item["node"].value for item in raw]
+
+    def resume_fuzzy_search(self, word: str, max_distance: int, session, limit: int | None = None,
+                            deadline: Deadline | None = None) -> List[object]:
+        # Frontiers span every shard and would pin all their locks between keystrokes: search afresh
+        return self.fuzzy_search(word, max_distance, limit, deadline)
+
+class ShardedTokenSearchTrie(_ShardedTrie):
+    """:class:`TokenSearchTrie` API over shards routed by the first character of each token.
+
+    An item is indexed in every shard holding one of its tokens, each shard with its own
+    tokens only; only the shard of the last token stores the item and its weight on that
+    token's node, as a single trie does, the others add postings. Ids are resolved through
+    one id map over all shards, which the shards fill instead of maps of their own.
+    """
+    def __init__(self, shards: Sequence[TokenSearchTrie]):
+        super().__init__(shards)
+        self._by_id: Dict[int, object] = {}
+        for shard in self.shards:
+            shard._by_id = self._by_id
+        self.usage_weight = self.shards[0].usage_weight
+        self.distance_weight = self.shards[0].distance_weight
+
+    def _split(self, tokens: Tuple[str, ...]) -> Dict[int, Tuple[str, ...]]:
+        """Tokens grouped by shard index, in their original order."""
+        groups: Dict[int, List[str]] = {}
+        for token in tokens:
+            groups.setdefault(shard_of(token, len(self.shards)), []).append(token)
+        return {index: tuple(group) for index, group in groups.items()}
+
+    @property
+    def deletion_index(self):
+        return self.shards[0].deletion_index
+
+    def enable_deletion_index(self, max_distance: int = 2):
+        for shard in self.shards:
+            shard.enable_deletion_index(max_distance)
+
+    def disable_deletion_index(self):
+        for shard in self.shards:
+            shard.disable_deletion_index()
+
+    def insert(self, item: object, weight: int = 1):
+        tokens = tokenize(item.name)
+        self._by_id[item.id] = item
+        if not tokens:
+            return self.shards[0].insert(item, weight)
+        last = shard_of(tokens[-1], len(self.shards))
+        node = None
+        for index, shard_tokens in self._split(tokens).items():
+            shard_node = self.shards[index].insert(item, weight, shard_tokens, terminal=index == last)
+            if index == last:
+                node = shard_node
+        return node
+
+    def delete(self, item: object):
+        for index, shard_tokens in self._split(tokenize(item.name)).items():
+            self.shards[index].delete(item, shard_tokens)
+        self._by_id.pop(getattr(item, "id", None), None)
+
+    def rename(self, old_item: object, new_item: object):
+        with self._locks(tokenize(old_item.name) + tokenize(new_item.name)):
+            self.delete(old_item)
+            self.insert(new_item)
+
+    def prefix_search(self, prefix: str) -> List[object]:
+        norm = normalize(prefix)
+        if not norm:
+            return []
+        return self._shard(norm).prefix_search(prefix)
+
+    def multi_token_prefix_search(self, query: str, limit: int | None = None,
+                                  search_filter: SearchFilter | None = None) -> List[object]:
+        """:meth:`TokenSearchTrie.multi_token_prefix_search` with each token looked up in its own shard.
+
+        Only the shards of the query tokens are locked, for the whole intersection.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with nullcontext() if self.snapshot_reads else self._locks(tokens):
+            postings = []
+            for token in tokens:
+                shard = self._shard(token)
+                node = shard._prefix_node(shard.root, token)
+                if node is None or not node.postings:
+                    return []
+                if search_filter is not None and not search_filter.admits(node.facets):
+                    return []
+                postings.append(node.postings)
+            return resolve_postings(postings, self._by_id, limit, search_filter)
+
+    def fuzzy_search(self, query: str, token_max_distance: int = 2, limit: int | None = None,
+                     deadline: Deadline | None = None, search_filter: SearchFilter | None = None) -> List[object]:
+        """:meth:`TokenSearchTrie.fuzzy_search` with each query token matched against every shard in turn."""
+        def matches(qt: str) -> List[Tuple[str, set, int]]:
+            found: List[Tuple[str, set, int]] = []
+            for shard in self.shards:
+                token_fuzzy = shard._token_fuzzy_engine(token_max_distance)
+                with shard._read_lock():
+                    found.extend(token_fuzzy(qt, token_max_distance, TOKEN_MATCH_LIMIT - len(found), deadline,
+                                             search_filter))
+                if len(found) >= TOKEN_MATCH_LIMIT or (deadline is not None and deadline.expired):
+                    break
+            return found
+        return score_token_matches(tokenize(query), matches, self._by_id, self.usage_weight, self.distance_weight,
+                                   limit, deadline, search_filter)
+
+    def stats(self) -> Dict[str, object]:
+        stats = super().stats()
+        id_map = sys.getsizeof(self._by_id)  # Every shard reported the shared map
+        stats["items"] = len(self._by_id)  # Items with tokens in several shards are counted once
+        stats["bytes"] = {**stats["bytes"], "id_map": id_map,
+                          "total": stats["bytes"]["total"] - stats["bytes"]["id_map"] + id_map}
+        return stats
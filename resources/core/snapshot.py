@@ -0,0 +1,253 @@
+from __future__ import annotations
+from array import array
+from contextlib import contextmanager, nullcontext, suppress
+import gc
+import marshal
+import mmap
+import os
+import tempfile
+from typing import Callable, Dict, List, Sequence, Tuple
+from resources.core.facets import CATEGORY_BITS, Facets
+from resources.core.index_stats import TrieCounters
+from resources.core.postings import EMPTY_POSTINGS
+
+# A snapshot file is MAGIC followed by one marshal payload. Trie nodes are written in preorder
+# as parallel columns (label, child count, weight, ...), which marshal stores as flat arrays of
+# primitives and loads in C; only the node objects themselves are created in Python on load.
+# Items are referenced by their position in the item table, terminals by their preorder ordinal.
+MAGIC = b"MMIDXSNP"
+FORMAT_VERSION = 1
+
+class SnapshotError(ValueError):
+    """The file is not a snapshot this build can load into the given index."""
+
+@contextmanager
+def gc_paused():
+    """Pauses the cyclic collector while an index is (de)serialized or restored.
+
+    These phases allocate hundreds of thousands of long-lived tuples and nodes and create no
+    reference cycles, so the collections they would trigger only rescan live objects; left
+    on, they take about two thirds of a load.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _counters_state(counters: TrieCounters) -> Tuple:
+    return (counters.nodes, counters.terminals, counters.top_entries, counters.postings, counters.refs,
+            dict(counters._buckets))
+
+def _restore_counters(state: Sequence) -> TrieCounters:
+    counters = TrieCounters()
+    counters.nodes, counters.terminals, counters.top_entries, counters.postings, counters.refs, buckets = state
+    counters._buckets = dict(buckets)
+    return counters
+
+def _preorder(root) -> List:
+    nodes = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(reversed(list(node.children.values())))
+    return nodes
+
+def _encode_trie(root, counters: Tuple, item_index: Dict[int, int]) -> Dict[str, object]:
+    """Columns of the trie under ``root`` in preorder."""
+    nodes = _preorder(root)
+    ordinal = {id(node): i for i, node in enumerate(nodes)}
+    label = [""] * len(nodes)  # Dict tries keep a node's edge character as its key in the parent
+    for node in nodes:
+        for key, child in node.children.items():
+            label[ordinal[id(child)]] = getattr(child, "label", key)
+    columns = {
+        "layout": type(root).__name__,
+        "label": label,
+        "children": [len(node.children) for node in nodes],
+        "weight": [node.weight for node in nodes],
+        "value": [item_index.get(id(node.value), -1) if node.is_end_of_word else -1 for node in nodes],
+        "facets": [node.facets for node in nodes],
+        "counters": counters,
+    }
+    if hasattr(root, "top"):
+        columns["top"] = [tuple(ordinal[id(t)] for t in node.top) if node.top else None for node in nodes]
+    if hasattr(root, "postings"):
+        columns["items"] = [tuple(node.items) if node.items else None for node in nodes]
+        columns["postings"] = [node.postings.tobytes() if node.postings else None for node in nodes]
+    return columns
+
+def _capture(index) -> Tuple:
+    """Roots, counters and items of both tries at one instant. Must be called with no write in progress."""
+    tries = (index.prefix_trie, index.token_trie)
+    table = list(index.token_trie._by_id.values())
+    return ([trie.root for trie in tries], [_counters_state(trie.counters) for trie in tries],
+            table, [index._keys[item.id] for item in table])
+
+def _encode(captured: Tuple, version: object) -> Dict[str, object]:
+    (prefix_root, token_root), (prefix_counters, token_counters), table, keys = captured
+    item_index = {id(item): i for i, item in enumerate(table)}
+    fields = tuple(type(table[0]).model_fields) if table else ()
+    return {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "fields": fields,
+        "items": [tuple(getattr(item, name) for name in fields) for item in table],
+        "keys": keys,
+        "categories": CATEGORY_BITS.names(),
+        "prefix": _encode_trie(prefix_root, prefix_counters, item_index),
+        "token": _encode_trie(token_root, token_counters, item_index),
+    }
+
+def _bit_remap(categories: Sequence[str]) -> List[int] | None:
+    """New bit of each saved category bit, or None when the bits are unchanged in this process."""
+    bits = [CATEGORY_BITS.bit(name) for name in categories]
+    if all(bit == 1 << i for i, bit in enumerate(bits)):
+        return None
+    return bits
+
+def _remap_facets(facets: Facets | None, bits: List[int]) -> Facets | None:
+    if facets is None:
+        return None
+    mask, low, high = facets
+    remapped = 0
+    for i, bit in enumerate(bits):
+        if mask >> i & 1:
+            remapped |= bit
+    return (remapped, low, high)
+
+def _decode_trie(trie, columns: Dict[str, object], items: List[object], bits: List[int] | None):
+    """Builds the nodes described by ``columns``; returns the new root and counters."""
+    node_cls = type(trie.root)
+    if columns["layout"] != node_cls.__name__:
+        raise SnapshotError(f"snapshot holds {columns['layout']} nodes, index uses {node_cls.__name__}")
+    labelled = "label" in getattr(node_cls, "__slots__", ())
+    labels, child_counts, weights, values, facets = (columns[name] for name in ("label", "children", "weight", "value", "facets"))
+    tops = columns.get("top")
+    item_ids, postings = columns.get("items"), columns.get("postings")
+    nodes = []
+    stack: List[List] = []
+    for i, label in enumerate(labels):
+        node = node_cls(label) if labelled else node_cls()
+        if stack:
+            parent = stack[-1]
+            parent[0].children[label[0]] = node
+            parent[1] -= 1
+            if not parent[1]:
+                stack.pop()
+        if child_counts[i]:
+            stack.append([node, child_counts[i]])
+        node.weight = weights[i]
+        if values[i] >= 0:
+            node.value = items[values[i]]
+            node.is_end_of_word = True
+        node.facets = facets[i] if bits is None else _remap_facets(facets[i], bits)
+        if item_ids is not None:
+            if item_ids[i]:
+                node.items = set(item_ids[i])
+                node.is_end_of_word = True
+            if postings[i]:
+                node.postings = array("q", postings[i])
+        nodes.append(node)
+    if tops is not None:
+        for node, top in zip(nodes, tops):
+            if top:
+                node.top = [nodes[j] for j in top]
+    return nodes[0], _restore_counters(columns["counters"])
+
+def _check_layout(index):
+    if hasattr(index.prefix_trie, "shards") or hasattr(index.token_trie, "shards"):
+        raise SnapshotError("sharded tries are not supported by index snapshots")
+
+def save_snapshot(index, path: str, version: object = None, writers=None) -> int:
+    """Writes ``index`` (an ObjectSearchTrie) to ``path`` and returns the file size in bytes.
+
+    ``version`` is stored as is (any marshal-able value) and handed back by
+    :func:`load_snapshot`, so the caller can tell which data state the snapshot reflects.
+    The tries are captured under both trie locks and ``writers``, the lock the index's owner
+    holds around a whole write (an insert touches both tries and the key table in turn), so
+    the snapshot is consistent. The locks are released before the nodes are encoded: until
+    the encoding is done the tries are pinned, and writers copy the nodes they change, as in
+    snapshot mode, so the captured nodes stay as they were and writers only wait for the
+    capture. The file is written to a temporary file of its own next to ``path`` and renamed
+    over it, so readers never see half a file and processes saving at the same time do not
+    clobber each other's writes.
+    """
+    _check_layout(index)
+    tries = (index.prefix_trie, index.token_trie)
+    with gc_paused():
+        with writers or nullcontext(), index.prefix_trie._lock, index.token_trie._lock:
+            captured = _capture(index)
+            for trie in tries:
+                trie.pins += 1
+        try:
+            payload = _encode(captured, version)
+        finally:
+            with index.prefix_trie._lock, index.token_trie._lock:
+                for trie in tries:
+                    trie.pins -= 1
+        data = marshal.dumps(payload)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(tmp)
+        raise
+    return len(MAGIC) + len(data)
+
+def load_snapshot(index, path: str, item_factory: Callable[..., object]) -> object:
+    """Replaces the contents of ``index`` with the snapshot at ``path``; returns its version.
+
+    The file is memory-mapped and decoded straight from the mapping. ``item_factory`` is
+    called with the saved fields as keyword arguments to rebuild each item (e.g. a pydantic
+    model's ``model_construct``; the values were validated when first indexed). Both tries
+    publish their new roots only once fully built, so concurrent readers see either the old
+    or the new index. Raises :class:`SnapshotError` for a foreign or incompatible file.
+    """
+    _check_layout(index)
+    with gc_paused():
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped[:len(MAGIC)] != MAGIC:
+                raise SnapshotError(f"{path} is not an index snapshot")
+            with memoryview(mapped) as view:
+                payload = marshal.loads(view[len(MAGIC):])
+        if payload.get("format") != FORMAT_VERSION:
+            raise SnapshotError(f"unsupported snapshot format {payload.get('format')}")
+        fields = payload["fields"]
+        items = [item_factory(**dict(zip(fields, values))) for values in payload["items"]]
+        bits = _bit_remap(payload["categories"])
+        prefix_root, prefix_counters = _decode_trie(index.prefix_trie, payload["prefix"], items, bits)
+        token_root, token_counters = _decode_trie(index.token_trie, payload["token"], items, bits)
+    by_id = {item.id: item for item in items}
+    keys = {item.id: tuple(key) for item, key in zip(items, payload["keys"])}
+    for trie, root, counters in ((index.prefix_trie, prefix_root, prefix_counters),
+                                 (index.token_trie, token_root, token_counters)):
+        with trie._lock:
+            if trie is index.token_trie:
+                trie._by_id = by_id
+                if trie.deletion_index is not None:
+                    trie.deletion_index.rebuild(_vocabulary(token_root))
+            trie.counters = counters
+            trie.generation += 1
+            trie.root = root
+    index._keys = keys
+    return payload["version"]
+
+def _vocabulary(root) -> List[str]:
+    """Every token stored under a token trie ``root``."""
+    tokens = []
+    stack = [(root, "")]
+    while stack:
+        node, prefix = stack.pop()
+        if node.is_end_of_word:
+            tokens.append(prefix)
+        for key, child in node.children.items():
+            stack.append((child, prefix + getattr(child, "label", key)))
+    return tokens
@@ -0,0 +1,91 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List, Set, Tuple
+from resources.core.levenshtein import bounded_distance
+import sys
+
+def deletion_variants(term: str, max_distance: int) -> Set[str]:
+    """Every string obtained from ``term`` by removing up to ``max_distance`` characters (term included)."""
+    variants = {term}
+    frontier = {term}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for word in frontier:
+            for i in range(len(word)):
+                variant = word[:i] + word[i + 1:]
+                if variant not in variants:
+                    next_frontier.add(variant)
+        variants |= next_frontier
+        frontier = next_frontier
+    return variants
+
+class DeletionIndex:
+    """SymSpell-style symmetric deletion index over a token vocabulary.
+
+    Two tokens within ``max_distance`` edits always share a string reachable from both by at
+    most ``max_distance`` deletions, so a lookup is a handful of hash probes followed by an
+    exact distance check on the (few) candidates. Buckets are small tuples replaced on write,
+    so lookups may run concurrently with writers without holding the trie lock.
+    """
+    def __init__(self, max_distance: int = 2):
+        self.max_distance = max_distance
+        self._deletes: Dict[str, Tuple[str, ...]] = {}
+        self._vocabulary: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._vocabulary)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._vocabulary
+
+    def add(self, token: str):
+        """Indexes a token that just entered the vocabulary (no-op if already present)."""
+        if token in self._vocabulary:
+            return
+        self._vocabulary.add(token)
+        for variant in deletion_variants(token, self.max_distance):
+            self._deletes[variant] = self._deletes.get(variant, ()) + (token,)
+
+    def remove(self, token: str):
+        """Drops a token that no longer belongs to any item (no-op if absent)."""
+        if token not in self._vocabulary:
+            return
+        self._vocabulary.discard(token)
+        for variant in deletion_variants(token, self.max_distance):
+            remaining = tuple(t for t in self._deletes.get(variant, ()) if t != token)
+            if remaining:
+                self._deletes[variant] = remaining
+            else:
+                self._deletes.pop(variant, None)
+
+    def rebuild(self, tokens: Iterable[str]):
+        """Replaces the index contents with ``tokens``."""
+        self._deletes = {}
+        self._vocabulary = set()
+        for token in tokens:
+            self.add(token)
+
+    def lookup(self, term: str, max_distance: int | None = None) -> List[Tuple[str, int]]:
+        """Returns (token, distance) pairs within ``max_distance`` of ``term``, closest first."""
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        candidates: Set[str] = set()
+        for variant in deletion_variants(term, max_distance):
+            bucket = self._deletes.get(variant)
+            if bucket:
+                candidates.update(bucket)
+        matches = []
+        for token in candidates:
+            dist = bounded_distance(term, token, max_distance)
+            if dist <= max_distance:
+                matches.append((token, dist))
+        matches.sort(key=lambda m: (m[1], m[0]))
+        return matches
+
+    @property
+    def variant_count(self) -> int:
+        return len(self._deletes)
+
+    def estimated_bytes(self) -> int:
+        """Hash tables plus a one-token bucket and a short key string per variant (no traversal)."""
+        return (sys.getsizeof(self._deletes) + sys.getsizeof(self._vocabulary)
+                + len(self._deletes) * (sys.getsizeof(("",)) + sys.getsizeof("variant")))
@@ -0,0 +1,51 @@
+from __future__ import annotations
+from heapq import heappush, heapreplace
+from typing import Any, List, Tuple
+
+class TopK:
+    """Bounded selection of the ``limit`` entries with the highest scores.
+
+    Scores are numbers or tuples of numbers. The heap root is the current worst entry, so a
+    candidate that cannot get in costs one comparison, and callers can read :meth:`threshold`
+    to prune work whose best possible score would not beat it. Equal scores keep the entry
+    seen first, which makes :meth:`values` match a stable ``sorted(..., reverse=True)[:limit]``.
+    """
+    __slots__ = ("limit", "_heap", "_seq")
+
+    def __init__(self, limit: int):
+        self.limit = max(0, limit)
+        self._heap: List[Tuple[Any, int, object]] = []
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def full(self) -> bool:
+        return len(self._heap) >= self.limit
+
+    def threshold(self) -> Tuple[Any, object] | None:
+        """Score and value of the entry the next admission would evict, or None while not full.
+
+        A candidate is only kept if its score is strictly higher than this one.
+        """
+        if not self.limit or len(self._heap) < self.limit:
+            return None
+        score, _, value = self._heap[0]
+        return score, value
+
+    def push(self, score, value: object) -> bool:
+        """Offers an entry; returns True if it was kept."""
+        self._seq += 1
+        heap = self._heap
+        if len(heap) < self.limit:
+            heappush(heap, (score, -self._seq, value))
+            return True
+        if heap and score > heap[0][0]:
+            heapreplace(heap, (score, -self._seq, value))
+            return True
+        return False
+
+    def values(self) -> List[object]:
+        """Kept values, best score first."""
+        return [value for _, _, value in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
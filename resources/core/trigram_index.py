@@ -0,0 +1,102 @@
+from __future__ import annotations
+from array import array
+from typing import Dict, Iterable, List, Set, Tuple
+from resources.core.postings import intersect, with_id, without_id
+from resources.core.search_engine import normalize
+import heapq, threading
+
+def trigrams(text: str) -> Set[str]:
+    """Every 3-character window of ``text`` (empty for strings shorter than 3)."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TrigramIndex:
+    """In-memory trigram posting lists over normalized names, for substring (infix) search.
+
+    A name containing a fragment necessarily contains every trigram of that fragment, so the
+    intersection of those posting lists is a superset of the matches; each candidate is then
+    verified with a plain substring check. Fragments shorter than 3 characters have no trigrams
+    and fall back to verifying every indexed name, which is still a scan of memory, not of the table.
+    Posting lists are sorted ``array("q")`` (8 bytes per id instead of a set entry and its
+    share of the table), as the index covers every row of the table.
+    """
+    def __init__(self):
+        self._names: Dict[int, str] = {}
+        self._postings: Dict[str, array] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._names
+
+    @property
+    def trigram_count(self) -> int:
+        return len(self._postings)
+
+    def add(self, item_id: int, name: str):
+        """Indexes ``name`` under ``item_id``, replacing any name previously stored for that id."""
+        norm = normalize(name)
+        with self._lock:
+            self._discard(item_id)
+            self._names[item_id] = norm
+            for gram in trigrams(norm):
+                self._postings[gram] = with_id(self._postings.get(gram, array("q")), item_id, copy=False)
+
+    def remove(self, item_id: int):
+        with self._lock:
+            self._discard(item_id)
+
+    def rebuild(self, rows: Iterable[Tuple[int, str]]):
+        """Replaces the index contents with ``(id, name)`` rows."""
+        names: Dict[int, str] = {}
+        lists: Dict[str, List[int]] = {}
+        for item_id, name in rows:
+            norm = normalize(name)
+            names[item_id] = norm
+            for gram in trigrams(norm):
+                lists.setdefault(gram, []).append(item_id)
+        postings = {gram: array("q", sorted(ids)) for gram, ids in lists.items()}
+        with self._lock:
+            self._names = names
+            self._postings = postings
+
+    def _discard(self, item_id: int):
+        old = self._names.pop(item_id, None)
+        if old is None:
+            return
+        for gram in trigrams(old):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                without_id(ids, item_id, copy=False)
+                if not ids:
+                    del self._postings[gram]
+
+    def search(self, fragment: str, limit: int | None = None) -> List[int]:
+        """Ids whose name contains ``fragment``; shortest (closest) names first."""
+        return self.contains_all([fragment], limit)
+
+    def contains_all(self, fragments: Iterable[str], limit: int | None = None) -> List[int]:
+        """Ids whose name contains every fragment, in any order; shortest (closest) names first."""
+        needles = [n for n in (normalize(f).strip() for f in fragments) if n]
+        if not needles:
+            return []
+        grams: Set[str] = set()
+        for needle in needles:
+            grams |= trigrams(needle)
+        with self._lock:
+            names = self._names
+            if grams:
+                postings = []
+                for gram in grams:
+                    ids = self._postings.get(gram)
+                    if not ids:
+                        return []
+                    postings.append(ids)
+                candidates = intersect(postings)
+            else:
+                candidates = names.keys()
+            matches = ((len(names[i]), names[i], i) for i in candidates
+                       if all(needle in names[i] for needle in needles))
+            ranked = sorted(matches) if limit is None else heapq.nsmallest(limit, matches)
+        return [i for _, _, i in ranked]
@@ -0,0 +1,133 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Dict, List
+import sys
+import threading
+import time
+
+# Frontier entries one session keeps over all the characters of its fuzzy query. Short
+# prefixes at distance 2 reach a large part of the trie; a query whose frontiers would
+# exceed this is searched afresh and its frontiers are not kept.
+FRONTIER_LIMIT = 20000
+
+def common_prefix_length(a: str, b: str) -> int:
+    i = 0
+    limit = min(len(a), len(b))
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+def frontier_step(active: Dict[object, int], char: str, max_distance: int) -> Dict[object, int]:
+    """Advances a fuzzy frontier by one query character.
+
+    ``active`` maps trie nodes to the edit distance between the node's string and the query
+    typed so far, for alignments that end on the node's own character (trailing trie characters
+    are added later by :func:`frontier_matches`). The new frontier holds every node reachable
+    by deleting ``char`` or by skipping up to ``max_distance - d`` characters below an active
+    node and aligning ``char`` with the next one.
+    """
+    nxt: Dict[object, int] = {}
+    limit = max_distance + 1
+    for node, dist in active.items():
+        if dist + 1 <= max_distance and dist + 1 < nxt.get(node, limit):
+            nxt[node] = dist + 1
+        stack = [(node, dist)]
+        while stack:
+            parent, spent = stack.pop()
+            for ch, child in parent.children.items():
+                cost = spent + (ch != char)
+                if cost <= max_distance and cost < nxt.get(child, limit):
+                    nxt[child] = cost
+                if spent + 1 <= max_distance:  # skip ``ch`` (an insertion) and look one level deeper
+                    stack.append((child, spent + 1))
+    return nxt
+
+def frontier_matches(active: Dict[object, int], max_distance: int) -> Dict[object, int]:
+    """Terminal nodes within ``max_distance`` of the query a frontier was built for."""
+    best: Dict[object, int] = {}
+    limit = max_distance + 1
+    for node, dist in active.items():
+        stack = [(node, dist)]
+        while stack:
+            current, cost = stack.pop()
+            if current.is_end_of_word and current.value is not None and cost < best.get(current, limit):
+                best[current] = cost
+            if cost < max_distance:
+                stack.extend((child, cost + 1) for child in current.children.values())
+    return best
+
+class SearchSession:
+    """Search-as-you-type state kept between the keystrokes of one client.
+
+    Holds the node path of the last prefix query and one fuzzy frontier per character of the
+    last fuzzy query, so a query sharing a prefix with the previous one (typing on, or a
+    backspace) only computes the characters that changed. The state is tied to the trie root
+    and generation it was computed on and starts over after any structural write. The
+    frontiers hold at most :data:`FRONTIER_LIMIT` entries in total (see ``fuzzy_overflow``).
+    """
+    __slots__ = ("lock", "root", "generation", "prefix_query", "prefix_path",
+                 "fuzzy_query", "fuzzy_distance", "frontiers", "fuzzy_overflow")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.root = None
+        self.generation = -1
+
+    def sync(self, root, generation: int):
+        """Discards the saved state unless it was computed on ``root`` at ``generation``."""
+        if self.root is root and self.generation == generation:
+            return
+        self.root = root
+        self.generation = generation
+        self.prefix_query = ""
+        self.prefix_path: List[object] = [root]
+        self.reset_fuzzy()
+
+    def reset_fuzzy(self, overflow: tuple[str, int] | None = None):
+        """Drops the fuzzy frontiers. ``overflow`` is the (query, distance) whose frontiers grew past
+        FRONTIER_LIMIT: queries extending it are searched afresh without stepping frontiers again."""
+        self.fuzzy_query = ""
+        self.fuzzy_distance = None
+        self.frontiers: List[Dict[object, int]] = [{self.root: 0}]
+        self.fuzzy_overflow = overflow
+
+    def nbytes(self) -> int:
+        """Estimated size of the saved state: the prefix path and the frontier dicts."""
+        size = sys.getsizeof(getattr(self, "prefix_path", ()))
+        return size + sum(sys.getsizeof(frontier) for frontier in list(getattr(self, "frontiers", ())))
+
+class SessionStore:
+    """Small TTL + LRU map from client session tokens to :class:`SearchSession` objects."""
+    def __init__(self, ttl: float = 30.0, max_sessions: int = 1000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, tuple[float, SearchSession]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        """Live sessions, the fuzzy frontier entries they hold and their estimated bytes."""
+        with self._lock:
+            sessions = [session for _, session in self._sessions.values()]
+        entries = sum(len(frontier) for session in sessions for frontier in list(getattr(session, "frontiers", ())))
+        return {"sessions": len(sessions), "frontier_entries": entries,
+                "bytes": sum(session.nbytes() for session in sessions)}
+
+    def get(self, token: str) -> SearchSession:
+        """Returns the live session for ``token``, creating it if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            # Entries are kept in access order, so expired ones sit at the front
+            while self._sessions:
+                oldest, (expires_at, _) = next(iter(self._sessions.items()))
+                if expires_at > now:
+                    break
+                del self._sessions[oldest]
+            entry = self._sessions.pop(token, None)
+            session = entry[1] if entry is not None else SearchSession()
+            self._sessions[token] = (now + self.ttl, session)
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
@@ -27,7 +27,9 @@ class Logger:
         self._current_day = datetime.now().strftime("%Y%m%d")
         self.logfile = os.path.join(log_dir, f"app_{self._current_day}.log")
 
-        self.debug = debug
+        self.enabled = debug
+        # debug() lines are only written with LOG_DEBUG=1: they sit on hot paths such as search misses
+        self.verbose = os.getenv("LOG_DEBUG", "0") == "1"
         self._initialized = True
 
         self.log("INFO", f"--- New logging session started: {self.logfile} ---")
@@ -39,7 +41,7 @@ class Logger:
         self.log("INFO", f"--- Log rotated: {self.logfile} ---")
 
     def log(self, level: str, message: str) -> None:
-        if self.debug is False:
+        if self.enabled is False:
             return
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_line = f"[{now}] [{level.upper()}] {message}"
@@ -52,6 +54,10 @@ class Logger:
             f.write(log_line + "\n")
 
     # Convenience methods
+    def debug(self, message: str) -> None:
+        if self.verbose:
+            self.log("DEBUG", message)
+
     def info(self, message: str) -> None:
         self.log("INFO", message)
 
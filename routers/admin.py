@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from routers.schemas import UserDisplay
+from auth.auth2 import get_current_admin
+from resources.logger import Logger
+from resources.core.entity_cache import ingredient_cache, recipe_cache
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+logger = Logger()
+
+@router.get('/search-index', response_model=dict, summary="Search index statistics")
+def search_index_stats(current_user: UserDisplay = Depends(get_current_admin)):
+    """
+    Reports the in-memory search indexes of the ingredient and recipe caches.
+    Restricted to the users listed in ``ADMIN_USERS``.
+
+    For each cache: node counts of both tries, token vocabulary size, posting-list size
+    distribution, estimated bytes per structure, cached-id counts and result cache counters.
+    The figures are maintained incrementally by the index writers, so this call does not
+    traverse the tries and is cheap enough to poll.
+    """
+    try:
+        return {"ingredients": ingredient_cache.stats(), "recipes": recipe_cache.stats()}
+    except Exception as e:
+        logger.error(f"Error collecting search index stats: {e}")
+        raise HTTPException(status_code=500, detail=f"{e}")
+
+@router.post('/search-index/rebuild', response_model=dict, status_code=status.HTTP_202_ACCEPTED,
+             summary="Rebuild the search indexes in the background")
+def rebuild_search_index(current_user: UserDisplay = Depends(get_current_admin)):
+    """
+    Starts a background rebuild of the ingredient and recipe search indexes.
+    Restricted to the users listed in ``ADMIN_USERS``.
+
+    The current indexes keep serving until the fresh ones are swapped in, with the writes made
+    during the build replayed. Each value tells whether a rebuild was started (False: one is
+    already running); the build duration and item counts appear under ``last_rebuild`` in
+    ``GET /admin/search-index`` once it finishes.
+    """
+    try:
+        return {"ingredients": ingredient_cache.start_rebuild_thread(), "recipes": recipe_cache.start_rebuild_thread()}
+    except Exception as e:
+        logger.error(f"Error starting search index rebuild: {e}")
+        raise HTTPException(status_code=500, detail=f"{e}")
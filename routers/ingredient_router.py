@@ -15,7 +15,9 @@ from resources.logger import Logger
 from typing import List, Optional
 from db.models import Ingredients
 from auth.auth2 import get_current_user
-from resources.core.entity_cache import ingredient_cache
+from resources.core.entity_cache import ingredient_cache, SEARCH_BUDGET
+from resources.core.deadline import Deadline
+from resources.core.facets import make_filter
 from resources.paginated_querry import paginated_query, paginate_live_search
 
 logger = Logger()
@@ -39,6 +41,7 @@ class SearchType(str, Enum):
     multi_token_prefix = "multi_token_prefix"
     multi_token_fuzzy = "multi_token_fuzzy"
     smart = "smart"
+    infix = "infix"
 
 @router.get("/search", response_model=CursorIngredientsResponse, summary="Live search ingredients")
 def live_tree_search(
@@ -46,18 +49,27 @@ def live_tree_search(
     search_type: SearchType = SearchType.prefix,
     limit: int = Query(10, ge=1, le=50),
     cursor: Optional[int] = None,
+    session: Optional[str] = Query(None, max_length=64, description="Client token reused across keystrokes to resume the previous search"),
+    category: Optional[str] = Query(None, max_length=50, description="Only return items of this category"),
+    max_calories: Optional[float] = Query(None, ge=0, description="Only return items with at most this many calories"),
     current_user: UserDisplay = Depends(get_current_user)):
     try:
+        stages = None
+        deadline = Deadline(SEARCH_BUDGET)
+        search_filter = make_filter(category, max_calories)
         if search_type is SearchType.prefix:
-            raw = ingredient_cache.prefix_search(query, limit=limit)
+            raw = ingredient_cache.prefix_search(query, limit=limit, session_id=session, search_filter=search_filter)
         elif search_type is SearchType.fuzzy:
-            raw = ingredient_cache.fuzzy_search(query, limit=limit)
+            raw = ingredient_cache.fuzzy_search(query, limit=limit, session_id=session, deadline=deadline, search_filter=search_filter)
         elif search_type is SearchType.multi_token_prefix:
-            raw = ingredient_cache.multi_token_prefix_search(query, limit=limit)
+            raw = ingredient_cache.multi_token_prefix_search(query, limit=limit, session_id=session, search_filter=search_filter)
         elif search_type is SearchType.multi_token_fuzzy:
-            raw = ingredient_cache.multi_token_fuzzy_search(query, limit=limit)
+            raw = ingredient_cache.multi_token_fuzzy_search(query, limit=limit, session_id=session, deadline=deadline, search_filter=search_filter)
+        elif search_type is SearchType.infix:
+            raw = ingredient_cache.infix_search(query, limit=limit, search_filter=search_filter)
         else:  # smart
-            raw = ingredient_cache.smart_search(query, limit=limit)
+            stages = []
+            raw = ingredient_cache.smart_search(query, limit=limit, session_id=session, stages=stages, deadline=deadline, search_filter=search_filter)
 
         # Defensive: ensure list
         if isinstance(raw, dict):
@@ -81,7 +93,10 @@ def live_tree_search(
         if cursor in (None, 0) and len(ingredient_list) > limit:
             ingredient_list = ingredient_list[: limit + 1]  # keep one extra for has_more logic
 
-        return paginate_live_search(ingredient_list, limit=limit, cursor=cursor)
+        page = paginate_live_search(ingredient_list, limit=limit, cursor=cursor)
+        page["stages"] = stages
+        page["partial"] = deadline.expired
+        return page
     except Exception as e:
         logger.error(f"Error during live search: {e}")
         raise HTTPException(status_code=500, detail=f"{e}")
@@ -10,7 +10,9 @@ from db.db_recipes import create_recipe
 from auth.auth2 import get_current_user
 from db.db_recipes import *
 from resources.logger import Logger
-from resources.core.entity_cache import recipe_cache
+from resources.core.entity_cache import recipe_cache, SEARCH_BUDGET
+from resources.core.deadline import Deadline
+from resources.core.facets import make_filter
 
 router = APIRouter(prefix="/recipes", tags=["Recipes"])
 logger = Logger()
@@ -137,7 +139,11 @@ def list_recipes_cursor(
 @router.get("/search", response_model=CursorRecipesResponse, summary="Live search recipes")
 def live_search_recipes(query: str = Query(..., min_length=2, description="Search text (min 2 chars)"),
     search_type: SearchType = SearchType.prefix, limit: int = Query(10, ge=1, le=50),
-    cursor: Optional[int] = None, current_user: UserDisplay = Depends(get_current_user)):
+    cursor: Optional[int] = None,
+    session: Optional[str] = Query(None, max_length=64, description="Client token reused across keystrokes to resume the previous search"),
+    category: Optional[str] = Query(None, max_length=50, description="Only return items of this category"),
+    max_calories: Optional[float] = Query(None, ge=0, description="Only return items with at most this many calories"),
+    current_user: UserDisplay = Depends(get_current_user)):
     """
     Performs a live search for recipes based on a query string with pagination.
 
@@ -146,21 +152,31 @@ def live_search_recipes(query: str = Query(..., min_length=2, description="Searc
         db (Session): The database session dependency.
         limit (int): The maximum number of recipes to return.
         cursor (int): The cursor for pagination.
+        session (str): Optional search-as-you-type token; a query extending the previous one resumes from it.
+        category (str): Optional category the recipes must belong to.
+        max_calories (float): Optional upper bound on the recipe calories.
 
     Returns:
-        dict: A dictionary containing the list of recipes and pagination info.
+        dict: A dictionary containing the list of recipes and pagination info, the stages that ran
+            for a smart search, and ``partial`` when the search time budget ran out.
     """
     try:
+        stages = None
+        deadline = Deadline(SEARCH_BUDGET)
+        search_filter = make_filter(category, max_calories)
         if search_type is SearchType.prefix:
-            raw = recipe_cache.prefix_search(query, limit=limit)
+            raw = recipe_cache.prefix_search(query, limit=limit, session_id=session, search_filter=search_filter)
         elif search_type is SearchType.fuzzy:
-            raw = recipe_cache.fuzzy_search(query, limit=limit)
+            raw = recipe_cache.fuzzy_search(query, limit=limit, session_id=session, deadline=deadline, search_filter=search_filter)
         elif search_type is SearchType.multi_token_prefix:
-            raw = recipe_cache.multi_token_prefix_search(query, limit=limit)
+            raw = recipe_cache.multi_token_prefix_search(query, limit=limit, session_id=session, search_filter=search_filter)
         elif search_type is SearchType.multi_token_fuzzy:
-            raw = recipe_cache.multi_token_fuzzy_search(query, limit=limit)
+            raw = recipe_cache.multi_token_fuzzy_search(query, limit=limit, session_id=session, deadline=deadline, search_filter=search_filter)
+        elif search_type is SearchType.infix:
+            raw = recipe_cache.infix_search(query, limit=limit, search_filter=search_filter)
         else:  # smart
-            raw = recipe_cache.smart_search(query, limit=limit)
+            stages = []
+            raw = recipe_cache.smart_search(query, limit=limit, session_id=session, stages=stages, deadline=deadline, search_filter=search_filter)
         
          # Defensive: ensure list
         if isinstance(raw, dict):
@@ -181,7 +197,10 @@ def live_search_recipes(query: str = Query(..., min_length=2, description="Searc
         # Apply limit early if no cursor (optimization)
         if cursor in (None, 0) and len(recipe_list) > limit:
             recipe_list = recipe_list[: limit + 1]  # keep one extra for has_more logic
-        return paginate_live_search(recipe_list, limit=limit, cursor=cursor)
+        page = paginate_live_search(recipe_list, limit=limit, cursor=cursor)
+        page["stages"] = stages
+        page["partial"] = deadline.expired
+        return page
     except HTTPException:
         raise
     except Exception as e:
@@ -78,6 +78,8 @@ class CursorIngredientsResponse(BaseModel):
     items: List[IngredientsSummary]
     next_cursor: Optional[int] = None
     has_more: bool
+    stages: Optional[List[str]] = None  # smart search: stages that ran (prefix, fuzzy, fallback, cache)
+    partial: bool = False  # search time budget ran out; items are the best found so far
 
 class RecipeIngredientBase(BaseModel):
     model_config = ConfigDict(extra='forbid')
@@ -152,6 +154,7 @@ class RecipeUpdate(BaseModel):
 class RecipeSummary(BaseModel):
     id: int
     name: str
+    category: Optional[str] = None
     calories: float
     protein: float
     carbs: float
@@ -163,4 +166,6 @@ class RecipeSummary(BaseModel):
 class CursorRecipesResponse(BaseModel):
     items: List[RecipeSummary]
     next_cursor: Optional[int] = None
-    has_more: bool
\ No newline at end of file
+    has_more: bool
+    stages: Optional[List[str]] = None  # smart search: stages that ran (prefix, fuzzy, fallback, cache)
+    partial: bool = False  # search time budget ran out; items are the best found so far
\ No newline at end of file
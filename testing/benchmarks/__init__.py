@@ -0,0 +1,60 @@
+"""Offline benchmarks for the in-memory search index.
+
+Run a module directly from the repository root, e.g.::
+
+    python -m testing.benchmarks.trie_layout --size 50000
+"""
+import gc, json, os, random, time
+from routers.schemas import IngredientsSummary
+from testing.keywords import DATA_PATH
+
+_SUFFIXES = ["proaspat", "congelat", "bio", "fiert", "copt", "uscat", "afumat", "crud", "light", "integral"]
+
+def load_base_names() -> list[str]:
+    """Ingredient names shipped with the Robot test data."""
+    with open(os.path.join(DATA_PATH, "ingredients_ro.json"), encoding="utf-8") as f:
+        return [row["name"] for row in json.load(f)]
+
+def synthetic_items(size: int, seed: int = 7) -> list[IngredientsSummary]:
+    """Builds ``size`` unique ingredient summaries by combining the test-data names."""
+    rng = random.Random(seed)
+    base = load_base_names()
+    words = sorted({w for name in base for w in name.split()})
+    names: list[str] = []
+    seen: set[str] = set()
+    while len(names) < size:
+        parts = [rng.choice(base), rng.choice(words), rng.choice(_SUFFIXES)]
+        name = " ".join(parts[:rng.randint(1, 3)])
+        if len(names) >= len(base) or name in seen:
+            name = f"{name} {rng.choice(words).lower()}{len(names)}"
+        if name in seen:
+            continue
+        seen.add(name)
+        names.append(name)
+    categories = ["legume", "fructe", "lactate", "carne", "cereale", "condimente"]
+    return [IngredientsSummary(id=i + 1, name=name, category=rng.choice(categories),
+                               calories=round(rng.uniform(5, 900), 1), protein=1.0, carbs=1.0, fat=1.0,
+                               usage_count=int(rng.paretovariate(1.2)) - 1)
+            for i, name in enumerate(names)]
+
+def sample_queries(items: list, count: int, seed: int = 11) -> list[str]:
+    """Picks realistic queries: 2-5 character prefixes of the first token of random names."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        token = rng.choice(items).name.split()[0]
+        queries.append(token[:rng.randint(2, max(2, min(5, len(token))))])
+    return queries
+
+def timed(func, queries, repeat: int = 1) -> float:
+    """Mean latency of ``func(query)`` in microseconds, with the cyclic GC paused."""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for q in queries:
+                func(q)
+        return (time.perf_counter() - start) / (len(queries) * repeat) * 1e6
+    finally:
+        gc.enable()
@@ -0,0 +1,94 @@
+"""Hit ratio of the hot entity cache under a Zipfian replay: fill-once top items, LRU and W-TinyLFU.
+
+The cache starts with the items of highest usage_count, as build_cache loads them. Accesses
+follow a Zipf law over a popularity ranking that starts out as the usage ranking and drifts
+between phases: part of the popular ranks go to items that were cold (new products, a
+season). A miss is an item the database fallback had to fetch; fill-once never replaces
+an item (the policy before admission existed), LRU always does, W-TinyLFU only when the
+fetched item is used more often than the one it would evict.
+"""
+import argparse, random
+from collections import OrderedDict
+from resources.core.admission import WTinyLFU
+from testing.benchmarks import synthetic_items, timed
+from testing.benchmarks.result_cache import zipf_replay
+
+class FillOnce:
+    def __init__(self, keys):
+        self.keys = set(keys)
+
+    def access(self, key) -> bool:
+        return key in self.keys
+
+class LRU:
+    def __init__(self, keys, capacity: int):
+        self.keys = OrderedDict.fromkeys(reversed(keys))
+        self.capacity = capacity
+
+    def access(self, key) -> bool:
+        if key in self.keys:
+            self.keys.move_to_end(key)
+            return True
+        self.keys[key] = None
+        if len(self.keys) > self.capacity:
+            self.keys.popitem(last=False)
+        return False
+
+class TinyLFU:
+    def __init__(self, keys, capacity: int):
+        self.policy = WTinyLFU(capacity)
+        self.policy.load(keys)
+
+    def access(self, key) -> bool:
+        # As EntityCache: a fallback hit is admitted, then its access recorded
+        hit = key in self.policy
+        if not hit:
+            self.policy.admit(key)
+        self.policy.record(key)
+        return hit
+
+def drifted(ranking: list, hot: int, drift: float, rng: random.Random) -> list:
+    """``ranking`` with a ``drift`` share of its ``hot`` top ranks swapped with random colder items."""
+    ranking = list(ranking)
+    for rank in rng.sample(range(hot), int(hot * drift)):
+        other = rng.randrange(hot, len(ranking))
+        ranking[rank], ranking[other] = ranking[other], ranking[rank]
+    return ranking
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--capacity", type=int, default=1000, help="TRIE_CACHE_LIMIT")
+    parser.add_argument("--replay", type=int, default=200000, help="accesses per phase")
+    parser.add_argument("--phases", type=int, default=4)
+    parser.add_argument("--drift", type=float, default=0.3, help="share of the hot ranks taken by cold items per phase")
+    parser.add_argument("--skew", type=float, default=0.9)
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    ranking = [item.id for item in sorted(items, key=lambda item: item.usage_count, reverse=True)]
+    loaded = ranking[:args.capacity]
+    rng = random.Random(5)
+    policies = {"fill-once": FillOnce(loaded), "LRU": LRU(loaded, args.capacity),
+                "W-TinyLFU": TinyLFU(loaded, args.capacity)}
+    print(f"{args.size} items, {args.capacity} cached, Zipf skew {args.skew}, "
+          f"{args.drift:.0%} of the top {args.capacity} ranks drift per phase")
+    print(f"{'phase':<7}" + "".join(f"{name:>12}" for name in policies))
+    totals = dict.fromkeys(policies, 0)
+    for phase in range(args.phases):
+        if phase:
+            ranking = drifted(ranking, args.capacity, args.drift, rng)
+        replay = zipf_replay(ranking, args.replay, args.skew, seed=13 + phase)
+        hits = {}
+        for name, policy in policies.items():
+            hits[name] = sum(policy.access(key) for key in replay)
+            totals[name] += hits[name]
+        print(f"{phase + 1:<7}" + "".join(f"{hits[name] / args.replay:12.1%}" for name in policies))
+    print(f"{'all':<7}" + "".join(f"{totals[name] / (args.replay * args.phases):12.1%}" for name in policies))
+
+    policy = WTinyLFU(args.capacity)
+    policy.load(loaded)
+    pages = [replay[i:i + 10] for i in range(0, len(replay) - 10, 10)]
+    print(f"recording a 10-item result page: {timed(policy.record_all, pages):.1f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Tail latency of pathological fuzzy/smart queries with and without a search time budget."""
+import argparse, gc, random, time
+from resources.core.deadline import Deadline
+from resources.core.search_engine import ObjectSearchTrie
+from testing.benchmarks import synthetic_items
+
+def misspellings(items: list, count: int, seed: int = 19) -> list[str]:
+    """Names of 11+ characters with two random characters replaced (fuzzy distance 4 territory)."""
+    rng = random.Random(seed)
+    long_names = [i.name.lower() for i in items if len(i.name) > 10]
+    queries = []
+    for name in rng.sample(long_names, count):
+        chars = list(name)
+        for pos in rng.sample(range(len(chars)), 2):
+            chars[pos] = rng.choice("aeiourstnc")
+        queries.append("".join(chars))
+    return queries
+
+def percentiles(func, queries, budget: float | None) -> tuple[float, float, float]:
+    """p50 and p99 latency in ms (cyclic GC paused), and the share of searches cut short by the budget."""
+    latencies, partial = [], 0
+    gc.collect()
+    gc.disable()
+    try:
+        for q in queries:
+            deadline = Deadline(budget)
+            start = time.perf_counter()
+            func(q, deadline)
+            latencies.append((time.perf_counter() - start) * 1000)
+            partial += deadline.expired
+    finally:
+        gc.enable()
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)], partial / len(queries)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=20)
+    parser.add_argument("--engine", default="dp", choices=("dp", "automaton"))
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    index = ObjectSearchTrie(fuzzy_engine=args.engine)
+    for item in items:
+        index.insert(item.model_copy(), item.usage_count)
+    queries = misspellings(items, args.queries)
+    print(f"{args.size} names, {len(queries)} misspelled queries, distance 4, budget {args.budget_ms:g} ms")
+    searches = (("fuzzy", lambda q, d: index.fuzzy_search(q, 4, 10, deadline=d)),
+                ("smart", lambda q, d: index.smart_search(q, 4, 10, deadline=d)))
+    for label, search in searches:
+        for budget in (None, args.budget_ms / 1000):
+            p50, p99, partial = percentiles(search, queries, budget)
+            name = "no budget" if budget is None else "budget"
+            print(f"{label:<6} {name:<10} p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  partial {partial:6.1%}")
+
+if __name__ == "__main__":
+    main()
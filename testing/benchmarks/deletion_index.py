@@ -0,0 +1,42 @@
+"""Token candidate generation: trie walk versus the SymSpell deletion index."""
+import argparse, random, tracemalloc
+from resources.core.search_engine import ObjectSearchTrie
+from testing.benchmarks import synthetic_items, timed
+from testing.benchmarks.fuzzy_engine import typo_queries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    index = ObjectSearchTrie()
+    for item in items:
+        index.insert(item.model_copy(), item.usage_count)
+    rng = random.Random(3)
+    queries = [f"{q} {rng.choice(['pui', 'lapte', 'faina', 'rosii'])}" for q in typo_queries(items, args.queries)]
+    tokens = [q.split()[0] for q in queries]
+    trie = index.token_trie
+
+    tracemalloc.start()
+    index.set_deletion_index(True, 2)
+    index_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    deletion = trie.deletion_index
+    print(f"vocabulary {len(deletion)} tokens, {deletion.variant_count} deletion keys, {index_bytes / 2**20:.1f} MiB")
+    print(f"{'generator':<12}{'dist':>5}{'token us':>10}{'multi us':>10}")
+    for distance in (1, 2):
+        index.set_deletion_index(False)
+        expected = [[r.id for r in index.multi_token_fuzzy_search(q, 50, distance)] for q in queries]
+        walk_us = timed(lambda t: trie._token_iterative_fuzzy(t, distance, 200), tokens)
+        walk_multi = timed(lambda q: index.multi_token_fuzzy_search(q, 50, distance), queries)
+        index.set_deletion_index(True, 2)
+        results = [[r.id for r in index.multi_token_fuzzy_search(q, 50, distance)] for q in queries]
+        assert results == expected, "candidate generators disagree"
+        probe_us = timed(lambda t: trie._token_deletion_fuzzy(t, distance, 200), tokens)
+        probe_multi = timed(lambda q: index.multi_token_fuzzy_search(q, 50, distance), queries)
+        print(f"{'trie walk':<12}{distance:>5}{walk_us:>10.0f}{walk_multi:>10.0f}")
+        print(f"{'deletions':<12}{distance:>5}{probe_us:>10.0f}{probe_multi:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Filtered search: post-filtering full results versus filters pushed down into the traversal."""
+import argparse, random, time
+from resources.core.facets import SearchFilter
+from resources.core.search_engine import ObjectSearchTrie, normalize
+from testing.benchmarks import sample_queries, synthetic_items, timed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    index = ObjectSearchTrie()
+    start = time.perf_counter()
+    for item in items:
+        index.insert(item.model_copy(), item.usage_count)
+    print(f"{args.size} names indexed in {time.perf_counter() - start:.2f} s")
+    queries = sample_queries(items, args.queries)
+    pairs = [" ".join(random.Random(i).sample(queries, 2)) for i in range(len(queries))]
+    limit = args.limit
+    prefix, tokens = index.prefix_trie, index.token_trie
+
+    def post_filtered(results, search_filter, query):
+        return index._rank_results([r for r in results if search_filter.matches(r)], normalize(query), limit)
+
+    for search_filter in (SearchFilter("lactate"), SearchFilter(max_calories=100), SearchFilter("lactate", 100)):
+        matching = sum(map(search_filter.matches, items)) / len(items)
+        print(f"{search_filter!r}: {matching:.1%} of items match")
+        cases = [
+            ("prefix", queries,
+             lambda q: post_filtered(prefix.prefix_search(q, None), search_filter, q),
+             lambda q: index.prefix_search(q, limit, search_filter=search_filter)),
+            ("fuzzy d=1", queries,
+             lambda q: [r for r in prefix.fuzzy_search(q, 1) if search_filter.matches(r)][:limit],
+             lambda q: prefix.fuzzy_search(q, 1, limit, None, search_filter)),
+            ("multi prefix", pairs,
+             lambda q: post_filtered(tokens.multi_token_prefix_search(q), search_filter, q),
+             lambda q: index.multi_token_prefix_search(q, limit, search_filter=search_filter)),
+        ]
+        for label, batch, post, pushed in cases:
+            print(f"  {label:<12} post-filter {timed(post, batch):9.0f} us  pushed down {timed(pushed, batch):9.0f} us")
+
+if __name__ == "__main__":
+    main()
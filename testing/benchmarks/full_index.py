@@ -0,0 +1,114 @@
+"""Full-corpus index (FULL_INDEX=1): startup time and memory at catalog scale, no database access per search.
+
+For every size a SQLite table of synthetic ingredients is written, then a fresh process
+builds the ingredient cache over the whole table (no snapshot) and reports the build
+time, the RSS the build added (search index, infix index and usage counts), the index's
+own byte estimate, the latency of a search replay and the SQL statements the replay
+issued, which must be zero. Items are stored compact (the mode's default) or, for
+comparison, as the pydantic summaries the bounded cache uses. With ``--snapshot`` the
+built index is also saved and a restart restoring it (INDEX_SNAPSHOT_DIR) is measured.
+"""
+import argparse, os, tempfile, time
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+import resources.core.entity_cache as entity_cache
+from db.database import Base
+from db.models import Ingredients
+from resources.core.entity_cache import EntityCache, build_search_trie
+from routers.schemas import IngredientsSummary
+from testing.benchmarks import sample_queries, synthetic_items, timed
+from testing.benchmarks.prefork_memory import memory
+
+def in_child(work) -> object:
+    """Runs ``work()`` in a forked process and returns its repr-able result, so every run starts from the same RSS."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        status = 0
+        try:
+            os.write(write_fd, repr(work()).encode())
+        except BaseException as e:
+            os.write(write_fd, repr({"error": f"{type(e).__name__}: {e}"}).encode())
+            status = 1
+        finally:
+            os.close(write_fd)
+            os._exit(status)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        output = f.read()
+    _, status = os.waitpid(pid, 0)
+    return eval(output) if output else {"error": f"worker died (wait status {status}), e.g. out of memory"}
+
+def write_table(url: str, size: int):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    items = synthetic_items(size)
+    with engine.begin() as conn:
+        for start in range(0, size, 50000):
+            conn.execute(Ingredients.__table__.insert(), [item.model_dump() for item in items[start:start + 50000]])
+    return size
+
+def build(url: str, layout: str, compact: bool, queries: list[str], snapshot_dir: str | None = None,
+          save: bool = False) -> dict:
+    """Builds (or, with ``snapshot_dir``, restores) a full-corpus cache; ``save`` then writes its snapshot."""
+    engine = create_engine(url)
+    entity_cache.SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    entity_cache.TRIE_LAYOUT = layout
+    entity_cache.FULL_INDEX = True
+    entity_cache.INDEX_SNAPSHOT_DIR = None if save else snapshot_dir
+    before = memory()["rss"]
+    start = time.perf_counter()
+    cache = EntityCache(build_search_trie(64), Ingredients, IngredientsSummary)
+    if not compact:
+        cache.item_cls = IngredientsSummary
+    cache.build_cache()
+    seconds = time.perf_counter() - start
+    rss = memory()["rss"] - before
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    cache.result_cache.max_entries = 0  # Every search walks the index
+    latency = timed(lambda q: cache.smart_search(q, limit=10), queries)
+    searched = len(statements)
+    if save:
+        entity_cache.INDEX_SNAPSHOT_DIR = snapshot_dir
+        cache.save_snapshot()
+    return {"items": len(cache._cached_ids), "seconds": seconds, "rss": rss / 1024,
+            "estimate": cache.search_index.stats()["bytes"]["total"] / 2**20, "latency": latency,
+            "statements": searched}
+
+def report(label: str, r: dict):
+    if "error" in r:
+        print(f"  {label:<37} failed: {r['error']}")
+        return
+    print(f"  {label:<37} startup {r['seconds']:7.1f} s  RSS +{r['rss']:7.0f} MiB  "
+          f"(index estimate {r['estimate']:6.0f} MiB)  smart search {r['latency']:6.0f} us  "
+          f"SQL statements {r['statements']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--layouts", nargs="+", choices=("dict", "radix"), default=["dict", "radix"])
+    parser.add_argument("--pydantic", action="store_true", help="also measure pydantic summaries as items")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--snapshot", action="store_true", help="also measure a restart from an index snapshot")
+    args = parser.parse_args()
+    queries = sample_queries(synthetic_items(2000), args.queries)  # synthetic_items(n) starts with these names
+    workdir = tempfile.mkdtemp()
+    snapshot_dir = workdir if args.snapshot else None  # Without --snapshot every build reads the table
+    for size in args.sizes:
+        url = f"sqlite:///{os.path.join(workdir, f'full{size}.db')}"
+        start = time.perf_counter()
+        in_child(lambda: write_table(url, size))
+        print(f"{size} rows written in {time.perf_counter() - start:.0f} s")
+        for layout in args.layouts:
+            for compact in (True, False) if args.pydantic else (True,):
+                label = f"{layout}, {'compact' if compact else 'pydantic'} items"
+                report(label, in_child(lambda: build(url, layout, compact, queries, snapshot_dir, save=args.snapshot)))
+                if args.snapshot:
+                    report(f"{label} (snapshot)", in_child(lambda: build(url, layout, compact, queries, workdir)))
+                    os.remove(os.path.join(workdir, f"{Ingredients.__tablename__}.idx"))
+        os.remove(os.path.join(workdir, f"full{size}.db"))
+
+if __name__ == "__main__":
+    main()
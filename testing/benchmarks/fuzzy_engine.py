@@ -0,0 +1,46 @@
+"""A/B comparison of the DP-row fuzzy matcher against the Levenshtein automaton."""
+import argparse, random, tracemalloc
+from resources.core.search_engine import ObjectSearchTrie
+from testing.benchmarks import synthetic_items, timed
+
+def typo_queries(items, count: int, seed: int = 5) -> list[str]:
+    """Full names of 4-14 characters with one substituted character, like a mistyped search."""
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        name = rng.choice(items).name.lower()[:rng.randint(4, 14)]
+        pos = rng.randrange(len(name))
+        queries.append(name[:pos] + rng.choice("aeiourst") + name[pos + 1:])
+    return queries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=40)
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    index = ObjectSearchTrie()
+    for item in items:
+        index.insert(item.model_copy(), item.usage_count)
+    queries = typo_queries(items, args.queries)
+    print(f"{'engine':<10}{'dist':>5}{'fuzzy us':>11}{'peak KiB':>10}{'multi us':>11}")
+    for distance in (1, 2, 3, 4):
+        expected = None
+        for engine in ("dp", "automaton"):
+            index.set_fuzzy_engine(engine)
+            results = ([[r.id for r in index.fuzzy_search(q, distance, 50)] for q in queries],
+                       [[r.id for r in index.multi_token_fuzzy_search(q + " pui", 50, min(distance, 2))] for q in queries])
+            if expected is None:
+                expected = results
+            assert results == expected, "engines disagree"
+            fuzzy_us = timed(lambda q: index.fuzzy_search(q, distance, 50), queries)
+            multi_us = timed(lambda q: index.multi_token_fuzzy_search(q + " pui", 50, min(distance, 2)), queries)
+            tracemalloc.start()
+            for q in queries:
+                index.fuzzy_search(q, distance, 50)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{engine:<10}{distance:>5}{fuzzy_us:>11.0f}{peak / 1024:>10.0f}{multi_us:>11.0f}")
+
+if __name__ == "__main__":
+    main()
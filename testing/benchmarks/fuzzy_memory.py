@@ -0,0 +1,63 @@
+"""DP fuzzy traversal: per-edge rows, prefixes and row cache versus reusable per-depth rows."""
+import argparse, tracemalloc
+from resources.core.search_engine import SearchTrie, normalize
+from testing.benchmarks import sample_queries, synthetic_items, timed
+
+def legacy_iterative_fuzzy(trie: SearchTrie, word: str, max_distance: int) -> list:
+    """The previous walk: a new row and prefix string per edge, every row kept in a cache."""
+    results = []
+    stack = [(trie.root, "", list(range(len(word) + 1)), 0)]
+    row_cache = {}
+    columns = len(word) + 1
+    while stack:
+        node, prefix, prev_row, depth = stack.pop()
+        if depth > trie.max_trie_depth:
+            continue
+        if node.is_end_of_word and node.value is not None and prev_row[-1] <= max_distance:
+            results.append({"node": node, "distance": prev_row[-1]})
+        for char, child in node.children.items():
+            next_prefix = prefix + char
+            current_row = row_cache.get(next_prefix)
+            if current_row is None:
+                current_row = [prev_row[0] + 1]
+                for col in range(1, columns):
+                    current_row.append(min(current_row[col - 1] + 1, prev_row[col] + 1,
+                                           prev_row[col - 1] + (word[col - 1] != char)))
+                row_cache[next_prefix] = current_row
+            if min(current_row) <= max_distance:
+                stack.append((child, next_prefix, current_row, depth + 1))
+    return results
+
+def peak_bytes(func, queries) -> float:
+    """Mean tracemalloc peak of ``func(query)`` in bytes."""
+    total = 0
+    tracemalloc.start()
+    for q in queries:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        func(q)
+        total += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return total / len(queries)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--distance", type=int, default=2)
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    trie = SearchTrie()
+    for item in items:
+        trie.insert(item.model_copy(), item.usage_count)
+    # Whole first tokens and typos of them: the searches the fuzzy endpoint sees
+    queries = [normalize(q) for q in sample_queries(items, args.queries)]
+    queries += [q[:1] + q[2:] + "a" for q in queries]
+    print(f"{args.size} names, {len(queries)} queries, max distance {args.distance}")
+    walks = (("legacy", lambda q: legacy_iterative_fuzzy(trie, q, args.distance)),
+             ("row buffers", lambda q: trie._iterative_fuzzy(q, args.distance)))
+    for label, walk in walks:
+        print(f"{label:<12} {timed(walk, queries):8.0f} us/query  peak {peak_bytes(walk, queries) / 1024:8.1f} KiB/query")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Search latency and throughput of an in-process EntityCache versus the shared index server."""
+import argparse, multiprocessing, os, tempfile, threading, time
+from db.models import Ingredients
+from resources.core.entity_cache import EntityCache
+from resources.core.index_client import RemoteEntityCache
+from resources.core.index_server import IndexServer
+from resources.core.result_cache import ResultCache
+from resources.core.search_engine import ObjectSearchTrie
+from routers.schemas import IngredientsSummary
+from testing.benchmarks import sample_queries, synthetic_items, timed
+
+def build(items) -> EntityCache:
+    cache = EntityCache(ObjectSearchTrie(), Ingredients, IngredientsSummary)
+    cache.result_cache = ResultCache(0)  # Measure the searches, not the result cache
+    for item in items:
+        cache.search_index.insert(item.model_copy(), item.usage_count)
+    return cache
+
+def serve(path: str, items):
+    cache = build(items)
+    IndexServer(path, {"ingredients": cache, "recipes": cache}).serve_forever()
+
+def throughput(search, queries, threads: int) -> float:
+    """Searches per second with ``threads`` threads sharing the queries."""
+    chunks = [queries[i::threads] for i in range(threads)]
+    workers = [threading.Thread(target=lambda chunk: [search(q) for q in chunk], args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return len(queries) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8, help="concurrent requests of one worker")
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    queries = sample_queries(items, args.queries)
+    path = os.path.join(tempfile.mkdtemp(), "index.sock")
+    server = multiprocessing.get_context("fork").Process(target=serve, args=(path, items), daemon=True)
+    server.start()
+    local = build(items)
+    remote = RemoteEntityCache(path, "ingredients")
+    remote.build_cache()
+    try:
+        for search_type in ("prefix_search", "smart_search"):
+            for label, cache in (("in-process", local), ("index server", remote)):
+                search = getattr(cache, search_type)
+                run = lambda q: search(q, limit=10)
+                print(f"{search_type:<14} {label:<13} {timed(run, queries):8.1f} us/search  "
+                      f"{throughput(run, queries, args.threads):9.0f} searches/s with {args.threads} threads")
+    finally:
+        server.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Substring search: leading-wildcard ILIKE on SQLite versus the in-memory trigram index."""
+import argparse, random, tracemalloc
+from sqlalchemy import Column, Integer, String, create_engine, select
+from sqlalchemy.orm import declarative_base, Session
+from resources.core.trigram_index import TrigramIndex
+from testing.benchmarks import synthetic_items, timed
+
+Base = declarative_base()
+
+class Names(Base):
+    __tablename__ = "names"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, index=True)
+    usage_count = Column(Integer, default=0)
+
+def infix_queries(items: list, count: int, seed: int = 5) -> list[str]:
+    """3-6 character fragments cut from the middle of random names."""
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        name = rng.choice(items).name.lower()
+        if len(name) < 5:
+            continue
+        start = rng.randrange(1, len(name) - 3)
+        queries.append(name[start:start + rng.randint(3, 6)].strip() or name[1:4])
+    return queries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(Names(id=i.id, name=i.name, usage_count=i.usage_count) for i in items)
+        session.commit()
+    queries = infix_queries(items, args.queries)
+
+    tracemalloc.start()
+    index = TrigramIndex()
+    index.rebuild((i.id, i.name) for i in items)
+    index_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{len(index)} names, {index.trigram_count} trigrams, {index_bytes / 2**20:.1f} MiB")
+
+    with Session(engine) as session:
+        def ilike(q):
+            stmt = (select(Names.id).where(Names.name.ilike(f"%{q}%"))
+                    .order_by(Names.usage_count.desc()).limit(args.limit))
+            return session.execute(stmt).all()
+        db_us = timed(ilike, queries)
+    index_us = timed(lambda q: index.search(q, args.limit), queries)
+    print(f"{'ilike scan':<14}{db_us:>10.0f} us/query")
+    print(f"{'trigram index':<14}{index_us:>10.0f} us/query")
+
+if __name__ == "__main__":
+    main()
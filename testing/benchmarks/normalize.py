@@ -0,0 +1,56 @@
+"""Normalization cost: the original NFD filter versus the memoized fast path and stored keys."""
+import argparse, unicodedata
+from resources.core.search_engine import ObjectSearchTrie, normalize, tokenize
+from testing.benchmarks import sample_queries, synthetic_items, timed
+
+def legacy_normalize(text: str) -> str:
+    """normalize() as it was before memoization: NFD + category filter on every call."""
+    normalized = unicodedata.normalize('NFD', text)
+    return ''.join(c for c in normalized if unicodedata.category(c) != 'Mn').lower()
+
+def legacy_rank(index: ObjectSearchTrie, results: list, query: str) -> list:
+    """_rank_results renormalizing every candidate name, as before names were stored at insert."""
+    qlen = len(query)
+    def score(item) -> float:
+        name = legacy_normalize(item.name)
+        prefix_bonus = 1.5 if name.startswith(query) else 1.0
+        return item.usage_count * index.usage_weight + prefix_bonus * index.prefix_boost_weight - abs(len(name) - qlen) * 0.05
+    return sorted(results, key=score, reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=500)
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    index = ObjectSearchTrie()
+    for item in items:
+        index.insert(item.model_copy(), item.usage_count)
+    names = [i.name for i in items[:5000]]
+    # The test data is ASCII-only; add Romanian diacritics to exercise the Unicode path
+    accented = [n.replace("a", "ă").replace("s", "ș").replace("t", "ț") for n in names]
+
+    print(f"{'normalize':<28}{'legacy us':>10}{'new us':>10}")
+    for label, sample in (("ascii names", [n for n in names if n.isascii()]), ("accented names", accented)):
+        legacy_us = timed(legacy_normalize, sample)
+        for name in sample:  # warm the memo so the timing below is the steady-state path
+            normalize(name)
+        new_us = timed(normalize, sample)
+        print(f"{label:<28}{legacy_us:>10.2f}{new_us:>10.2f}")
+    for name in names:
+        tokenize(name)
+    print(f"{'tokenize (memoized)':<28}{timed(lambda n: legacy_normalize(n).split(), names):>10.2f}"
+          f"{timed(tokenize, names):>10.2f}")
+
+    queries = sample_queries(items, args.queries)
+    pools = {q: index.prefix_trie.prefix_search(q, args.candidates) for q in queries}
+    legacy_us = timed(lambda q: legacy_rank(index, pools[q], legacy_normalize(q)), queries)
+    stored_us = timed(lambda q: index._rank_results(pools[q], normalize(q)), queries)
+    mean_pool = sum(len(p) for p in pools.values()) / len(pools)
+    print(f"ranking ~{mean_pool:.0f} candidates/query: legacy {legacy_us:.0f} us, stored keys {stored_us:.0f} us")
+    smart_us = timed(lambda q: index.smart_search(q, 2, 50), queries)
+    print(f"smart_search end to end: {smart_us:.0f} us/query")
+
+if __name__ == "__main__":
+    main()
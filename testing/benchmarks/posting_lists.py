@@ -0,0 +1,56 @@
+"""Multi-token prefix search: per-token DFS and set intersection versus posting-list galloping."""
+import argparse, random
+from resources.core.search_engine import TokenSearchTrie, tokenize
+from testing.benchmarks import synthetic_items, timed
+
+def multi_token_queries(items: list, count: int, seed: int = 3) -> list[str]:
+    """Two or three token prefixes taken from one random name, so every query has matches."""
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        tokens = tokenize(rng.choice(items).name)
+        if len(tokens) < 2:
+            continue
+        picked = rng.sample(tokens, min(len(tokens), rng.randint(2, 3)))
+        queries.append(" ".join(t[:rng.randint(2, max(2, len(t)))] for t in picked))
+    return queries
+
+def legacy_multi_token_prefix_search(trie: TokenSearchTrie, query: str) -> set:
+    """The previous implementation: collect every token's id set by DFS, then intersect."""
+    sets = []
+    for token in tokenize(query):
+        node = trie._prefix_node(trie.root, token)
+        if node is None:
+            return set()
+        results = []
+        trie._dfs(node, token, results)
+        ids = set()
+        for _, found in results:
+            ids |= found
+        sets.append(ids)
+    return set.intersection(*sets) if sets else set()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    trie = TokenSearchTrie()
+    for item in items:
+        trie.insert(item.model_copy(), item.usage_count)
+    queries = multi_token_queries(items, args.queries)
+    common = [q for q in queries if any(t in ("de", "d") for t in q.split())]
+    print(f"{args.size} names, {len(queries)} queries ({len(common)} with the token 'de')")
+    for q in queries:
+        assert {r.id for r in trie.multi_token_prefix_search(q)} == legacy_multi_token_prefix_search(trie, q), q
+    for label, batch in (("all", queries), ("with 'de'", common)):
+        legacy_us = timed(lambda q: legacy_multi_token_prefix_search(trie, q), batch)
+        postings_us = timed(lambda q: trie.multi_token_prefix_search(q), batch)
+        limited_us = timed(lambda q: trie.multi_token_prefix_search(q, args.limit), batch)
+        print(f"{label:<10} dfs+sets {legacy_us:8.0f} us  postings {postings_us:8.0f} us  "
+              f"postings limit {args.limit} {limited_us:8.0f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Memory per worker: every worker building its own index versus one index built before fork (prefork.py).
+
+Each worker runs the same mix of searches and index writes, then a full collection, and
+reports its memory from /proc/self/smaps_rollup while all workers are alive: RSS, PSS
+(shared pages split between the processes mapping them) and USS (pages private to it).
+"""
+import argparse, gc, os, random
+from db.models import Ingredients
+from resources.core.entity_cache import EntityCache
+from resources.core.result_cache import ResultCache
+from resources.core.search_engine import ObjectSearchTrie
+from routers.schemas import IngredientsSummary
+from testing.benchmarks import sample_queries, synthetic_items
+
+def memory() -> dict[str, int]:
+    """RSS, PSS and USS of this process in KiB."""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[name] = int(value.split()[0])
+    return {"rss": fields["Rss"], "pss": fields["Pss"], "uss": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+def build(items) -> EntityCache:
+    cache = EntityCache(ObjectSearchTrie(snapshot_reads=True), Ingredients, IngredientsSummary)
+    cache.result_cache = ResultCache(0)  # Every search walks the index
+    for item in items:
+        cache.search_index.insert(item.model_copy(), item.usage_count)
+    return cache
+
+def workload(cache: EntityCache, items, queries, writes: int, seed: int):
+    rng = random.Random(seed)
+    for q in queries:
+        cache.prefix_search(q, limit=10)
+        cache.smart_search(q, limit=10)
+    for i in range(writes):
+        cache.search_index.increment_usage(rng.choice(items))
+        if i % 10 == 0:
+            cache.add_ingredient(IngredientsSummary.model_validate({**rng.choice(items).model_dump(),
+                                                                    "id": len(items) + seed * writes + i + 1}))
+    gc.collect()
+
+def run_workers(count: int, work) -> list[dict[str, int]]:
+    """Forks ``count`` workers running ``work(seed)``; returns their memory, measured while all are alive."""
+    release_r, release_w = os.pipe()
+    reports, pids = [], []
+    for seed in range(count):
+        report_r, report_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(release_w)
+            work(seed)
+            os.write(report_w, repr(memory()).encode())
+            os.close(report_w)
+            os.read(release_r, 1)  # Stay mapped until every worker has measured
+            os._exit(0)
+        os.close(report_w)
+        reports.append(report_r)
+        pids.append(pid)
+    results = []
+    for report_r in reports:
+        with os.fdopen(report_r) as f:
+            results.append(eval(f.read()))
+    os.close(release_w)
+    os.close(release_r)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    return results
+
+def report(label: str, results: list[dict[str, int]]):
+    mean = {key: sum(r[key] for r in results) / len(results) / 1024 for key in ("rss", "pss", "uss")}
+    print(f"{label:<42} per worker: RSS {mean['rss']:7.1f} MiB  PSS {mean['pss']:7.1f} MiB  USS {mean['uss']:7.1f} MiB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--writes", type=int, default=500, help="index writes per worker (the overlay)")
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    queries = sample_queries(items, args.queries)
+    gc.collect()
+    base = memory()
+    print(f"{args.size} items, {args.workers} workers; parent before any index: RSS {base['rss'] / 1024:.1f} MiB")
+
+    def own_index(seed):
+        workload(build(items), items, queries, args.writes, seed)
+    report("own index per worker (uvicorn --workers)", run_workers(args.workers, own_index))
+
+    cache = build(items)
+    gc.collect()
+    def shared_index(seed):
+        workload(cache, items, queries, args.writes, seed)
+    report("pre-fork, no gc.freeze", run_workers(args.workers, shared_index))
+    gc.freeze()
+    report("pre-fork + gc.freeze (prefork.py)", run_workers(args.workers, shared_index))
+
+if __name__ == "__main__":
+    main()
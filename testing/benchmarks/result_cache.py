@@ -0,0 +1,48 @@
+"""EntityCache result cache under a Zipfian query replay: hit ratio, memory and latency."""
+import argparse, random
+from db.models import Ingredients
+from resources.core.entity_cache import EntityCache
+from resources.core.result_cache import ResultCache
+from resources.core.search_engine import ObjectSearchTrie
+from routers.schemas import IngredientsSummary
+from testing.benchmarks import sample_queries, synthetic_items, timed
+
+def zipf_replay(queries: list[str], length: int, skew: float = 1.1, seed: int = 13) -> list[str]:
+    """``length`` draws from ``queries`` where the i-th query has weight 1 / i**skew."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** skew for rank in range(len(queries))]
+    return rng.choices(queries, weights, k=length)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--replay", type=int, default=20000)
+    parser.add_argument("--entries", type=int, default=2048)
+    parser.add_argument("--writes", type=int, default=0, help="index writes spread over the replay")
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    cache = EntityCache(ObjectSearchTrie(), Ingredients, IngredientsSummary)
+    for item in items:
+        cache.search_index.insert(item.model_copy(), item.usage_count)
+    distinct = sorted(set(sample_queries(items, args.replay)))
+    random.Random(17).shuffle(distinct)  # popularity rank independent of spelling
+    replay = zipf_replay(distinct, args.replay)
+    write_every = args.replay // args.writes if args.writes else 0
+
+    for search_type in ("prefix_search", "smart_search"):
+        search = getattr(cache, search_type)
+        cache.result_cache = ResultCache(0)
+        uncached_us = timed(lambda q: search(q, limit=10), replay)
+        cache.result_cache = ResultCache(args.entries, ttl=3600)
+        counter = iter(range(len(replay)))
+        def run(q):
+            if write_every and next(counter) % write_every == 0:
+                cache._bump_generation()
+            search(q, limit=10)
+        cached_us = timed(run, replay)
+        stats = cache.result_cache.stats()
+        print(f"{search_type:<14} {len(distinct)} distinct  uncached {uncached_us:8.1f} us  cached {cached_us:8.1f} us  "
+              f"hit ratio {stats['hit_ratio']:.1%}  {stats['entries']} entries  ~{stats['bytes'] / 2**20:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
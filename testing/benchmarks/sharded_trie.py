@@ -0,0 +1,85 @@
+"""Concurrent writers and readers: one trie lock versus per-shard locks (resources.core.sharded_trie).
+
+Half the items are indexed up front; writer threads then insert the other half (a bulk
+seeding job) while reader threads run prefix searches. Reported: write and read throughput
+and the read latency percentiles while the writers are active.
+"""
+import argparse, threading, time
+from resources.core.search_engine import ObjectSearchTrie, SearchTrie, TokenSearchTrie
+from resources.core.sharded_trie import ShardedSearchTrie, ShardedTokenSearchTrie
+from testing.benchmarks import sample_queries, synthetic_items
+
+def build(shards: int, snapshot_reads: bool) -> ObjectSearchTrie:
+    if shards == 1:
+        return ObjectSearchTrie(snapshot_reads=snapshot_reads)
+    return ObjectSearchTrie(prefix_trie=ShardedSearchTrie.create(shards, SearchTrie),
+                            token_trie=ShardedTokenSearchTrie.create(shards, TokenSearchTrie),
+                            snapshot_reads=snapshot_reads)
+
+def contents(index: ObjectSearchTrie, queries: list[str]) -> tuple:
+    """Per-item weights and the ids matching each query, which do not depend on insertion order."""
+    return index.weights(), [{r.id for r in index.prefix_trie.prefix_search(q)} for q in queries]
+
+def run(index: ObjectSearchTrie, batches: list, queries: list[str], readers: int) -> dict:
+    done = threading.Event()
+    latencies: list[float] = []
+    reads = [0] * readers
+    def write(batch):
+        for item in batch:
+            index.insert(item.model_copy(), item.usage_count)
+    def read(slot):
+        i = slot
+        while not done.is_set():
+            start = time.perf_counter()
+            index.prefix_search(queries[i % len(queries)], 10)
+            latencies.append(time.perf_counter() - start)
+            reads[slot] += 1
+            i += readers
+    reader_threads = [threading.Thread(target=read, args=(slot,)) for slot in range(readers)]
+    writer_threads = [threading.Thread(target=write, args=(batch,)) for batch in batches]
+    for thread in reader_threads:
+        thread.start()
+    start = time.perf_counter()
+    for thread in writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3 if latencies else 0.0
+    return {"writes": sum(map(len, batches)) / elapsed, "reads": sum(reads) / elapsed,
+            "p50": pick(0.5), "p99": pick(0.99), "max": pick(1.0)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=40000)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--snapshot-reads", action="store_true", help="copy-on-write writes, lock-free reads")
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    preload, seeding = items[:args.size // 2], items[args.size // 2:]
+    # Readers search names of the preloaded half, writers bring in the rest
+    queries = sample_queries(preload, 2000)
+    batches = [seeding[i::args.writers] for i in range(args.writers)]
+    reference = build(1, False)
+    for item in items:
+        reference.insert(item.model_copy(), item.usage_count)
+    expected = contents(reference, queries[:200])
+    print(f"{len(seeding)} inserts by {args.writers} writers, {args.readers} readers, "
+          f"{'snapshot' if args.snapshot_reads else 'locked'} reads")
+    for shards in args.shards:
+        index = build(shards, args.snapshot_reads)
+        for item in preload:
+            index.insert(item.model_copy(), item.usage_count)
+        r = run(index, batches, queries, args.readers)
+        assert contents(index, queries[:200]) == expected, f"{shards} shards: index differs from a single trie"
+        print(f"{shards:>3} shards  {r['writes']:8.0f} inserts/s  {r['reads']:8.0f} searches/s  "
+              f"search p50 {r['p50']:6.2f} ms  p99 {r['p99']:6.2f} ms  max {r['max']:7.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Mixed read/write throughput with the trie lock versus copy-on-write snapshot reads."""
+import argparse, random, threading, time
+from resources.core.search_engine import ObjectSearchTrie
+from testing.benchmarks import synthetic_items, sample_queries
+
+def run(index: ObjectSearchTrie, queries, extra_items, readers: int, seconds: float):
+    """Runs reader threads (prefix then fuzzy search) against one insert/delete writer.
+
+    Returns reads/s, prefix-search p99 ms, writes/s and write p99 ms.
+    """
+    stop = threading.Event()
+    read_latencies: list[list[float]] = [[] for _ in range(readers)]
+    write_latencies: list[float] = []
+
+    def reader(slot: int):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            q = rng.choice(queries)
+            start = time.perf_counter()
+            index.prefix_search(q, 10)
+            read_latencies[slot].append(time.perf_counter() - start)
+            index.fuzzy_search(q, 2, 10)
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            item = extra_items[i % len(extra_items)]
+            start = time.perf_counter()
+            index.insert(item)
+            index.delete(item)
+            write_latencies.append(time.perf_counter() - start)
+            i += 1
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    prefix_latencies = sorted(x for per_thread in read_latencies for x in per_thread)
+    write_latencies.sort()
+    def p99(values):
+        return values[int(len(values) * 0.99)] * 1000 if values else 0.0
+    return len(prefix_latencies) / seconds, p99(prefix_latencies), len(write_latencies) / seconds, p99(write_latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    items = synthetic_items(args.size + 500)
+    base, extra = items[:args.size], items[args.size:]
+    queries = sample_queries(base, 200)
+    print(f"{'mode':<10}{'reads/s':>10}{'prefix p99 ms':>15}{'writes/s':>10}{'write p99 ms':>14}")
+    for mode in ("lock", "snapshot"):
+        index = ObjectSearchTrie(snapshot_reads=(mode == "snapshot"))
+        for item in base:
+            index.insert(item.model_copy(), item.usage_count)
+        reads, read_p99, writes, write_p99 = run(index, queries, [i.model_copy() for i in extra], args.readers, args.seconds)
+        print(f"{mode:<10}{reads:>10.0f}{read_p99:>15.2f}{writes:>10.0f}{write_p99:>14.2f}")
+
+if __name__ == "__main__":
+    main()
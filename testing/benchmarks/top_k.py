@@ -0,0 +1,43 @@
+"""Ranking of broad queries: full sort then slice versus bounded heap selection with pruning."""
+import argparse, random
+from resources.core.search_engine import ObjectSearchTrie, normalize
+from testing.benchmarks import synthetic_items, timed
+
+def broad_queries(items: list, count: int, seed: int = 21) -> list[str]:
+    """1-3 character fragments of random names: each one matches thousands of items."""
+    rng = random.Random(seed)
+    tokens = [t for i in items[:2000] for t in i.name.lower().split() if len(t) >= 3]
+    return [rng.choice(tokens)[:rng.randint(1, 3)] for _ in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--engine", default="automaton", choices=("dp", "automaton"))
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    index = ObjectSearchTrie(fuzzy_engine=args.engine)
+    for item in items:
+        index.insert(item.model_copy(), item.usage_count)
+    queries = broad_queries(items, args.queries)
+    pairs = [" ".join(random.Random(len(q)).sample(queries, 2)) for q in queries]
+    limit = args.limit
+    prefix, tokens = index.prefix_trie, index.token_trie
+    unranked = {q: prefix.prefix_search(q, None) for q in queries}
+    matched = sum(map(len, unranked.values())) // len(queries)
+    print(f"{args.size} names, {len(queries)} queries, ~{matched} prefix matches each, limit {limit}")
+    cases = [
+        ("fuzzy d=2", queries,
+         lambda q: prefix.fuzzy_search(q, 2)[:limit], lambda q: prefix.fuzzy_search(q, 2, limit)),
+        ("token fuzzy", pairs,
+         lambda q: tokens.fuzzy_search(q, 2)[:limit], lambda q: tokens.fuzzy_search(q, 2, limit)),
+        ("rank", queries,
+         lambda q: index._rank_results(unranked[q], normalize(q))[:limit],
+         lambda q: index._rank_results(unranked[q], normalize(q), limit)),
+    ]
+    for label, batch, full_sort, heap in cases:
+        print(f"{label:<12} sort+slice {timed(full_sort, batch):9.0f} us  top-k heap {timed(heap, batch):9.0f} us")
+
+if __name__ == "__main__":
+    main()
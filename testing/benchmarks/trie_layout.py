@@ -0,0 +1,48 @@
+"""Memory and latency comparison of the dict trie layout against the radix layout."""
+import argparse, gc, time, tracemalloc
+from resources.core.search_engine import ObjectSearchTrie
+from resources.core.radix_trie import RadixSearchTrie, RadixTokenSearchTrie
+from testing.benchmarks import synthetic_items, sample_queries, timed
+
+def build(layout: str, items):
+    """Builds an index for ``layout`` and returns (index, build seconds, traced bytes)."""
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    if layout == "radix":
+        index = ObjectSearchTrie(prefix_trie=RadixSearchTrie(), token_trie=RadixTokenSearchTrie())
+    else:
+        index = ObjectSearchTrie()
+    for item in items:
+        index.insert(item.model_copy(), item.usage_count)
+    elapsed = time.perf_counter() - start
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return index, elapsed, used
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    queries = sample_queries(items, args.queries)
+    print(f"{'layout':<8}{'nodes':>10}{'MiB':>9}{'build s':>9}{'prefix us':>11}{'fuzzy us':>10}{'smart us':>10}")
+    expected = None
+    for layout in ("dict", "radix"):
+        index, build_s, used = build(layout, items)
+        results = ([[r.id for r in index.prefix_search(q, 10)] for q in queries],
+                   [[r.id for r in index.fuzzy_search(q, 1, 10)] for q in queries[:50]],
+                   [[r.id for r in index.smart_search(q, 1, 10)] for q in queries[:50]])
+        if expected is None:
+            expected = results
+        assert results == expected, "layouts disagree"
+        nodes = index.prefix_trie.node_count() + index.token_trie.node_count()
+        prefix_us = timed(lambda q: index.prefix_search(q, 10), queries)
+        fuzzy_us = timed(lambda q: index.fuzzy_search(q, 1, 10), queries[:50])
+        smart_us = timed(lambda q: index.smart_search(q, 1, 10), queries[:50])
+        print(f"{layout:<8}{nodes:>10}{used / 2**20:>9.1f}{build_s:>9.2f}{prefix_us:>11.1f}{fuzzy_us:>10.1f}{smart_us:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Per-keystroke cost of typing whole names: fresh searches versus resumed sessions."""
+import argparse, random
+from resources.core.search_engine import ObjectSearchTrie
+from resources.core.typeahead import SearchSession
+from testing.benchmarks import synthetic_items, timed
+
+def keystrokes(items: list, count: int, seed: int = 9) -> list[list[str]]:
+    """Every prefix (from 2 characters up) of ``count`` random names of 12+ characters."""
+    rng = random.Random(seed)
+    long_names = [i.name.lower() for i in items if len(i.name) >= 12]
+    return [[name[:n] for n in range(2, len(name) + 1)] for name in rng.sample(long_names, count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--names", type=int, default=30)
+    parser.add_argument("--distance", type=int, default=2)
+    args = parser.parse_args()
+    items = synthetic_items(args.size)
+    index = ObjectSearchTrie()
+    for item in items:
+        index.insert(item.model_copy(), item.usage_count)
+    typing = keystrokes(items, args.names)
+    flat = [q for prefixes in typing for q in prefixes]
+    trie = index.prefix_trie
+    print(f"{len(typing)} names typed, {len(flat)} keystrokes, max distance {args.distance}")
+    print(f"{'search':<10}{'fresh dp':>10}{'automaton':>11}{'session':>10}  (us/keystroke)")
+
+    def typed_with_session(search):
+        def run(prefixes):
+            session = SearchSession()
+            for q in prefixes:
+                search(q, session)
+        return timed(run, typing) * len(typing) / len(flat)
+
+    fresh = {}
+    for engine in ("dp", "automaton"):
+        index.set_fuzzy_engine(engine)
+        fresh[engine] = timed(lambda q: trie.fuzzy_search(q, args.distance), flat)
+    resumed = typed_with_session(lambda q, s: trie.resume_fuzzy_search(q, args.distance, s))
+    print(f"{'fuzzy':<10}{fresh['dp']:>10.0f}{fresh['automaton']:>11.0f}{resumed:>10.0f}")
+    prefix_fresh = timed(lambda q: trie.prefix_search(q, 10), flat)
+    prefix_resumed = typed_with_session(lambda q, s: trie.resume_prefix_search(q, 10, s))
+    print(f"{'prefix':<10}{prefix_fresh:>10.1f}{'':>11}{prefix_resumed:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ from testing.keywords.mt_profile import MtProfile
 from fastapi.testclient import TestClient
 from testing.keywords.mt_ingredients import MTIngredients
 from testing.keywords.mt_recipes import MTRecipes
+from testing.keywords.mt_admin import MTAdmin
 from main import app
 
 class MealTracker:
@@ -12,6 +13,7 @@ class MealTracker:
         self.mt_profile = MtProfile(self.client)
         self.mt_ingredients = MTIngredients(self.client,self.mt_profile)
         self.mt_recipes = MTRecipes(self.client,self.mt_profile)
+        self.mt_admin = MTAdmin(self.client,self.mt_profile)
 
     def create_profiles(self):
         # Delegate the creation of a new profile to the MtProfile instance
@@ -68,8 +70,17 @@ class MealTracker:
         """Create ingredients from a predefined JSON file."""
         return self.mt_ingredients.create_ingredients_from_file()
 
-    def search_ingredients(self, query: str, search_type: str = "normal", limit: int = 10):
-        return self.mt_ingredients.search_ingredient_in_database(ingredient_name=query, type=search_type, limit=limit)
+    def search_ingredients(self, query: str, search_type: str = "normal", limit: int = 10, session: str = None):
+        return self.mt_ingredients.search_ingredient_in_database(ingredient_name=query, type=search_type, limit=limit, session=session)
+
+    def search_ingredients_page(self, query: str, search_type: str = "normal", limit: int = 10, category: str = None, max_calories: float = None):
+        return self.mt_ingredients.search_ingredients_page(query, type=search_type, limit=limit, category=category, max_calories=max_calories)
+
+    def create_ingredient_in_other_worker(self, ingredient_data: dict):
+        return self.mt_ingredients.create_ingredient_in_other_worker(ingredient_data)
+
+    def apply_ingredient_changes(self):
+        return self.mt_ingredients.apply_ingredient_changes()
 
     def get_ingredient_by_id(self, ingredient_id: int):
         return self.mt_ingredients.get_ingredient_by_id(ingredient_id)
@@ -89,6 +100,9 @@ class MealTracker:
     def search_recipes(self, query: str, search_type: str = "normal"):
         return self.mt_recipes.search_recipes(query, search_type)
     
+    def search_recipes_page(self, query: str, search_type: str = "normal", limit: int = 10, category: str = None, max_calories: float = None):
+        return self.mt_recipes.search_recipes_page(query, search_type, limit=limit, category=category, max_calories=max_calories)
+
     def get_recipe_details(self, recipe_id: int):
         return self.mt_recipes.get_recipe_details_by_id(recipe_id)
     
@@ -101,3 +115,15 @@ class MealTracker:
     
     def get_recipe_id_by_name(self, recipe_name: str):
         return self.mt_recipes.get_recipe_id_by_name(recipe_name)
+
+    def grant_admin(self, username: str):
+        return self.mt_admin.grant_admin(username)
+
+    def build_search_indexes(self):
+        return self.mt_admin.build_search_indexes()
+
+    def get_search_index_stats(self):
+        return self.mt_admin.get_search_index_stats()
+
+    def rebuild_search_index(self):
+        return self.mt_admin.rebuild_search_index()
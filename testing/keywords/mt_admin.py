@@ -0,0 +1,64 @@
+from testing.keywords.utilities import Utilities
+from fastapi.testclient import TestClient
+from auth import auth2
+from resources.core.entity_cache import ingredient_cache, recipe_cache
+from testing.keywords.mt_profile import MtProfile
+
+LOCALHOST = "http://localhost:8000"
+class MTAdmin:
+    def __init__(self, client: TestClient, mt_profile: MtProfile):
+        self.client = client
+        self.utilities = Utilities()
+        self.mt_profile = mt_profile
+
+    def grant_admin(self, username: str):
+        """Add a user to the admins of the app under test (ADMIN_USERS is read once at startup)."""
+        self.utilities.log_info(f"Granting admin privileges to: {username}")
+        auth2.ADMIN_USERS.add(username)
+        return True
+
+    def build_search_indexes(self):
+        """Build the ingredient and recipe search indexes as app startup does.
+
+        The keywords call the app without entering the TestClient, so the lifespan that warms the
+        caches never runs; change log polling and rebuilds only act on a built cache.
+        """
+        ingredient_cache.build_cache()
+        recipe_cache.build_cache()
+        return ingredient_cache.built and recipe_cache.built
+
+    def get_search_index_stats(self):
+        """Get the search index statistics of the ingredient and recipe caches."""
+        if not self.mt_profile.login_user_json:
+            self.utilities.log_error("Login JSON is None. Please login first.")
+            return False
+        try:
+            token = self.mt_profile.login_user_json.get("access_token")
+        except Exception as e:
+            self.utilities.log_error(f"Failed to get access token from profile JSON: {e}")
+            return False
+        headers = {"Authorization": f"Bearer {token}"}
+        self.utilities.log_info("Retrieving search index stats")
+        response = self.client.get(f"{LOCALHOST}/admin/search-index", headers=headers)
+        self.utilities.log_info(f"Response status code: {response.status_code}")
+        if response.status_code != 200:
+            self.utilities.log_error(f"Failed to retrieve search index stats: {response.json()}")
+        return response.json()
+
+    def rebuild_search_index(self):
+        """Start a background rebuild of the search indexes."""
+        if not self.mt_profile.login_user_json:
+            self.utilities.log_error("Login JSON is None. Please login first.")
+            return False
+        try:
+            token = self.mt_profile.login_user_json.get("access_token")
+        except Exception as e:
+            self.utilities.log_error(f"Failed to get access token from profile JSON: {e}")
+            return False
+        headers = {"Authorization": f"Bearer {token}"}
+        self.utilities.log_info("Starting search index rebuild")
+        response = self.client.post(f"{LOCALHOST}/admin/search-index/rebuild", headers=headers)
+        self.utilities.log_info(f"Response status code: {response.status_code}")
+        if response.status_code != 202:
+            self.utilities.log_error(f"Failed to start search index rebuild: {response.json()}")
+        return response.json()
@@ -1,4 +1,7 @@
-from routers.schemas import IngredientsSummary
+from routers.schemas import IngredientsBase, IngredientsSummary
+from db import db_ingredients
+from db.database import SessionLocal
+from resources.core.entity_cache import ingredient_cache
 from testing.keywords import DATA_PATH
 from testing.keywords.utilities import Utilities
 from fastapi.testclient import TestClient
@@ -144,7 +147,7 @@ class MTIngredients:
                 self.utilities.log_error(f"Failed to create ingredient from file data: {ingredient}")
         return True
     
-    def search_ingredient_in_database(self, ingredient_name:str,type='normal',limit=10):
+    def search_ingredient_in_database(self, ingredient_name:str,type='normal',limit=10,session=None):
         if not self.mt_profile.login_user_json:
             self.utilities.log_error("Login JSON is None. Please login first.")
             return False
@@ -160,6 +163,8 @@ class MTIngredients:
             "search_type": type,
             "limit": limit
         }
+        if session:
+            params["session"] = session
         response = self.client.get(f"{LOCALHOST}/ingredients/search", params=params, headers=headers)
         self.utilities.log_info(f"Response status code: {response.status_code}")
         if response.status_code != 200:
@@ -171,6 +176,54 @@ class MTIngredients:
                 return int(item["id"])
         return False
     
+    def search_ingredients_page(self, query: str, type='normal', limit=10, category=None, max_calories=None):
+        """Search ingredients and return the whole response page (items, stages, partial)."""
+        if not self.mt_profile.login_user_json:
+            self.utilities.log_error("Login JSON is None. Please login first.")
+            return False
+        try:
+            token = self.mt_profile.login_user_json.get("access_token")
+        except Exception as e:
+            self.utilities.log_error(f"Failed to get access token from profile JSON: {e}")
+            return False
+        headers = {"Authorization": f"Bearer {token}"}
+        params = {"query": query, "search_type": type, "limit": limit}
+        if category is not None:
+            params["category"] = category
+        if max_calories is not None:
+            params["max_calories"] = max_calories
+        self.utilities.log_info(f"Searching ingredients with: {params}")
+        response = self.client.get(f"{LOCALHOST}/ingredients/search", params=params, headers=headers)
+        self.utilities.log_info(f"Response status code: {response.status_code}")
+        if response.status_code != 200:
+            self.utilities.log_error(f"Failed to search ingredients: {response.json()}")
+        return response.json()
+
+    def create_ingredient_in_other_worker(self, ingredient_data: dict):
+        """Create an ingredient straight in the database, as another worker process would.
+
+        The row and its change log entry are committed without touching this process's search
+        index, so the ingredient only becomes searchable once the change log is applied.
+        """
+        if not self.mt_profile.login_user_json:
+            self.utilities.log_error("Login JSON is None. Please login first.")
+            return False
+        db = SessionLocal()
+        try:
+            ingredient = db_ingredients.create(db, IngredientsBase(**ingredient_data),
+                                               self.mt_profile.login_user_json.get("user_id"))
+            self.utilities.log_info(f"Created ingredient {ingredient.name} with ID {ingredient.id} outside the API")
+            return int(ingredient.id)
+        except Exception as e:
+            self.utilities.log_error(f"Failed to create ingredient outside the API: {e}")
+            return False
+        finally:
+            db.close()
+
+    def apply_ingredient_changes(self):
+        """Apply the ingredient change log rows this process has not seen; returns how many were read."""
+        return ingredient_cache.poll_changes()
+
     def get_ingredient_by_id(self, ingredient_id: int):
         """Get ingredient details by ID."""
         if not self.mt_profile.login_user_json:
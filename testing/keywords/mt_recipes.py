@@ -113,6 +113,29 @@ class MTRecipes:
                 return int(item["id"])
         return False
     
+    def search_recipes_page(self, query: str, search_type: str = "normal", limit: int = 10, category=None, max_calories=None):
+        """Search recipes and return the whole response page (items, stages, partial)."""
+        if not self.mt_profile.login_user_json:
+            self.utilities.log_error("Login JSON is None. Please login first.")
+            return False
+        try:
+            token = self.mt_profile.login_user_json.get("access_token")
+        except Exception as e:
+            self.utilities.log_error(f"Failed to get access token from profile JSON: {e}")
+            return False
+        headers = {"Authorization": f"Bearer {token}"}
+        params = {"query": query, "search_type": search_type, "limit": limit}
+        if category is not None:
+            params["category"] = category
+        if max_calories is not None:
+            params["max_calories"] = max_calories
+        self.utilities.log_info(f"Searching recipes with: {params}")
+        response = self.client.get(f"{LOCALHOST}/recipes/search", headers=headers, params=params)
+        self.utilities.log_info(f"Response status code: {response.status_code}")
+        if response.status_code != 200:
+            self.utilities.log_error(f"Failed to search recipes: {response.json()}")
+        return response.json()
+
     def browse_recipes(self):
         """Retrieve all recipes."""
         if not self.mt_profile.login_user_json: